@@ -20,8 +20,10 @@ Let's build web applications with Flask!
 print("🐍 Welcome to Day 14: Web Development with Flask!")
 print("=" * 55)
 
-from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash
+from flask import Flask, render_template, request, jsonify, redirect, url_for, session, flash, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from datetime import datetime
 import os
 import json
@@ -178,6 +180,15 @@ class Post(db.Model):
     def __repr__(self):
         return f'<Post {self.title}>'
 
+def duplicate_user_field(error):
+    """Return 'username' or 'email' for a unique-constraint IntegrityError, else None."""
+    message = str(getattr(error, 'orig', error))
+    for field in ('username', 'email'):
+        # SQLite: "UNIQUE constraint failed: user.email"; PostgreSQL: "user_email_key"
+        if f'user.{field}' in message or f'user_{field}_key' in message:
+            return field
+    return None
+
 # Database routes
 @app.route('/users')
 def list_users():
@@ -192,19 +203,18 @@ def create_user():
         username = request.form.get('username')
         email = request.form.get('email')
         
-        # Check if user already exists
-        if User.query.filter_by(username=username).first():
-            flash('Username already exists!')
-            return redirect(url_for('create_user'))
-        
-        if User.query.filter_by(email=email).first():
-            flash('Email already exists!')
-            return redirect(url_for('create_user'))
-        
-        # Create new user
+        # Insert and let the unique constraints catch duplicates (one round trip, no race)
         new_user = User(username=username, email=email)
         db.session.add(new_user)
-        db.session.commit()
+        try:
+            db.session.commit()
+        except IntegrityError as error:
+            db.session.rollback()
+            field = duplicate_user_field(error)
+            if field is None:
+                raise
+            flash(f'{field.capitalize()} already exists!')
+            return redirect(url_for('create_user'))
         
         flash('User created successfully!')
         return redirect(url_for('list_users'))
@@ -223,16 +233,49 @@ print("\n🔌 RESTful API DEVELOPMENT")
 print("-" * 30)
 
 # API routes
+USER_FIELDS = ('id', 'username', 'email', 'created_at')
+MAX_PAGE_SIZE = 1000
+
+def user_row_to_dict(row, fields=USER_FIELDS):
+    """Serialize a (possibly projected) user row."""
+    data = {}
+    for field in fields:
+        value = getattr(row, field)
+        data[field] = value.isoformat() if isinstance(value, datetime) else value
+    return data
+
 @app.route('/api/users', methods=['GET'])
 def api_get_users():
-    """Get all users (API)."""
-    users = User.query.all()
-    return jsonify([{
-        'id': user.id,
-        'username': user.username,
-        'email': user.email,
-        'created_at': user.created_at.isoformat()
-    } for user in users])
+    """Get users a page at a time (API).
+
+    ?limit=N&after=<last id> pages by primary key (the next page is in the
+    Link header), ?fields=id,username selects columns, and ?format=ndjson
+    streams every matching user as one JSON object per line.
+    """
+    fields = request.args.get('fields', ','.join(USER_FIELDS)).split(',')
+    unknown = set(fields) - set(USER_FIELDS)
+    if unknown:
+        return jsonify({'error': f"Unknown fields: {', '.join(sorted(unknown))}"}), 400
+
+    # Keyset pagination: WHERE id > ? uses the primary key index at any depth
+    after = request.args.get('after', 0, type=int)
+    columns = [getattr(User, field) for field in dict.fromkeys(['id'] + fields)]
+    query = db.select(*columns).where(User.id > after).order_by(User.id)
+
+    if request.args.get('format') == 'ndjson':
+        def generate():
+            rows = db.session.execute(query.execution_options(yield_per=1000))
+            for row in rows:
+                yield json.dumps(user_row_to_dict(row, fields)) + '\n'
+        return app.response_class(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    limit = max(1, min(request.args.get('limit', 100, type=int), MAX_PAGE_SIZE))
+    rows = db.session.execute(query.limit(limit)).all()
+    response = jsonify([user_row_to_dict(row, fields) for row in rows])
+    if len(rows) == limit:
+        next_args = {**request.args.to_dict(), 'after': rows[-1].id, 'limit': limit}
+        response.headers['Link'] = f'<{url_for("api_get_users", **next_args)}>; rel="next"'
+    return response
 
 @app.route('/api/users/<int:user_id>', methods=['GET'])
 def api_get_user(user_id):
@@ -254,24 +297,90 @@ def api_create_user():
     if not data or 'username' not in data or 'email' not in data:
         return jsonify({'error': 'Username and email are required'}), 400
     
-    # Check if user already exists
-    if User.query.filter_by(username=data['username']).first():
-        return jsonify({'error': 'Username already exists'}), 400
-    
-    if User.query.filter_by(email=data['email']).first():
-        return jsonify({'error': 'Email already exists'}), 400
-    
-    # Create new user
+    # Create new user; duplicates are reported by the unique constraints
     new_user = User(username=data['username'], email=data['email'])
     db.session.add(new_user)
+    try:
+        db.session.flush()
+    except IntegrityError as error:
+        db.session.rollback()
+        field = duplicate_user_field(error)
+        if field is None:
+            raise
+        return jsonify({'error': f'{field.capitalize()} already exists'}), 400
+
+    # Serialize before commit: commit expires the instance, and reading it
+    # afterwards would cost a SELECT to reload the row just inserted
+    payload = user_row_to_dict(new_user)
     db.session.commit()
-    
-    return jsonify({
-        'id': new_user.id,
-        'username': new_user.username,
-        'email': new_user.email,
-        'created_at': new_user.created_at.isoformat()
-    }), 201
+    return jsonify(payload), 201
+
+BULK_CHUNK_SIZE = 1000
+
+def reject_duplicate_users(chunk, errors):
+    """Drop chunk rows whose username or email is taken, recording an error for each.
+
+    A value counts as taken if it is already stored or appears earlier in the chunk.
+    """
+    usernames = [values['username'] for _, values in chunk]
+    emails = [values['email'] for _, values in chunk]
+    taken = db.session.execute(
+        db.select(User.username, User.email)
+        .where(User.username.in_(usernames) | User.email.in_(emails))
+    ).all()
+    seen = {'username': {row.username for row in taken}, 'email': {row.email for row in taken}}
+    kept = []
+    for index, values in chunk:
+        field = next((f for f in ('username', 'email') if values[f] in seen[f]), None)
+        if field:
+            errors.append({'index': index, 'error': f'{field.capitalize()} already exists'})
+            continue
+        seen['username'].add(values['username'])
+        seen['email'].add(values['email'])
+        kept.append((index, values))
+    return kept
+
+@app.route('/api/users/bulk', methods=['POST'])
+def api_bulk_create_users():
+    """Create many users in one request (API).
+
+    Each chunk is one executemany, committed on its own. A chunk that violates
+    a unique constraint is rolled back, its duplicates are looked up and
+    reported, and the rest is inserted again. No savepoints are involved:
+    pysqlite does not emit BEGIN before SAVEPOINT, so begin_nested() would not
+    nest inside a real transaction there.
+    """
+    data = request.get_json()
+    if not isinstance(data, list):
+        return jsonify({'error': 'Expected a JSON list of users'}), 400
+
+    rows, errors = [], []
+    for index, item in enumerate(data):
+        if isinstance(item, dict) and item.get('username') and item.get('email'):
+            rows.append((index, {'username': item['username'], 'email': item['email']}))
+        else:
+            errors.append({'index': index, 'error': 'Username and email are required'})
+
+    insert_users = User.__table__.insert()
+    created = 0
+    for start in range(0, len(rows), BULK_CHUNK_SIZE):
+        chunk = rows[start:start + BULK_CHUNK_SIZE]
+        while chunk:
+            try:
+                db.session.execute(insert_users, [values for _, values in chunk])
+                db.session.commit()
+            except IntegrityError as error:
+                db.session.rollback()
+                remaining = reject_duplicate_users(chunk, errors)
+                if len(remaining) == len(chunk):
+                    raise  # not a duplicate we can report
+                chunk = remaining  # a concurrent insert may still collide; loop again
+                continue
+            created += len(chunk)
+            break
+
+    errors.sort(key=lambda error: error['index'])
+    return jsonify({'created': created, 'errors': errors}), 201 if created else 400
 
 @app.route('/api/users/<int:user_id>', methods=['PUT'])
 def api_update_user(user_id):
@@ -302,12 +411,34 @@ def api_delete_user(user_id):
     
     return jsonify({'message': 'User deleted successfully'})
 
+@app.route('/api/posts', methods=['GET'])
+def api_get_posts():
+    """Get posts with their authors a page at a time (API).
+
+    joinedload fetches each page's authors in the same query; touching the
+    lazy post.author instead would run one SELECT per author (N+1).
+    """
+    after = request.args.get('after', 0, type=int)
+    limit = max(1, min(request.args.get('limit', 100, type=int), MAX_PAGE_SIZE))
+    posts = db.session.execute(
+        db.select(Post).options(joinedload(Post.author))
+        .where(Post.id > after).order_by(Post.id).limit(limit)
+    ).scalars().all()
+    return jsonify([{
+        'id': post.id,
+        'title': post.title,
+        'author': post.author.username,
+        'created_at': post.created_at.isoformat()
+    } for post in posts])
+
 print("API endpoints defined:")
-print("  - GET /api/users (list all users)")
+print("  - GET /api/users (keyset pages, ?fields= projection, ?format=ndjson stream)")
 print("  - GET /api/users/<id> (get specific user)")
 print("  - POST /api/users (create user)")
+print("  - POST /api/users/bulk (create many users)")
 print("  - PUT /api/users/<id> (update user)")
 print("  - DELETE /api/users/<id> (delete user)")
+print("  - GET /api/posts (posts with authors, eager-loaded)")
 
 # =============================================================================
 # 6. SESSION MANAGEMENT
@@ -316,6 +447,157 @@ print("  - DELETE /api/users/<id> (delete user)")
 print("\n🔐 SESSION MANAGEMENT")
 print("-" * 25)
 
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import g
+from sqlalchemy import event
+
+# Detached copy of a user row; safe to share between requests and threads
+CachedUser = namedtuple('CachedUser', ['id', 'username', 'email', 'created_at'])
+
+class UserCache:
+    """Small TTL cache of hot user rows keyed by id (plus a username index).
+
+    Entries are dropped after commits that update or delete the user (see
+    track), so authenticated pages only hit the database on a miss.
+    Invalidation is in-process only: another worker process keeps serving its
+    own copy until the TTL runs out, so keep the TTL short or add a shared
+    channel (e.g. Redis pub/sub) when running several workers.
+
+    Read generation before querying the database and pass it to put; a row
+    read before an invalidation is then not cached.
+    """
+
+    def __init__(self, ttl=300, max_size=10_000, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock
+        self._by_id = OrderedDict()
+        self._ids_by_username = {}
+        self._lock = threading.Lock()
+        self.generation = 0  # bumped by every invalidation
+        self.hits = self.misses = 0
+
+    def _lookup(self, user_id):
+        # Caller holds the lock
+        entry = self._by_id.get(user_id)
+        if entry is not None and entry[1] < self.clock():
+            self._remove(user_id)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._by_id.move_to_end(user_id)
+        self.hits += 1
+        return entry[0]
+
+    def _remove(self, user_id):
+        # Caller holds the lock
+        entry = self._by_id.pop(user_id, None)
+        if entry is not None and self._ids_by_username.get(entry[0].username) == user_id:
+            del self._ids_by_username[entry[0].username]
+
+    def get(self, user_id):
+        with self._lock:
+            return self._lookup(user_id)
+
+    def get_by_username(self, username):
+        with self._lock:
+            user_id = self._ids_by_username.get(username)
+            if user_id is None:
+                self.misses += 1
+                return None
+            user = self._lookup(user_id)
+        return user if user is not None and user.username == username else None
+
+    def put(self, user, generation):
+        """Cache user unless an invalidation happened since generation was read."""
+        cached = CachedUser(user.id, user.username, user.email, user.created_at)
+        with self._lock:
+            if generation != self.generation:
+                return cached
+            now = self.clock()
+            self._remove(cached.id)
+            self._by_id[cached.id] = (cached, now + self.ttl)
+            self._ids_by_username[cached.username] = cached.id
+            # Evict from the LRU end: overflow, plus expired entries found there
+            while self._by_id:
+                oldest_id, (_, expires) = next(iter(self._by_id.items()))
+                if len(self._by_id) <= self.max_size and expires >= now:
+                    break
+                self._remove(oldest_id)
+        return cached
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self.generation += 1
+            self._remove(user_id)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._by_id.clear()
+            self._ids_by_username.clear()
+
+    def track(self, session):
+        """Invalidate users changed by each commit of session."""
+
+        @event.listens_for(session, 'after_flush')
+        def collect(session, flush_context):
+            changed = session.info.setdefault('changed_user_ids', set())
+            for obj in list(session.dirty) + list(session.deleted):
+                if isinstance(obj, User):
+                    changed.add(obj.id)
+
+        @event.listens_for(session, 'do_orm_execute')
+        def collect_bulk(orm_execute_state):
+            # A Core UPDATE/DELETE could touch any user
+            if ((orm_execute_state.is_update or orm_execute_state.is_delete)
+                    and orm_execute_state.statement.table.name == User.__tablename__):
+                orm_execute_state.session.info['changed_user_ids'] = None
+
+        @event.listens_for(session, 'after_commit')
+        def invalidate(session):
+            if 'changed_user_ids' not in session.info:
+                return
+            changed = session.info.pop('changed_user_ids')
+            if changed is None:
+                self.clear()
+            else:
+                for user_id in changed:
+                    self.invalidate(user_id)
+
+        @event.listens_for(session, 'after_rollback')
+        def discard(session):
+            session.info.pop('changed_user_ids', None)
+
+user_cache = UserCache()
+user_cache.track(db.session)
+
+def load_user(user_id):
+    """Return a user for this request: request map, then the TTL cache, then the database."""
+    users = g.setdefault('users_by_id', {})
+    if user_id not in users:
+        generation = user_cache.generation
+        user = user_cache.get(user_id)
+        if user is None:
+            row = db.session.get(User, user_id)
+            user = user_cache.put(row, generation) if row is not None else None
+        users[user_id] = user
+    return users[user_id]
+
+def load_user_by_username(username):
+    """Like load_user, for the login form."""
+    generation = user_cache.generation
+    user = user_cache.get_by_username(username)
+    if user is None:
+        row = User.query.filter_by(username=username).first()
+        user = user_cache.put(row, generation) if row is not None else None
+    if user is not None:
+        g.setdefault('users_by_id', {})[user.id] = user
+    return user
+
 # Session management routes
 @app.route('/login', methods=['GET', 'POST'])
 def login():
@@ -325,7 +607,7 @@ def login():
         password = request.form.get('password')  # In real app, hash password
         
         # Simple authentication (in real app, use proper authentication)
-        user = User.query.filter_by(username=username).first()
+        user = load_user_by_username(username)
         if user:
             session['user_id'] = user.id
             session['username'] = user.username
@@ -350,7 +632,11 @@ def dashboard():
         flash('Please log in to access the dashboard.')
         return redirect(url_for('login'))
     
-    user = User.query.get(session['user_id'])
+    user = load_user(session['user_id'])
+    if user is None:
+        # The account was deleted since login
+        session.clear()
+        return redirect(url_for('login'))
     return render_template('dashboard.html', user=user)
 
 print("Session management routes defined:")
@@ -520,7 +806,1383 @@ Deployment Best Practices:
 """)
 
 # =============================================================================
-# 11. EXERCISES
+# 11. CONDITIONAL GET AND COMPRESSION
+# =============================================================================
+
+print("\n📦 CONDITIONAL GET AND COMPRESSION")
+print("-" * 36)
+
+import gzip
+import itertools
+import tempfile
+import uuid
+from contextlib import contextmanager
+from sqlalchemy import create_engine
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Users seeded by the pagination, bulk import, async and load-test demos, and
+# requests per load test. The defaults keep the file quick; set
+# DAY14_DEMO_USERS=100000 and DAY14_LOAD_TEST_REQUESTS=3000 for full-size runs.
+DEMO_USERS = int(os.environ.get('DAY14_DEMO_USERS', 5_000))
+LOAD_TEST_REQUESTS = int(os.environ.get('DAY14_LOAD_TEST_REQUESTS', 500))
+
+@contextmanager
+def demo_database():
+    """Point db at a throwaway SQLite file for the duration of a demo.
+
+    The app's configured database (example.db) is never opened, created or
+    dropped; the temporary file is deleted afterwards.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        demo_engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'demo.db')}")
+        with app.app_context():
+            engines = db.engines  # the app's bind key -> Engine mapping
+            original = engines[None]
+            engines[None] = demo_engine
+            db.create_all()
+        try:
+            yield
+        finally:
+            with app.app_context():
+                db.session.remove()
+                engines[None] = original
+            demo_engine.dispose()
+
+@contextmanager
+def capture_statements(engine=None):
+    """Collect the SQL statements run on engine (default: db.engine) inside the block."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    if engine is None:
+        with app.app_context():
+            engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+class TableVersions:
+    """Per-table change counters used to build ETags without reading the data.
+
+    Counters are bumped after the commit that changed a table, so a reader
+    can never pair a new version with old rows. They live in process memory;
+    with several workers, keep them in Redis or a small versions table.
+    """
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:8]  # a restart invalidates old ETags
+        self.counts = {}
+        self._lock = threading.Lock()
+
+    def bump(self, *tables):
+        with self._lock:
+            for table in tables:
+                self.counts[table] = self.counts.get(table, 0) + 1
+
+    def etag(self, tables):
+        return self.epoch + '-' + '-'.join(f"{table}.{self.counts.get(table, 0)}" for table in tables)
+
+    def track(self, session):
+        """Bump the tables touched by each commit of session."""
+
+        @event.listens_for(session, 'after_flush')
+        def collect(session, flush_context):
+            touched = session.info.setdefault('touched_tables', set())
+            for obj in itertools.chain(session.new, session.dirty, session.deleted):
+                touched.add(obj.__table__.name)
+
+        @event.listens_for(session, 'do_orm_execute')
+        def collect_statement(orm_execute_state):
+            # Core INSERT/UPDATE/DELETE (e.g. bulk imports) skip the flush events
+            if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+                touched = orm_execute_state.session.info.setdefault('touched_tables', set())
+                touched.add(orm_execute_state.statement.table.name)
+
+        @event.listens_for(session, 'after_commit')
+        def publish(session):
+            self.bump(*session.info.pop('touched_tables', ()))
+
+        @event.listens_for(session, 'after_rollback')
+        def discard(session):
+            session.info.pop('touched_tables', None)
+
+def conditional_get(app, versions, endpoint_tables):
+    """Answer If-None-Match with 304 for read endpoints, keyed on table versions.
+
+    endpoint_tables maps an endpoint name to the tables its response is built
+    from. The ETag is computed before the view runs, so a match never touches
+    the database, and a write during the view only makes the tag too old.
+    """
+
+    @app.before_request
+    def check_etag():
+        tables = endpoint_tables.get(request.endpoint)
+        if tables and request.method in ('GET', 'HEAD'):
+            g.etag = versions.etag(tables)
+            if request.if_none_match.contains_weak(g.etag):
+                response = app.response_class(status=304)
+                response.set_etag(g.etag, weak=True)
+                return response
+
+    @app.after_request
+    def add_etag(response):
+        etag = g.pop('etag', None)
+        if etag and response.status_code == 200:
+            # Weak, because compression changes the bytes but not the content
+            response.set_etag(etag, weak=True)
+            response.headers.setdefault('Cache-Control', 'no-cache')
+        return response
+
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'application/javascript',
+                          'text/html', 'text/plain', 'text/css', 'text/csv'}
+
+def compress_responses(app):
+    """Compress large responses with brotli (if installed) or gzip.
+
+    Settings come from app.config: COMPRESS_MIN_SIZE, COMPRESS_GZIP_LEVEL and
+    COMPRESS_BROTLI_QUALITY. Streamed responses are passed through untouched.
+    """
+    app.config.setdefault('COMPRESS_MIN_SIZE', 1024)
+    app.config.setdefault('COMPRESS_GZIP_LEVEL', 6)
+    app.config.setdefault('COMPRESS_BROTLI_QUALITY', 4)
+    available = ['br', 'gzip'] if brotli else ['gzip']
+
+    @app.after_request
+    def compress(response):
+        response.vary.add('Accept-Encoding')
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+        data = response.get_data()
+        if len(data) < app.config['COMPRESS_MIN_SIZE']:
+            return response
+
+        encoding = request.accept_encodings.best_match(available)
+        if encoding == 'br':
+            response.set_data(brotli.compress(data, quality=app.config['COMPRESS_BROTLI_QUALITY']))
+        elif encoding == 'gzip':
+            response.set_data(gzip.compress(data, compresslevel=app.config['COMPRESS_GZIP_LEVEL'], mtime=0))
+        else:
+            return response
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+def benchmark_compression(payload, repeat=5):
+    """Time every gzip level (and brotli quality) on payload.
+
+    Returns (codec, level, compressed_size, milliseconds) rows.
+    """
+    codecs = [('gzip', level, lambda data, level=level: gzip.compress(data, compresslevel=level, mtime=0))
+              for level in range(1, 10)]
+    if brotli:
+        codecs += [('br', quality, lambda data, quality=quality: brotli.compress(data, quality=quality))
+                   for quality in range(0, 12)]
+    rows = []
+    for codec, level, compress in codecs:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            size = len(compress(payload))
+        rows.append((codec, level, size, (time.perf_counter() - start) / repeat * 1000))
+    return rows
+
+def pick_compression_level(rows, codec='gzip', tolerance=0.05):
+    """Fastest level whose output is within tolerance of the smallest one."""
+    candidates = [row for row in rows if row[0] == codec]
+    smallest = min(size for _, _, size, _ in candidates)
+    good_enough = [row for row in candidates if row[2] <= smallest * (1 + tolerance)]
+    return min(good_enough, key=lambda row: row[3])[1]
+
+table_versions = TableVersions()
+table_versions.track(db.session)
+conditional_get(app, table_versions, {
+    'api_get_users': ('user',),
+    'api_get_user': ('user',),
+})
+compress_responses(app)
+
+def demonstrate_conditional_get():
+    """Demonstrate 304 responses from table versions and tuned compression."""
+    print("Conditional GET and Compression:")
+
+    with demo_database(), capture_statements() as statements:
+        with app.app_context():
+            db.session.add_all([User(username=f"user{i}", email=f"user{i}@example.com")
+                                for i in range(2000)])
+            db.session.commit()
+        statements.clear()
+        client = app.test_client()
+
+        # 1. ETag and 304
+        print("\n1. ETag Revalidation:")
+        response = client.get('/api/users?limit=1000')
+        etag = response.headers['ETag']
+        print(f"First GET: {response.status_code}, {len(response.data):,} bytes, "
+              f"ETag {etag}, {len(statements)} queries")
+
+        statements.clear()
+        response = client.get('/api/users?limit=1000', headers={'If-None-Match': etag})
+        print(f"Revalidate: {response.status_code}, {len(response.data)} bytes, {len(statements)} queries")
+
+        client.put('/api/users/1', json={'username': 'renamed'})
+        statements.clear()
+        response = client.get('/api/users?limit=1000', headers={'If-None-Match': etag})
+        print(f"After PUT: {response.status_code}, new ETag {response.headers['ETag']}, "
+              f"{len(statements)} queries")
+
+        # 2. Pick a compression level for this payload
+        print("\n2. Compression Benchmark:")
+        payload = client.get('/api/users?limit=1000').data
+        rows = benchmark_compression(payload)
+        for codec, level, size, ms in rows:
+            print(f"  {codec:<4} {level:>2}: {size:>7,} bytes ({size / len(payload):.1%}) in {ms:.2f} ms")
+        app.config['COMPRESS_GZIP_LEVEL'] = pick_compression_level(rows, 'gzip')
+        print(f"Chosen gzip level: {app.config['COMPRESS_GZIP_LEVEL']}")
+        if brotli:
+            app.config['COMPRESS_BROTLI_QUALITY'] = pick_compression_level(rows, 'br')
+            print(f"Chosen brotli quality: {app.config['COMPRESS_BROTLI_QUALITY']}")
+
+        # 3. Negotiated response
+        print("\n3. Compressed Response:")
+        response = client.get('/api/users?limit=1000', headers={'Accept-Encoding': 'br, gzip'})
+        print(f"Content-Encoding: {response.headers.get('Content-Encoding')}, "
+              f"{len(payload):,} -> {len(response.data):,} bytes, Vary: {response.headers['Vary']}")
+        small = client.get('/api/users/1', headers={'Accept-Encoding': 'gzip'})
+        print(f"Small response ({len(small.data)} bytes) sent uncompressed: "
+              f"{'Content-Encoding' not in small.headers}")
+
+demonstrate_conditional_get()
+
+# =============================================================================
+# 12. PAGINATION AND STREAMING
+# =============================================================================
+
+print("\n📜 PAGINATION AND STREAMING")
+print("-" * 28)
+
+import tracemalloc
+
+def demonstrate_pagination():
+    """Demonstrate keyset pages, column projection and NDJSON export."""
+    print("Pagination and Streaming:")
+
+    with demo_database():
+        with app.app_context():
+            db.session.execute(User.__table__.insert(), [
+                {'username': f"user{i}", 'email': f"user{i}@example.com", 'created_at': datetime(2024, 1, 1)}
+                for i in range(DEMO_USERS)
+            ])
+            db.session.commit()
+        client = app.test_client()
+
+        # 1. Follow the Link header
+        print("\n1. Keyset Pages:")
+        url, pages = '/api/users?limit=250&fields=id,username', 0
+        while url and pages < 3:
+            response = client.get(url)
+            users = response.get_json()
+            print(f"  {url:<45} -> ids {users[0]['id']}..{users[-1]['id']}")
+            url = response.headers.get('Link', '').partition('<')[2].partition('>')[0]
+            pages += 1
+
+        # 2. Keyset vs OFFSET at increasing depth
+        print("\n2. Page Cost by Depth (100 rows):")
+        with app.app_context():
+            for depth in (0, DEMO_USERS // 2, DEMO_USERS - 100):
+                start = time.perf_counter()
+                db.session.execute(db.select(User.id).order_by(User.id).offset(depth).limit(100)).all()
+                offset_ms = (time.perf_counter() - start) * 1000
+                start = time.perf_counter()
+                db.session.execute(db.select(User.id).where(User.id > depth).order_by(User.id).limit(100)).all()
+                keyset_ms = (time.perf_counter() - start) * 1000
+                print(f"  depth {depth:>6}: OFFSET {offset_ms:6.2f} ms, keyset {keyset_ms:5.2f} ms")
+
+        # 3. Projection
+        print("\n3. Column Projection:")
+        full = client.get('/api/users?limit=1000', headers={'Accept-Encoding': 'identity'})
+        slim = client.get('/api/users?limit=1000&fields=id,username', headers={'Accept-Encoding': 'identity'})
+        print(f"All fields: {len(full.data):,} bytes; id,username: {len(slim.data):,} bytes")
+        print(f"Unknown field: {client.get('/api/users?fields=password').get_json()}")
+
+        # 4. Streaming export vs building the whole list
+        print(f"\n4. NDJSON Export of {DEMO_USERS:,} Users:")
+        tracemalloc.start()
+        with app.app_context():
+            everything = [{'id': user.id, 'username': user.username, 'email': user.email,
+                           'created_at': user.created_at.isoformat()} for user in User.query.all()]
+            body = json.dumps(everything)
+        _, list_peak = tracemalloc.get_traced_memory()
+        del everything, body
+        tracemalloc.stop()
+
+        tracemalloc.start()
+        response = client.get('/api/users?format=ndjson', buffered=False)
+        lines = sum(chunk.count(b'\n') for chunk in response.response)
+        response.close()
+        _, stream_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"User.query.all() + one JSON list: peak {list_peak / 1024 / 1024:.1f} MB")
+        print(f"Streamed {lines:,} lines: peak {stream_peak / 1024 / 1024:.1f} MB")
+
+demonstrate_pagination()
+
+# =============================================================================
+# 13. SINGLE-INSERT SIGNUP AND BULK IMPORT
+# =============================================================================
+
+print("\n👥 SINGLE-INSERT SIGNUP AND BULK IMPORT")
+print("-" * 40)
+
+def demonstrate_user_creation():
+    """Demonstrate constraint-based duplicate checks and the bulk endpoint."""
+    print("User Creation:")
+
+    with demo_database(), capture_statements() as statements:
+        client = app.test_client()
+
+        # 1. Round trips per signup
+        print("\n1. Statements per Signup:")
+        response = client.post('/api/users', json={'username': 'alice', 'email': 'alice@example.com'})
+        inserts = [statement.split()[0] for statement in statements]
+        print(f"New user: {response.status_code}, statements {inserts}")
+        for payload in ({'username': 'alice', 'email': 'other@example.com'},
+                        {'username': 'alicia', 'email': 'alice@example.com'}):
+            statements.clear()
+            response = client.post('/api/users', json=payload)
+            print(f"Duplicate: {response.status_code} {response.get_json()}, {len(statements)} statement(s)")
+
+        # 2. Concurrent signups for the same name
+        print("\n2. Racing Signups:")
+        results = []
+
+        def signup(i):
+            response = app.test_client().post('/api/users', json={'username': 'bob', 'email': f'bob{i}@example.com'})
+            results.append(response.status_code)
+
+        threads = [threading.Thread(target=signup, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        print(f"8 concurrent signups for 'bob': {results.count(201)} created, {results.count(400)} rejected")
+
+        # 3. Bulk import vs one request per user
+        print("\n3. Bulk Import:")
+        singles = min(1_000, DEMO_USERS // 20)
+        start = time.perf_counter()
+        for i in range(singles):
+            client.post('/api/users', json={'username': f'single{i}', 'email': f'single{i}@example.com'})
+        single_seconds = time.perf_counter() - start
+
+        users = [{'username': f'bulk{i}', 'email': f'bulk{i}@example.com'} for i in range(DEMO_USERS)]
+        users[DEMO_USERS // 4] = {'username': 'alice', 'email': 'new@example.com'}
+        users[DEMO_USERS * 3 // 5] = {'username': 'nobody'}
+        statements.clear()
+        start = time.perf_counter()
+        response = client.post('/api/users/bulk', json=users)
+        bulk_seconds = time.perf_counter() - start
+        result = response.get_json()
+        print(f"{singles:,} single POSTs: {single_seconds:.2f}s ({singles / single_seconds:,.0f} users/s)")
+        print(f"{DEMO_USERS:,} users in one POST: {bulk_seconds:.2f}s ({result['created'] / bulk_seconds:,.0f} users/s), "
+              f"{len(statements)} statements")
+        print(f"Created {result['created']:,}, errors {result['errors']}")
+
+demonstrate_user_creation()
+
+# =============================================================================
+# 14. CACHED SESSION USERS
+# =============================================================================
+
+print("\n🪪 CACHED SESSION USERS")
+print("-" * 24)
+
+from jinja2 import ChoiceLoader, DictLoader
+
+# Minimal stand-ins for the templates this tutorial does not ship
+DEMO_TEMPLATES = {
+    'login.html': 'Please log in',
+    'dashboard.html': 'Welcome, {{ user.username }}!',
+    '404.html': 'Not found',
+    '403.html': 'Forbidden',
+    '500.html': 'Server error',
+}
+
+@contextmanager
+def demo_templates():
+    """Serve DEMO_TEMPLATES ahead of the templates folder inside the block."""
+    original_loader = app.jinja_env.loader
+    app.jinja_env.loader = ChoiceLoader([DictLoader(DEMO_TEMPLATES), original_loader])
+    try:
+        yield
+    finally:
+        app.jinja_env.loader = original_loader
+
+def demonstrate_user_cache():
+    """Demonstrate the request identity map and commit-driven cache invalidation."""
+    print("Cached Session Users:")
+
+    with demo_templates(), demo_database(), capture_statements() as statements:
+        with app.app_context():
+            db.session.add(User(username='alice', email='alice@example.com'))
+            db.session.commit()
+        user_cache.clear()
+        client = app.test_client()
+        client.post('/login', data={'username': 'alice', 'password': 'secret'})
+
+        # 1. Repeated dashboard hits
+        print("\n1. 100 Dashboard Requests:")
+        statements.clear()
+        for _ in range(100):
+            page = client.get('/dashboard')
+        print(f"{page.get_data(as_text=True)!r}: {len(statements)} queries "
+              f"(cache hits {user_cache.hits}, misses {user_cache.misses})")
+
+        statements.clear()
+        for _ in range(100):
+            user_cache.clear()  # what every request paid before
+            client.get('/dashboard')
+        print(f"Without the TTL cache: {len(statements)} queries")
+
+        # 2. Several lookups inside one request
+        print("\n2. Identity Map Within a Request:")
+        user_cache.clear()
+        statements.clear()
+        with app.test_request_context():
+            same = load_user(1) is load_user(1) is load_user(1)
+        print(f"3 lookups, same object: {same}, {len(statements)} query")
+
+        # 3. Writes invalidate the cached row
+        print("\n3. Invalidation on Commit:")
+        client.get('/dashboard')
+        client.put('/api/users/1', json={'username': 'alice_w'})
+        statements.clear()
+        page = client.get('/dashboard')
+        print(f"After PUT: {page.get_data(as_text=True)!r}, {len(statements)} query")
+
+        client.delete('/api/users/1')
+        page = client.get('/dashboard')
+        print(f"After DELETE: {page.status_code} redirect to {page.headers['Location']}")
+
+        # 4. A read that races a commit
+        print("\n4. Read/Invalidate Race:")
+        generation = user_cache.generation
+        stale = CachedUser(2, 'bob', 'old@example.com', None)  # read just before another commit
+        user_cache.invalidate(2)  # that commit's after_commit hook
+        user_cache.put(stale, generation)
+        print(f"Stale row cached after the race: {user_cache.get(2) is not None}")
+
+        # 5. Expired entries are dropped, not just skipped
+        print("\n5. Expiry:")
+        now = [0.0]
+        short_lived = UserCache(ttl=10, clock=lambda: now[0])
+        for user_id in range(1, 6):
+            short_lived.put(CachedUser(user_id, f'user{user_id}', f'user{user_id}@example.com', None),
+                            short_lived.generation)
+        now[0] = 11
+        short_lived.get(1)
+        short_lived.put(CachedUser(6, 'user6', 'user6@example.com', None), short_lived.generation)
+        print(f"Entries held after the TTL passed: {len(short_lived._by_id)} (only the new one)")
+
+    user_cache.clear()
+
+demonstrate_user_cache()
+
+# =============================================================================
+# 15. ASYNC API (ASGI)
+# =============================================================================
+
+print("\n⚡ ASYNC API (ASGI)")
+print("-" * 20)
+
+import asyncio
+import io
+import random
+import re
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from urllib.parse import parse_qs
+
+class AsyncSQLiteConnection:
+    """A sqlite3 connection driven from asyncio through its own worker thread.
+
+    sqlite3 has no non-blocking API, so (like aiosqlite) every call runs on a
+    thread owned by the connection and the event loop only awaits it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite')
+        self._connection = None
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def _write(self, sql, params):
+        try:
+            cursor = self._connection.execute(sql, params)
+            self._connection.commit()
+            return cursor.lastrowid, cursor.rowcount
+        except Exception:
+            self._connection.rollback()
+            raise
+
+    async def open(self):
+        self._connection = await self._run(self._connect)
+
+    async def fetchall(self, sql, params=()):
+        return await self._run(lambda: self._connection.execute(sql, params).fetchall())
+
+    async def write(self, sql, params=()):
+        """Execute and commit one statement; returns (lastrowid, rowcount)."""
+        return await self._run(self._write, sql, params)
+
+    async def close(self):
+        await self._run(self._connection.close)
+        self._executor.shutdown()
+
+class AsyncSQLitePool:
+    """A fixed number of async connections; callers wait when all are in use."""
+
+    def __init__(self, path, size=8):
+        self.path = path
+        self.size = size
+        self._idle = None
+        self._connections = []
+
+    async def open(self):
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            connection = AsyncSQLiteConnection(self.path)
+            await connection.open()
+            self._connections.append(connection)
+            self._idle.put_nowait(connection)
+
+    @asynccontextmanager
+    async def connection(self):
+        connection = await self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put_nowait(connection)
+
+    async def close(self):
+        for connection in self._connections:
+            await connection.close()
+        self._connections.clear()
+
+class WSGIBridge:
+    """Serve a WSGI app (the Flask app) from ASGI on a bounded thread pool.
+
+    Responses are buffered, which is fine for the regular views; the NDJSON
+    export is streamed by AsyncUsersAPI itself.
+    """
+
+    def __init__(self, wsgi_app, max_workers=8):
+        self.wsgi_app = wsgi_app
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='wsgi')
+
+    async def __call__(self, scope, receive, send):
+        body = await read_body(receive)
+        environ = self._environ(scope, body)
+        loop = asyncio.get_running_loop()
+        status, headers, content = await loop.run_in_executor(self.executor, self._call, environ)
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': content})
+
+    @staticmethod
+    def _environ(scope, body):
+        server_name, server_port = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            'PATH_INFO': scope['path'],
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': server_name,
+            'SERVER_PORT': str(server_port),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        for name, value in scope.get('headers', []):
+            key = name.decode('latin-1').upper().replace('-', '_')
+            if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                key = 'HTTP_' + key
+            environ[key] = value.decode('latin-1')
+        return environ
+
+    def _call(self, environ):
+        captured = {}
+
+        def start_response(status, headers, exc_info=None):
+            captured['status'] = int(status.split()[0])
+            captured['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+
+        result = self.wsgi_app(environ, start_response)
+        try:
+            content = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        return captured['status'], captured['headers'], content
+
+async def read_body(receive):
+    """Collect an ASGI request body."""
+    body, more = b'', True
+    while more:
+        message = await receive()
+        body += message.get('body', b'')
+        more = message.get('more_body', False)
+    return body
+
+async def read_json(receive):
+    """Parse an ASGI JSON request body; None if it is empty, ValueError if malformed."""
+    body = await read_body(receive)
+    return json.loads(body) if body else None
+
+async def send_json(send, data, status=200):
+    body = json.dumps(data).encode()
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'application/json'),
+                            (b'content-length', str(len(body)).encode())]})
+    await send({'type': 'http.response.body', 'body': body})
+
+def _user_from_row(row, columns=USER_FIELDS, fields=None):
+    """Serialize a sqlite row of columns, keeping fields (default: all columns)."""
+    data = dict(zip(columns, row))
+    if data.get('created_at') is not None:
+        data['created_at'] = datetime.fromisoformat(data['created_at']).isoformat()
+    return {field: data[field] for field in fields or columns}
+
+class AsyncUsersAPI:
+    """ASGI app serving the /api/users CRUD endpoints on an AsyncSQLitePool.
+
+    Every other path (and method) is handed to the fallback, normally a
+    WSGIBridge around the Flask app. Writes bump table_versions and the
+    user_cache themselves, since they bypass the SQLAlchemy session.
+    """
+
+    USER_PATH = re.compile(r'^/api/users/(\d+)$')
+    SELECT_USER = 'SELECT id, username, email, created_at FROM user'
+    EXPORT_BATCH = 1000
+
+    def __init__(self, pool, fallback):
+        self.pool = pool
+        self.fallback = fallback
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        path, method = scope['path'], scope['method']
+        match = self.USER_PATH.match(path)
+        if path == '/api/users' and method in ('GET', 'POST'):
+            handler, args = (self.list_users if method == 'GET' else self.create_user), ()
+        elif match and method in ('GET', 'PUT', 'DELETE'):
+            handler = {'GET': self.get_user, 'PUT': self.update_user, 'DELETE': self.delete_user}[method]
+            args = (int(match.group(1)),)
+        else:
+            await self.fallback(scope, receive, send)
+            return
+        await handler(scope, receive, send, *args)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await self.pool.open()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.pool.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def list_users(self, scope, receive, send):
+        """Same parameters as the Flask view: after, limit, fields and format=ndjson."""
+        args = parse_qs(scope.get('query_string', b'').decode())
+        fields = args.get('fields', [','.join(USER_FIELDS)])[0].split(',')
+        unknown = set(fields) - set(USER_FIELDS)
+        if unknown:
+            await send_json(send, {'error': f"Unknown fields: {', '.join(sorted(unknown))}"}, 400)
+            return
+        try:
+            after = int(args.get('after', ['0'])[0])
+            limit = max(1, min(int(args.get('limit', ['100'])[0]), MAX_PAGE_SIZE))
+        except ValueError:
+            await send_json(send, {'error': 'after and limit must be integers'}, 400)
+            return
+        # Only validated names reach the SQL text
+        columns = list(dict.fromkeys(['id'] + fields))
+        select = f"SELECT {', '.join(columns)} FROM user WHERE id > ? ORDER BY id LIMIT ?"
+
+        if args.get('format', [''])[0] == 'ndjson':
+            await send({'type': 'http.response.start', 'status': 200,
+                        'headers': [(b'content-type', b'application/x-ndjson')]})
+            while True:
+                # One pooled connection per batch, so a slow client does not hold it
+                async with self.pool.connection() as connection:
+                    rows = await connection.fetchall(select, (after, self.EXPORT_BATCH))
+                if not rows:
+                    break
+                lines = ''.join(json.dumps(_user_from_row(row, columns, fields)) + '\n' for row in rows)
+                await send({'type': 'http.response.body', 'body': lines.encode(), 'more_body': True})
+                after = rows[-1][0]
+            await send({'type': 'http.response.body', 'body': b''})
+            return
+
+        async with self.pool.connection() as connection:
+            rows = await connection.fetchall(select, (after, limit))
+        await send_json(send, [_user_from_row(row, columns, fields) for row in rows])
+
+    async def get_user(self, scope, receive, send, user_id):
+        async with self.pool.connection() as connection:
+            rows = await connection.fetchall(f'{self.SELECT_USER} WHERE id = ?', (user_id,))
+        if not rows:
+            await send_json(send, {'error': 'Not found'}, 404)
+        else:
+            await send_json(send, _user_from_row(rows[0]))
+
+    async def create_user(self, scope, receive, send):
+        try:
+            data = await read_json(receive)
+        except ValueError:
+            await send_json(send, {'error': 'Malformed JSON body'}, 400)
+            return
+        if not isinstance(data, dict) or 'username' not in data or 'email' not in data:
+            await send_json(send, {'error': 'Username and email are required'}, 400)
+            return
+        created_at = datetime.utcnow()
+        try:
+            async with self.pool.connection() as connection:
+                user_id, _ = await connection.write(
+                    'INSERT INTO user (username, email, created_at) VALUES (?, ?, ?)',
+                    (data['username'], data['email'], str(created_at)))
+        except sqlite3.IntegrityError as error:
+            field = duplicate_user_field(error)
+            await send_json(send, {'error': f'{field.capitalize()} already exists' if field else str(error)}, 400)
+            return
+        table_versions.bump('user')
+        await send_json(send, {'id': user_id, 'username': data['username'], 'email': data['email'],
+                               'created_at': created_at.isoformat()}, 201)
+
+    async def update_user(self, scope, receive, send, user_id):
+        try:
+            data = await read_json(receive) or {}
+        except ValueError:
+            await send_json(send, {'error': 'Malformed JSON body'}, 400)
+            return
+        if not isinstance(data, dict):
+            await send_json(send, {'error': 'Expected a JSON object'}, 400)
+            return
+        changes = {field: data[field] for field in ('username', 'email') if field in data}
+        try:
+            async with self.pool.connection() as connection:
+                if changes:
+                    assignments = ', '.join(f'{field} = ?' for field in changes)
+                    await connection.write(
+                        f'UPDATE user SET {assignments} WHERE id = ?', (*changes.values(), user_id))
+                rows = await connection.fetchall(f'{self.SELECT_USER} WHERE id = ?', (user_id,))
+        except sqlite3.IntegrityError as error:
+            field = duplicate_user_field(error)
+            await send_json(send, {'error': f'{field.capitalize()} already exists' if field else str(error)}, 400)
+            return
+        if not rows:
+            await send_json(send, {'error': 'Not found'}, 404)
+            return
+        if changes:
+            table_versions.bump('user')
+            user_cache.invalidate(user_id)
+        await send_json(send, _user_from_row(rows[0]))
+
+    async def delete_user(self, scope, receive, send, user_id):
+        async with self.pool.connection() as connection:
+            _, deleted = await connection.write('DELETE FROM user WHERE id = ?', (user_id,))
+        if not deleted:
+            await send_json(send, {'error': 'Not found'}, 404)
+            return
+        table_versions.bump('user')
+        user_cache.invalidate(user_id)
+        await send_json(send, {'message': 'User deleted successfully'})
+
+def create_asgi_app(pool_size=8, bridge_workers=8):
+    """Build the ASGI app; serve it with e.g. `uvicorn module:asgi_app`."""
+    with app.app_context():
+        db_path = db.engine.url.database
+    return AsyncUsersAPI(AsyncSQLitePool(db_path, size=pool_size),
+                         fallback=WSGIBridge(app.wsgi_app, max_workers=bridge_workers))
+
+async def asgi_request(asgi_app, method, path, json_body=None):
+    """Call an ASGI app in-process; returns (status, parsed JSON body).
+
+    json_body may be bytes to send as is; an NDJSON response comes back as a
+    list of parsed lines.
+    """
+    path, _, query = path.partition('?')
+    if isinstance(json_body, bytes):
+        body = json_body
+    else:
+        body = json.dumps(json_body).encode() if json_body is not None else b''
+    scope = {'type': 'http', 'method': method, 'path': path, 'query_string': query.encode(),
+             'headers': [(b'content-type', b'application/json')], 'http_version': '1.1'}
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    response = {}
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = dict(message.get('headers', []))
+        else:
+            response['body'] = response.get('body', b'') + message.get('body', b'')
+
+    await asgi_app(scope, receive, send)
+    if response['headers'].get(b'content-type') == b'application/x-ndjson':
+        return response['status'], [json.loads(line) for line in response['body'].splitlines()]
+    return response['status'], json.loads(response['body'] or b'null')
+
+DEFAULT_REQUEST_MIX = {'list': 60, 'get': 30, 'create': 7, 'update': 3}
+
+def request_mix(count, max_user_id, seed=0, weights=DEFAULT_REQUEST_MIX):
+    """A repeatable list of (method, path, json) requests against /api/users.
+
+    weights maps 'list', 'get', 'create', 'update' and 'delete' to relative
+    frequencies.
+    """
+    rng = random.Random(seed)
+    makers = {
+        'list': lambda i: ('GET', f'/api/users?limit=20&after={rng.randrange(max_user_id)}', None),
+        'get': lambda i: ('GET', f'/api/users/{rng.randrange(1, max_user_id)}', None),
+        'create': lambda i: ('POST', '/api/users',
+                             {'username': f'load{seed}-{i}', 'email': f'load{seed}-{i}@example.com'}),
+        'update': lambda i: ('PUT', f'/api/users/{rng.randrange(1, max_user_id)}',
+                             {'email': f'moved{seed}-{i}@example.com'}),
+        'delete': lambda i: ('DELETE', f'/api/users/{rng.randrange(1, max_user_id)}', None),
+    }
+    names = list(weights)
+    chosen = rng.choices(names, weights=[weights[name] for name in names], k=count)
+    return [makers[name](i) for i, name in enumerate(chosen)]
+
+def percentile(sorted_values, q):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * q / 100))]
+
+def _latency_summary(name, latencies, elapsed):
+    latencies = sorted(latencies)
+    p50 = percentile(latencies, 50) * 1000
+    p99 = percentile(latencies, 99) * 1000
+    print(f"  {name:<22} {len(latencies) / elapsed:7,.0f} req/s   p50 {p50:6.2f} ms   p99 {p99:6.2f} ms")
+
+LOAD_TEST_CONCURRENCY = 8
+
+def load_test_sync(requests, concurrency=LOAD_TEST_CONCURRENCY):
+    """Drive the Flask app with up to concurrency requests in flight (one thread each)."""
+    def timed(request_spec):
+        method, path, body = request_spec
+        start = time.perf_counter()
+        app.test_client().open(path, method=method, json=body)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(timed, requests))
+    return latencies, time.perf_counter() - start
+
+async def load_test_async(asgi_app, requests, concurrency=LOAD_TEST_CONCURRENCY):
+    """Drive the ASGI app with up to concurrency requests in flight."""
+    limit = asyncio.Semaphore(concurrency)
+
+    async def timed(request_spec):
+        async with limit:
+            start = time.perf_counter()
+            await asgi_request(asgi_app, *request_spec)
+            return time.perf_counter() - start
+
+    start = time.perf_counter()
+    latencies = await asyncio.gather(*(timed(spec) for spec in requests))
+    return latencies, time.perf_counter() - start
+
+def seed_demo_users(count=DEMO_USERS):
+    """Insert count users into the current (demo) database."""
+    with app.app_context():
+        db.session.execute(User.__table__.insert(), [
+            {'username': f"user{i}", 'email': f"user{i}@example.com"} for i in range(count)])
+        db.session.commit()
+
+def demonstrate_async_api():
+    """Demonstrate the ASGI CRUD endpoints, the WSGI bridge and a sync/async load test."""
+    print("Async API:")
+
+    async def with_asgi_app(use):
+        asgi_app = create_asgi_app(pool_size=LOAD_TEST_CONCURRENCY, bridge_workers=LOAD_TEST_CONCURRENCY)
+        await asgi_app.pool.open()
+        try:
+            return await use(asgi_app)
+        finally:
+            await asgi_app.pool.close()
+            asgi_app.fallback.executor.shutdown()
+
+    async def crud(asgi_app):
+        # 1. CRUD on the async stack
+        print("\n1. Async CRUD:")
+        status, created = await asgi_request(asgi_app, 'POST', '/api/users', {'username': 'ada', 'email': 'ada@example.com'})
+        print(f"  POST   -> {(status, created)}")
+        ada = f"/api/users/{created['id']}"
+        print(f"  POST   -> {await asgi_request(asgi_app, 'POST', '/api/users', {'username': 'ada', 'email': 'x@example.com'})}")
+        print(f"  POST   -> {await asgi_request(asgi_app, 'POST', '/api/users', b'{not json')} (malformed body)")
+        status, user = await asgi_request(asgi_app, 'GET', ada)
+        print(f"  GET    -> {status} {user['username']}")
+        print(f"  PUT    -> {await asgi_request(asgi_app, 'PUT', ada, {'username': 'ada_l'})}")
+        print(f"  DELETE -> {await asgi_request(asgi_app, 'DELETE', ada)}")
+        status, page = await asgi_request(asgi_app, 'GET', '/api/users?limit=2&fields=username')
+        print(f"  GET ?fields=username -> {status} {page}")
+        status, lines = await asgi_request(asgi_app, 'GET', '/api/users?format=ndjson&fields=id')
+        print(f"  GET ?format=ndjson   -> {status} {len(lines):,} lines, last {lines[-1]}")
+
+        # 2. Existing Flask views through the bridge
+        print("\n2. WSGI Bridge:")
+        status, result = await asgi_request(asgi_app, 'POST', '/api/users/bulk',
+                                            [{'username': 'b1', 'email': 'b1@example.com'}])
+        print(f"  POST /api/users/bulk (Flask view) -> {status} {result}")
+
+    with demo_database():
+        seed_demo_users()
+        asyncio.run(with_asgi_app(crud))
+
+    # 3. Same requests, same concurrency, each stack on an identical fresh database
+    print(f"\n3. Load Test ({LOAD_TEST_REQUESTS:,} requests, 60% list / 30% get / 10% writes, "
+          f"{LOAD_TEST_CONCURRENCY} in flight):")
+    requests = request_mix(LOAD_TEST_REQUESTS, DEMO_USERS, seed=1)
+    print("  Same Flask views, ORM and ETag/compression hooks on both sides:")
+    with demo_database():
+        seed_demo_users()
+        latencies, elapsed = load_test_sync(requests)
+    _latency_summary(f'sync, {LOAD_TEST_CONCURRENCY} threads', latencies, elapsed)
+    with demo_database():
+        seed_demo_users()
+        latencies, elapsed = asyncio.run(with_asgi_app(
+            lambda asgi_app: load_test_async(asgi_app.fallback, requests)))
+    _latency_summary(f'ASGI + WSGIBridge({LOAD_TEST_CONCURRENCY})', latencies, elapsed)
+
+    # The native handlers also skip the ORM and the hooks, so this row is not
+    # sync vs async: the gap to the rows above is mostly that data layer
+    print("  Native async handlers (raw sqlite3, no ORM, no ETag/compression):")
+    with demo_database():
+        seed_demo_users()
+        latencies, elapsed = asyncio.run(with_asgi_app(lambda asgi_app: load_test_async(asgi_app, requests)))
+    _latency_summary(f'ASGI, pool of {LOAD_TEST_CONCURRENCY}', latencies, elapsed)
+
+demonstrate_async_api()
+
+# =============================================================================
+# 16. LOAD TESTING AND PROFILING
+# =============================================================================
+
+print("\n📈 LOAD TESTING AND PROFILING")
+print("-" * 30)
+
+import http.client
+import tempfile
+from collections import Counter, defaultdict
+from flask import has_request_context
+from sqlalchemy.engine import Engine
+from urllib.parse import urlsplit
+
+def repeated_statements(statements, threshold=5):
+    """SELECTs run at least threshold times: the signature of an N+1 loop."""
+    counts = Counter(statement for statement in statements if statement.lstrip().upper().startswith('SELECT'))
+    return [(statement, count) for statement, count in counts.most_common() if count >= threshold]
+
+class QueryCountMiddleware:
+    """WSGI middleware that reports the SQL statements a request ran in X-DB-Queries.
+
+    Requests that repeat the same SELECT n_plus_one_threshold times or more
+    are logged as likely N+1 queries. Wrapping app.wsgi_app (like ProxyFix)
+    works at any time, unlike request hooks, which Flask only accepts before
+    the first request.
+    """
+
+    def __init__(self, wsgi_app, engine=Engine, n_plus_one_threshold=5, logger=None):
+        self.wsgi_app = wsgi_app
+        self.engine = engine
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.logger = logger or app.logger
+        self._local = threading.local()
+        event.listen(engine, 'before_cursor_execute', self._record)
+
+    def close(self):
+        """Stop listening for statements; call after unwrapping the app."""
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        statements = getattr(self._local, 'statements', None)
+        if has_request_context() and statements is not None:
+            statements.append(statement)
+
+    def __call__(self, environ, start_response):
+        statements = self._local.statements = []
+
+        def counting_start_response(status, headers, exc_info=None):
+            headers = list(headers) + [('X-DB-Queries', str(len(statements)))]
+            return start_response(status, headers, exc_info)
+
+        try:
+            return self.wsgi_app(environ, counting_start_response)
+        finally:
+            self._local.statements = None
+            for statement, count in repeated_statements(statements, self.n_plus_one_threshold):
+                self.logger.warning("Possible N+1 on %s %s: %d x %s", environ['REQUEST_METHOD'],
+                                    environ['PATH_INFO'], count, ' '.join(statement.split()))
+
+def endpoint_label(method, path):
+    """Group requests by route: GET /api/users/42?x=1 -> GET /api/users/<id>."""
+    route = re.sub(r'/\d+', '/<id>', path.partition('?')[0])
+    return f"{method} {route}"
+
+class LoadTester:
+    """Run a request list against the app with a fixed number of concurrent workers.
+
+    target=None drives the Flask test client in-process; a URL such as
+    'http://127.0.0.1:5000' sends real HTTP to a running server over one
+    keep-alive connection per worker; run() closes them when it finishes.
+    """
+
+    def __init__(self, target=None, concurrency=8):
+        self.target = urlsplit(target) if target else None
+        self.concurrency = concurrency
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+
+    def _send(self, method, path, body):
+        if self.target is None:
+            response = app.test_client().open(path, method=method, json=body)
+            return response.status_code, response.headers.get('X-DB-Queries')
+
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(
+                self.target.hostname, self.target.port, timeout=30)
+            with self._connections_lock:
+                self._connections.append(connection)
+        payload = json.dumps(body) if body is not None else None
+        headers = {'Content-Type': 'application/json'} if body is not None else {}
+        try:
+            connection.request(method, path, body=payload, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (http.client.HTTPException, OSError):
+            connection.close()
+            self._local.connection = None
+            raise
+        return response.status, response.getheader('X-DB-Queries')
+
+    def run(self, requests):
+        """Send every request; returns a report dict (see print_load_report)."""
+        def timed(request_spec):
+            method, path, body = request_spec
+            start = time.perf_counter()
+            try:
+                status, queries = self._send(method, path, body)
+            except (http.client.HTTPException, OSError):
+                status, queries = 599, None
+            return endpoint_label(method, path), status, time.perf_counter() - start, queries
+
+        start = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+                results = list(executor.map(timed, requests))
+        finally:
+            self.close()
+        elapsed = time.perf_counter() - start
+
+        endpoints = defaultdict(lambda: {'latencies': [], 'statuses': Counter(), 'queries': []})
+        for label, status, latency, queries in results:
+            stats = endpoints[label]
+            stats['latencies'].append(latency)
+            stats['statuses'][status] += 1
+            if queries is not None:
+                stats['queries'].append(int(queries))
+        for stats in endpoints.values():
+            stats['latencies'].sort()
+        return {'requests': len(results), 'elapsed': elapsed, 'endpoints': dict(endpoints)}
+
+    def close(self):
+        """Close every keep-alive connection the workers opened."""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+def print_load_report(report):
+    """Print throughput, latency percentiles and queries per endpoint."""
+    print(f"  {report['requests']:,} requests in {report['elapsed']:.2f}s "
+          f"= {report['requests'] / report['elapsed']:,.0f} req/s")
+    print(f"  {'endpoint':<26}{'count':>6}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}  statuses")
+    for label, stats in sorted(report['endpoints'].items()):
+        latencies = stats['latencies']
+        queries = stats['queries']
+        mean_queries = f"{sum(queries) / len(queries):.1f}" if queries else '-'
+        print(f"  {label:<26}{len(latencies):>6}"
+              f"{percentile(latencies, 50) * 1000:>9.2f}{percentile(latencies, 95) * 1000:>9.2f}"
+              f"{percentile(latencies, 99) * 1000:>9.2f}{mean_queries:>9}  {dict(stats['statuses'])}")
+
+def slowest_endpoint(report, q=99):
+    return max(report['endpoints'], key=lambda label: percentile(report['endpoints'][label]['latencies'], q))
+
+class StackSampler:
+    """Sample one thread's Python stack at a fixed interval into folded stacks.
+
+    The output ("outer;inner;leaf count" per line) is the collapsed format
+    read by flamegraph.pl, speedscope and inferno.
+    """
+
+    def __init__(self, thread_id, interval=0.0005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[';'.join(reversed(names))] += 1
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._sample, name='stack-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def write_folded(self, path):
+        with open(path, 'w') as folded:
+            for stack, count in self.stacks.most_common():
+                folded.write(f"{stack} {count}\n")
+
+    def top_functions(self, n=5):
+        """Leaf frames with the most samples (self time)."""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        return leaves.most_common(n)
+
+def profile_requests(requests, path):
+    """Replay requests on this thread under a StackSampler and write folded stacks to path."""
+    client = app.test_client()
+    with StackSampler(threading.get_ident()) as sampler:
+        for method, url, body in requests:
+            client.open(url, method=method, json=body)
+    sampler.write_folded(path)
+    return sampler
+
+@contextmanager
+def query_counting(**options):
+    """Wrap app.wsgi_app in a QueryCountMiddleware for the duration of the block.
+
+    It listens on the Engine class, so requests are counted whichever engine
+    db is bound to; outside the block the app runs without the overhead.
+    """
+    original = app.wsgi_app
+    middleware = app.wsgi_app = QueryCountMiddleware(original, **options)
+    try:
+        yield middleware
+    finally:
+        app.wsgi_app = original
+        middleware.close()
+
+def demonstrate_load_testing(profile_path=None):
+    """Demonstrate the load tester, per-endpoint query counts and a folded-stack profile.
+
+    The profile of the slowest endpoint is written to profile_path when one
+    is given, otherwise to a temporary file that is removed afterwards.
+    """
+    print("Load Testing and Profiling:")
+
+    with demo_templates(), demo_database(), query_counting():
+        seed_demo_users()
+        mix = {'list': 50, 'get': 30, 'create': 10, 'update': 7, 'delete': 3}
+
+        # 1. In-process, through the test client
+        print("\n1. Test Client, 8 Workers:")
+        report = LoadTester(concurrency=8).run(request_mix(LOAD_TEST_REQUESTS, DEMO_USERS, seed=3, weights=mix))
+        print_load_report(report)
+
+        # 2. Real HTTP against a local server
+        print("\n2. Local Server, 16 Workers:")
+        from werkzeug.serving import WSGIRequestHandler, make_server
+
+        class QuietRequestHandler(WSGIRequestHandler):
+            def log_request(self, *args, **kwargs):
+                pass
+
+        server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietRequestHandler)
+        server_thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server_thread.start()
+        try:
+            tester = LoadTester(f'http://127.0.0.1:{server.server_port}', concurrency=16)
+            report = tester.run(request_mix(LOAD_TEST_REQUESTS, DEMO_USERS, seed=4, weights=mix))
+        finally:
+            server.shutdown()
+            server.server_close()
+        print_load_report(report)
+
+        # 3. Profile the slowest endpoint
+        label = slowest_endpoint(report)
+        print(f"\n3. Profile of the Slowest Endpoint ({label}):")
+        method = label.split()[0]
+        replay = [spec for spec in request_mix(3000, DEMO_USERS, seed=5, weights=mix)
+                  if endpoint_label(spec[0], spec[1]) == label][:LOAD_TEST_REQUESTS // 5]
+        with tempfile.TemporaryDirectory() as profile_dir:
+            folded_path = profile_path or os.path.join(profile_dir, 'slowest_endpoint.folded')
+            sampler = profile_requests(replay, folded_path)
+            with open(folded_path) as folded:
+                lines = sum(1 for _ in folded)
+        print(f"{sum(sampler.stacks.values())} samples of {len(replay)} {method} requests "
+              f"({lines} distinct stacks)")
+        if profile_path:
+            print(f"Render it with: flamegraph.pl {profile_path} > flame.svg (or open in speedscope)")
+        else:
+            print("Call demonstrate_load_testing('slowest_endpoint.folded') to keep the profile for flamegraph.pl")
+        for frame, samples in sampler.top_functions():
+            print(f"  {samples:>5}  {frame}")
+
+demonstrate_load_testing()
+
+# =============================================================================
+# 17. N+1 DETECTION AND EAGER LOADING
+# =============================================================================
+
+print("\n🔍 N+1 DETECTION AND EAGER LOADING")
+print("-" * 36)
+
+from sqlalchemy.orm import selectinload
+
+@contextmanager
+def assert_max_queries(limit):
+    """Fail if the block runs more than limit SQL statements (use in tests)."""
+    with capture_statements() as statements:
+        yield statements
+    if len(statements) > limit:
+        repeated = repeated_statements(statements, threshold=2)
+        raise AssertionError(f"{len(statements)} queries (limit {limit}); repeated: {repeated}")
+
+def seed_demo_posts(authors=50, posts=200):
+    """Insert authors users and posts posts spread across them into the current (demo) database."""
+    with app.app_context():
+        users = [User(username=f"author{i}", email=f"author{i}@example.com") for i in range(authors)]
+        db.session.add_all(users)
+        db.session.add_all([Post(title=f"Post {i}", content='...', author=users[i % authors]) for i in range(posts)])
+        db.session.commit()
+
+def test_api_posts_query_count_is_bounded():
+    """/api/posts runs one query whatever the page size (pytest day14_web_development_flask.py)."""
+    with demo_database():
+        seed_demo_posts()
+        client = app.test_client()
+        for limit in (10, 100, 200):
+            with assert_max_queries(1):
+                response = client.get(f'/api/posts?limit={limit}')
+            assert len(response.get_json()) == limit
+
+def test_eager_loading_query_count_is_bounded():
+    """joinedload(Post.author) and selectinload(User.posts) keep listings at one or two queries."""
+    with demo_database():
+        seed_demo_posts()
+        with app.app_context():
+            with assert_max_queries(1):
+                posts = db.session.execute(db.select(Post).options(joinedload(Post.author))).scalars().all()
+                assert all(post.author.username for post in posts)
+            db.session.expunge_all()
+            with assert_max_queries(2):
+                users = db.session.execute(db.select(User).options(selectinload(User.posts))).scalars().all()
+                assert sum(len(user.posts) for user in users) == 200
+
+def demonstrate_n_plus_one():
+    """Demonstrate finding N+1 queries and fixing them with eager loading."""
+    print("N+1 Detection:")
+
+    with demo_database(), query_counting():
+        seed_demo_posts()
+
+        # 1. Lazy loading in a loop
+        print("\n1. Lazy Post.author:")
+        with app.app_context(), capture_statements() as statements:
+            titles = [(post.title, post.author.username) for post in Post.query.limit(100).all()]
+        print(f"{len(titles)} posts -> {len(statements)} queries")
+        for statement, count in repeated_statements(statements):
+            print(f"  flagged N+1: {count} x {' '.join(statement.split())[:70]}...")
+
+        # 2. Eager loading
+        print("\n2. Eager Loading:")
+        with app.app_context():
+            with capture_statements() as statements:
+                db.session.execute(db.select(Post).options(joinedload(Post.author)).limit(100)).scalars().all()
+            print(f"joinedload(Post.author): {len(statements)} query")
+            db.session.expunge_all()
+            with capture_statements() as statements:
+                users = db.session.execute(db.select(User).options(selectinload(User.posts))).scalars().all()
+                post_counts = [len(user.posts) for user in users]
+            print(f"selectinload(User.posts) for {len(users)} users / {sum(post_counts)} posts: "
+                  f"{len(statements)} queries")
+
+        # 3. Endpoint query counts stay flat as pages grow
+        print("\n3. /api/posts Query Count by Page Size:")
+        client = app.test_client()
+        for limit in (10, 100, 200):
+            with assert_max_queries(1):
+                response = client.get(f'/api/posts?limit={limit}')
+            print(f"  limit={limit:<4} {len(response.get_json()):>3} posts, "
+                  f"X-DB-Queries: {response.headers['X-DB-Queries']}")
+
+        # 4. What a regression looks like
+        print("\n4. Query Budget Check:")
+        try:
+            with app.app_context(), assert_max_queries(5):
+                [post.author.username for post in Post.query.all()]
+        except AssertionError as error:
+            print(f"AssertionError: {str(error)[:90]}...")
+
+demonstrate_n_plus_one()
+
+print("\nPytest query-budget tests defined:")
+print("  - test_api_posts_query_count_is_bounded")
+print("  - test_eager_loading_query_count_is_bounded")
+
+# =============================================================================
+# 18. EXERCISES
 # =============================================================================
 
 print("\n🏋️ EXERCISES")
@@ -566,7 +2228,7 @@ Exercise 5: Learning Management System
 """)
 
 # =============================================================================
-# 12. BEST PRACTICES
+# 19. BEST PRACTICES
 # =============================================================================
 
 print("\n💡 BEST PRACTICES")
@@ -609,7 +2271,7 @@ Flask development best practices:
 """)
 
 # =============================================================================
-# 13. COMMON MISTAKES TO AVOID
+# 20. COMMON MISTAKES TO AVOID
 # =============================================================================
 
 print("\n⚠️ COMMON MISTAKES TO AVOID")
@@ -648,7 +2310,7 @@ Common Flask mistakes:
 """)
 
 # =============================================================================
-# 14. KEY TAKEAWAYS
+# 21. KEY TAKEAWAYS
 # =============================================================================
 
 print("\n🎯 KEY TAKEAWAYS")
@@ -664,6 +2326,13 @@ What you've learned today:
 ✅ Session management
 ✅ Error handling
 ✅ Flask extensions and deployment
+✅ ETag revalidation and response compression
+✅ Keyset pagination and streaming exports
+✅ Constraint-based duplicate checks and bulk inserts
+✅ Request identity map and TTL user cache
+✅ Async endpoints on ASGI with a bounded pool
+✅ Load testing with per-endpoint queries and profiles
+✅ N+1 detection and eager loading
 
 Next Steps:
 - Day 15: Testing and Debugging
@@ -671,7 +2340,7 @@ Next Steps:
 """)
 
 # =============================================================================
-# 15. CONCLUSION
+# 22. CONCLUSION
 # =============================================================================
 
 print("\n🎉 CONGRATULATIONS!")
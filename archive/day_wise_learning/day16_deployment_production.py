@@ -759,7 +759,1754 @@ def get_user_posts(user_id):
 demonstrate_scaling()
 
 # =============================================================================
-# 9. EXERCISES
+# 9. TWO-TIER CACHING
+# =============================================================================
+
+print("\n🗃️ TWO-TIER CACHING")
+print("-" * 22)
+
+import hashlib
+import inspect
+import math
+import pickle
+import random
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+cache_logger = logging.getLogger('app.cache')
+
+def _canonical(value):
+    """Reduce a cache-key argument to primitives with a stable repr()."""
+    if value is None or isinstance(value, (bool, int, float, str, bytes)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [type(value).__name__, [_canonical(item) for item in value]]
+    if isinstance(value, dict):
+        items = [(repr(_canonical(key)), _canonical(item)) for key, item in value.items()]
+        return ['dict', sorted(items, key=lambda pair: pair[0])]
+    if isinstance(value, (set, frozenset)):
+        return ['set', sorted(repr(_canonical(item)) for item in value)]
+    if hasattr(value, '__cache_key__'):
+        return [type(value).__qualname__, _canonical(value.__cache_key__())]
+    if hasattr(value, 'id'):
+        # ORM rows: identify by class and primary key, not by memory address
+        return [type(value).__qualname__, value.id]
+    raise TypeError(f"Cannot build a stable cache key from {type(value).__name__}; "
+                    "define __cache_key__() on it")
+
+def stable_cache_key(func, args, kwargs, namespace='v1'):
+    """Build a cache key that is identical in every process and on every host."""
+    payload = repr([func.__module__, func.__qualname__, _canonical(args), _canonical(kwargs)])
+    digest = hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+    return f"{namespace}:{func.__qualname__}:{digest}"
+
+class PickleCodec:
+    """Serialize any picklable Python value, including detached ORM objects."""
+
+    name = 'pickle'
+
+    def dumps(self, value):
+        return pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def loads(self, data):
+        return pickle.loads(data)
+
+class MsgpackCodec:
+    """Compact, language-neutral codec for plain data (requires msgpack)."""
+
+    name = 'msgpack'
+
+    def __init__(self):
+        import msgpack
+        self._msgpack = msgpack
+
+    def dumps(self, value):
+        return self._msgpack.packb(value, use_bin_type=True)
+
+    def loads(self, data):
+        return self._msgpack.unpackb(data, raw=False, strict_map_key=False)
+
+class InMemoryBackend:
+    """Thread-safe stand-in for Redis with the get/set/add/delete surface the cache uses."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key):
+        item = self._data.get(key)
+        if item is not None and item[1] <= time.time():
+            del self._data[key]
+            return None
+        return item
+
+    def get(self, key):
+        with self._lock:
+            item = self._live(key)
+            return item[0] if item else None
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+
+    def add(self, key, value, ttl):
+        """Set key only if it does not exist (Redis SET NX); return True on success."""
+        with self._lock:
+            if self._live(key) is not None:
+                return False
+            self._data[key] = (value, time.time() + ttl)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+class RedisBackend:
+    """Adapter exposing a redis.Redis client through the backend surface."""
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl):
+        self.client.set(key, value, px=max(1, int(ttl * 1000)))
+
+    def add(self, key, value, ttl):
+        return bool(self.client.set(key, value, px=max(1, int(ttl * 1000)), nx=True))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+class TwoTierCache:
+    """In-process LRU in front of a shared remote backend.
+
+    get_or_compute() adds the protections the naive decorator lacks:
+    - single-flight: concurrent misses for one key run the loader once per
+      process, and a short remote lock stops other workers recomputing it too
+    - probabilistic early refresh (XFetch): a hit may recompute shortly before
+      expiry, more likely the closer expiry is, so hot keys never expire for
+      every caller at once
+    - negative caching: None results are kept for negative_ttl seconds
+    """
+
+    def __init__(self, backend=None, codec=None, local_maxsize=1024, local_ttl=5.0,
+                 beta=1.0, lock_ttl=10.0):
+        self.backend = backend if backend is not None else InMemoryBackend()
+        self.codec = codec if codec is not None else PickleCodec()
+        self.local_maxsize = local_maxsize
+        self.local_ttl = local_ttl
+        self.beta = beta
+        self.lock_ttl = lock_ttl
+        self._local = OrderedDict()
+        self._local_lock = threading.Lock()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.stats = {'local_hits': 0, 'remote_hits': 0, 'misses': 0, 'loads': 0,
+                      'coalesced': 0, 'early_refreshes': 0}
+
+    def _count(self, name):
+        with self._stats_lock:
+            self.stats[name] += 1
+
+    # ---- local tier --------------------------------------------------------
+
+    def _get_local(self, key):
+        with self._local_lock:
+            item = self._local.get(key)
+            if item is None:
+                return None
+            entry, local_expires = item
+            if local_expires <= time.time():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return entry
+
+    def _put_local(self, key, entry):
+        # Bound how stale this worker can be relative to the shared tier
+        local_expires = min(entry[1], time.time() + self.local_ttl)
+        with self._local_lock:
+            self._local[key] = (entry, local_expires)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_maxsize:
+                self._local.popitem(last=False)
+
+    # ---- remote tier -------------------------------------------------------
+
+    def _get_remote(self, key):
+        data = self.backend.get(key)
+        if data is None:
+            return None
+        try:
+            value, expires_at, delta = self.codec.loads(data)
+        except Exception:
+            cache_logger.warning("Dropping undecodable cache entry %s", key)
+            self.backend.delete(key)
+            return None
+        entry = (value, expires_at, delta)
+        self._put_local(key, entry)
+        return entry
+
+    def _wait_for_remote(self, key):
+        """Poll the shared tier while another worker holds the recompute lock."""
+        deadline = time.time() + self.lock_ttl
+        while time.time() < deadline:
+            entry = self._get_remote(key)
+            if entry is not None:
+                return entry
+            time.sleep(0.01)
+        return None
+
+    # ---- public API --------------------------------------------------------
+
+    def set(self, key, value, ttl, delta=0.0):
+        """Store value in both tiers; delta is how long it took to compute."""
+        entry = (value, time.time() + ttl, delta)
+        self.backend.set(key, self.codec.dumps(list(entry)), ttl)
+        self._put_local(key, entry)
+
+    def invalidate(self, key):
+        """Remove key from this worker's LRU and from the shared tier."""
+        with self._local_lock:
+            self._local.pop(key, None)
+        self.backend.delete(key)
+
+    def _should_refresh(self, entry):
+        _, expires_at, delta = entry
+        # XFetch: -log(u) is exponentially distributed, so early refreshes are rare
+        # until expiry is within a few multiples of the recompute time
+        return time.time() - delta * self.beta * math.log(1.0 - random.random()) >= expires_at
+
+    def get_or_compute(self, key, loader, ttl, negative_ttl=30):
+        """Return the cached value for key, computing it with loader() on a miss."""
+        entry = self._get_local(key)
+        if entry is not None:
+            self._count('local_hits')
+        else:
+            entry = self._get_remote(key)
+            self._count('remote_hits' if entry is not None else 'misses')
+
+        if entry is not None:
+            if not self._should_refresh(entry):
+                return entry[0]
+            self._count('early_refreshes')
+        return self._load(key, loader, ttl, negative_ttl, stale=entry)
+
+    def _load(self, key, loader, ttl, negative_ttl, stale=None):
+        with self._inflight_lock:
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+
+        if not leader:
+            # Another thread in this process is already loading the key
+            if stale is not None:
+                return stale[0]
+            self._count('coalesced')
+            event.wait(self.lock_ttl)
+            entry = self._get_local(key) or self._get_remote(key)
+            return entry[0] if entry is not None else loader()
+
+        lock_key = f"lock:{key}"
+        acquired = False
+        try:
+            acquired = self.backend.add(lock_key, b'1', self.lock_ttl)
+            if not acquired:
+                # Another worker process is recomputing: serve stale or wait for it
+                if stale is not None:
+                    return stale[0]
+                entry = self._wait_for_remote(key)
+                if entry is not None:
+                    return entry[0]
+
+            start_time = time.perf_counter()
+            value = loader()
+            delta = time.perf_counter() - start_time
+            self._count('loads')
+            self.set(key, value, ttl if value is not None else negative_ttl, delta)
+            return value
+        finally:
+            if acquired:
+                self.backend.delete(lock_key)
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+default_cache = TwoTierCache()
+
+def cache_result(expiration=300, negative_ttl=30, cache=None, namespace='v1'):
+    """Cache function results for expiration seconds in a TwoTierCache.
+
+    Keys are built with stable_cache_key(), so every worker shares entries,
+    and None results are cached for negative_ttl seconds.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            target = cache if cache is not None else default_cache
+            key = stable_cache_key(func, args, kwargs, namespace)
+            return target.get_or_compute(key, lambda: func(*args, **kwargs),
+                                         expiration, negative_ttl)
+
+        wrapper.cache_key = lambda *args, **kwargs: stable_cache_key(func, args, kwargs, namespace)
+        return wrapper
+    return decorator
+
+def demonstrate_two_tier_cache():
+    """Demonstrate stable keys, single-flight loading and negative caching."""
+    print("Two-Tier Caching:")
+
+    # 1. Stable keys
+    print("\n1. Stable Cache Keys:")
+    hashes = [subprocess.run([sys.executable, '-c', "print(hash(str((42,)) + str({})))"],
+                             capture_output=True, text=True).stdout.strip() for _ in range(2)]
+    print(f"hash() in two processes: {hashes[0]} vs {hashes[1]}")
+
+    def get_user_posts(user_id, tags=()):
+        return [f"post-{user_id}-{i}" for i in range(3)]
+
+    # A set of strings iterates in a different order in every process
+    kwargs = {'tags': {'python', 'flask', 'sql', 'cache'}}
+    key = stable_cache_key(get_user_posts, (42,), kwargs)
+    print(f"stable_cache_key: {key}")
+
+    # Recompute the key in a fresh interpreter (new hash seed) for a function
+    # with the same module and qualified name
+    script = inspect.getsource(_canonical) + inspect.getsource(stable_cache_key) + (
+        "import hashlib\n"
+        "def get_user_posts(user_id, tags=()): pass\n"
+        f"get_user_posts.__module__ = {get_user_posts.__module__!r}\n"
+        f"get_user_posts.__qualname__ = {get_user_posts.__qualname__!r}\n"
+        f"print(stable_cache_key(get_user_posts, (42,), {kwargs!r}))\n"
+    )
+    other = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True).stdout.strip()
+    print(f"Same key in another process: {other == key}")
+
+    # 2. Single-flight loading under a stampede
+    print("\n2. Single-Flight Loading:")
+    cache = TwoTierCache(backend=InMemoryBackend())
+    load_calls = []
+
+    @cache_result(expiration=60, cache=cache)
+    def slow_report(report_id):
+        load_calls.append(report_id)
+        time.sleep(0.2)  # simulate an expensive query
+        return {'report_id': report_id, 'rows': 1000}
+
+    threads = [threading.Thread(target=slow_report, args=(7,)) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"20 concurrent callers -> {len(load_calls)} load(s), "
+          f"{cache.stats['coalesced']} coalesced")
+
+    # 3. A second worker shares the remote tier
+    print("\n3. Shared Remote Tier:")
+    other_worker = TwoTierCache(backend=cache.backend)
+
+    @cache_result(expiration=60, cache=other_worker)
+    def slow_report(report_id):  # same qualified name as in the first worker
+        load_calls.append(report_id)
+        return {'report_id': report_id, 'rows': 1000}
+
+    print(f"Second worker result: {slow_report(7)}, loads so far: {len(load_calls)}")
+
+    # 4. Negative caching
+    print("\n4. Negative Caching:")
+    lookups = []
+
+    @cache_result(expiration=60, negative_ttl=5, cache=cache)
+    def find_user(username):
+        lookups.append(username)
+        return None  # not found
+
+    find_user('ghost')
+    find_user('ghost')
+    print(f"Two lookups of a missing user -> {len(lookups)} database query")
+
+    # 5. Probabilistic early refresh
+    print("\n5. Probabilistic Early Refresh:")
+    refresh_cache = TwoTierCache(backend=InMemoryBackend(), local_ttl=0.05)
+
+    @cache_result(expiration=0.5, cache=refresh_cache)
+    def exchange_rate(currency):
+        time.sleep(0.05)
+        return 1.1
+
+    deadline = time.time() + 1.0
+    while time.time() < deadline:
+        exchange_rate('EUR')
+        time.sleep(0.01)
+    print(f"Stats: {refresh_cache.stats}")
+
+    # 6. Codecs
+    print("\n6. Codecs:")
+    print(f"pickle payload: {len(PickleCodec().dumps([{'id': 1, 'name': 'alice'}, 0.0, 0.0]))} bytes")
+    try:
+        print(f"msgpack payload: {len(MsgpackCodec().dumps([{'id': 1, 'name': 'alice'}, 0.0, 0.0]))} bytes")
+    except ImportError:
+        print("msgpack not installed (pip install msgpack)")
+    print("Production: TwoTierCache(backend=RedisBackend(redis.Redis()), codec=MsgpackCodec())")
+
+    return cache
+
+two_tier_cache = demonstrate_two_tier_cache()
+
+# =============================================================================
+# 10. RATE LIMITING
+# =============================================================================
+
+print("\n🚦 RATE LIMITING")
+print("-" * 18)
+
+import sqlite3
+import tempfile
+from collections import namedtuple
+
+RateLimitDecision = namedtuple('RateLimitDecision', ['allowed', 'retry_after'])
+
+class TokenBucket:
+    """Refill rate tokens per second up to capacity; each request spends cost tokens.
+
+    State per key: [tokens, last_refill_time].
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.idle_ttl = capacity / rate  # a full bucket is the same as no state
+
+    def decide(self, state, now, cost=1):
+        tokens, last = state if state else (self.capacity, now)
+        tokens = min(self.capacity, tokens + (now - last) * self.rate)
+        if tokens >= cost:
+            return RateLimitDecision(True, 0.0), [tokens - cost, now]
+        return RateLimitDecision(False, (cost - tokens) / self.rate), [tokens, now]
+
+class GCRA:
+    """Generic Cell Rate Algorithm: limit requests per period with bursts of up to burst.
+
+    State per key: [theoretical_arrival_time].
+    """
+
+    def __init__(self, limit, period, burst=None):
+        self.interval = period / limit
+        self.burst = burst if burst is not None else limit
+        self.idle_ttl = self.interval * self.burst
+
+    def decide(self, state, now, cost=1):
+        tat = max(state[0] if state else now, now)
+        new_tat = tat + self.interval * cost
+        allow_at = new_tat - self.interval * self.burst
+        if now < allow_at:
+            return RateLimitDecision(False, allow_at - now), [tat]
+        return RateLimitDecision(True, 0.0), [new_tat]
+
+class SlidingWindowCounter:
+    """Approximate a sliding window from the current and previous fixed-window counts.
+
+    State per key: [window_start, current_count, previous_count].
+    """
+
+    def __init__(self, limit, window):
+        self.limit = limit
+        self.window = window
+        self.idle_ttl = 2 * window
+
+    def decide(self, state, now, cost=1):
+        window_start = now - now % self.window
+        current, previous = 0, 0
+        if state:
+            start, count, prior = state
+            if start == window_start:
+                current, previous = count, prior
+            elif start == window_start - self.window:
+                previous = count
+
+        elapsed = (now - window_start) / self.window
+        estimated = previous * (1 - elapsed) + current
+        if estimated + cost <= self.limit:
+            return RateLimitDecision(True, 0.0), [window_start, current + cost, previous]
+
+        # Wait until the previous window's weight has decayed enough, or the next window
+        headroom = self.limit - current - cost
+        if previous and headroom >= 0:
+            retry_after = ((1 - headroom / previous) - elapsed) * self.window
+        else:
+            retry_after = (1 - elapsed) * self.window
+        return RateLimitDecision(False, max(retry_after, 0.0)), [window_start, current, previous]
+
+class MemoryRateLimitStore:
+    """Per-process store: one small state list per key, idle keys evicted as it goes.
+
+    Keys are kept in last-used order, so expired keys are always at the front
+    and each update evicts them in amortized O(1). max_keys caps memory even
+    under a flood of distinct clients.
+    """
+
+    def __init__(self, max_keys=100_000):
+        self.max_keys = max_keys
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._states)
+
+    def update(self, key, decide, ttl, now):
+        with self._lock:
+            item = self._states.pop(key, None)
+            state = item[0] if item and item[1] > now else None
+            decision, new_state = decide(state)
+            self._states[key] = (new_state, now + ttl)
+
+            while self._states:
+                oldest_key, (_, expires_at) = next(iter(self._states.items()))
+                if expires_at > now and len(self._states) <= self.max_keys:
+                    break
+                del self._states[oldest_key]
+            return decision
+
+class SQLiteRateLimitStore:
+    """Store shared by every worker process on one host through a SQLite file.
+
+    Each update runs in a BEGIN IMMEDIATE transaction, so read-decide-write is
+    atomic across processes and all workers enforce one global limit.
+    """
+
+    def __init__(self, path, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._conn().execute(
+            'CREATE TABLE IF NOT EXISTS rate_limits ('
+            'key TEXT PRIMARY KEY, state TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def update(self, key, decide, ttl, now):
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT state, expires_at FROM rate_limits WHERE key = ?',
+                               (key,)).fetchone()
+            state = json.loads(row[0]) if row and row[1] > now else None
+            decision, new_state = decide(state)
+            conn.execute(
+                'INSERT INTO rate_limits (key, state, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET state = excluded.state, expires_at = excluded.expires_at',
+                (key, json.dumps(new_state), now + ttl)
+            )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return decision
+
+    def evict_idle(self, now):
+        """Delete idle keys; call periodically (e.g. from a cron or every N requests)."""
+        return self._conn().execute('DELETE FROM rate_limits WHERE expires_at <= ?', (now,)).rowcount
+
+    def close(self):
+        """Close the calling thread's connection."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+class RedisRateLimitStore:
+    """Store shared by workers on many hosts, using WATCH/MULTI on a redis.Redis client."""
+
+    def __init__(self, client, prefix='ratelimit:'):
+        self.client = client
+        self.prefix = prefix
+
+    def update(self, key, decide, ttl, now):
+        redis_key = self.prefix + key
+
+        def transaction(pipe):
+            raw = pipe.get(redis_key)
+            decision, new_state = decide(json.loads(raw) if raw else None)
+            pipe.multi()
+            pipe.set(redis_key, json.dumps(new_state), px=max(1, int(ttl * 1000)))
+            return decision
+
+        # Redis expires idle keys by itself
+        return self.client.transaction(transaction, redis_key, value_from_callable=True)
+
+class RateLimiter:
+    """Apply a rate-limiting algorithm to keys (client IPs, API tokens, ...) in a store."""
+
+    def __init__(self, algorithm, store=None, clock=time.time):
+        self.algorithm = algorithm
+        self.store = store if store is not None else MemoryRateLimitStore()
+        self.clock = clock
+
+    def hit(self, key, cost=1):
+        """Record a request for key and return a RateLimitDecision."""
+        now = self.clock()
+        return self.store.update(
+            key, lambda state: self.algorithm.decide(state, now, cost),
+            self.algorithm.idle_ttl, now
+        )
+
+def rate_limit_middleware(app, limiter, key_func=None):
+    """Reject requests over the limit with 429 and a Retry-After header."""
+    from flask import request, jsonify
+
+    @app.before_request
+    def rate_limit():
+        key = key_func() if key_func else request.remote_addr
+        decision = limiter.hit(key)
+        if not decision.allowed:
+            response = jsonify({'error': 'Rate limit exceeded'})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(max(1, math.ceil(decision.retry_after)))
+            return response
+
+def demonstrate_rate_limiting():
+    """Demonstrate token bucket, GCRA and sliding-window limiters and their stores."""
+    print("Rate Limiting:")
+
+    fake_now = [1_000_000.0]
+    clock = lambda: fake_now[0]
+
+    # 1. Same budget (100 requests/minute), three algorithms
+    print("\n1. Algorithms (150 requests in 1.5 seconds, 100/minute allowed):")
+    algorithms = {
+        'Token bucket': TokenBucket(rate=100 / 60, capacity=100),
+        'GCRA': GCRA(limit=100, period=60),
+        'Sliding window': SlidingWindowCounter(limit=100, window=60),
+    }
+    for name, algorithm in algorithms.items():
+        limiter = RateLimiter(algorithm, clock=clock)
+        fake_now[0] = 1_000_000.0
+        allowed = 0
+        for _ in range(150):
+            decision = limiter.hit('203.0.113.7')
+            allowed += decision.allowed
+            fake_now[0] += 0.01
+        print(f"  {name:<15} allowed {allowed}, retry after {decision.retry_after:.1f}s")
+
+    # 2. Memory stays bounded
+    print("\n2. Idle Key Eviction:")
+    store = MemoryRateLimitStore()
+    limiter = RateLimiter(GCRA(limit=100, period=60), store=store, clock=clock)
+    for i in range(50_000):
+        limiter.hit(f"10.0.{i // 256}.{i % 256}")
+    print(f"Keys after 50,000 distinct clients: {len(store)}")
+    fake_now[0] += 120
+    limiter.hit('198.51.100.1')
+    print(f"Keys after they have been idle for 2 minutes: {len(store)}")
+
+    # 3. One global limit across workers
+    print("\n3. Shared Store Across Workers:")
+    allowed_counts = []
+
+    def worker(db_path):
+        # Each worker gets its own store and connection, like a separate process
+        worker_store = SQLiteRateLimitStore(db_path)
+        worker_limiter = RateLimiter(SlidingWindowCounter(limit=100, window=60), store=worker_store)
+        allowed_counts.append(sum(worker_limiter.hit('api-key-123').allowed for _ in range(50)))
+        worker_store.close()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'rate_limits.db')
+        threads = [threading.Thread(target=worker, args=(db_path,)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    print(f"4 workers x 50 requests -> allowed per worker {allowed_counts}, "
+          f"total {sum(allowed_counts)} (limit 100)")
+
+    return store
+
+rate_limit_store = demonstrate_rate_limiting()
+
+# =============================================================================
+# 11. QUEUED LOGGING PIPELINE
+# =============================================================================
+
+print("\n📨 QUEUED LOGGING PIPELINE")
+print("-" * 30)
+
+import io
+import logging.handlers
+from collections import deque
+
+IOV_MAX = 1024  # POSIX minimum for the number of buffers in one writev call
+
+def _write_all(fd, buffers):
+    """Write buffers to fd with as few writev() calls as possible."""
+    written = 0
+    for start in range(0, len(buffers), IOV_MAX):
+        group = buffers[start:start + IOV_MAX]
+        total = sum(len(buffer) for buffer in group)
+        if hasattr(os, 'writev'):
+            count = os.writev(fd, group)
+        else:
+            count = os.write(fd, b''.join(group))
+        if count < total:
+            rest = b''.join(group)[count:]
+            while rest:
+                rest = rest[os.write(fd, rest):]
+        written += total
+    return written
+
+class LogSink:
+    """One output of a LogPipeline: a size-rotated file or a text stream.
+
+    Only the pipeline's writer thread touches the sink, so rotation needs no
+    locking, and the size is tracked in memory instead of checked per record.
+    """
+
+    def __init__(self, formatter, level=logging.NOTSET, path=None, stream=None,
+                 max_bytes=10 * 1024 * 1024, backup_count=5):
+        self.formatter = formatter
+        self.level = level
+        self.path = path
+        self.stream = stream
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._fd = None
+        self._size = 0
+
+    def open(self):
+        if self.path and self._fd is None:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            self._size = os.fstat(self._fd).st_size
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+    def rotate(self):
+        """Shift app.log -> app.log.1 -> ... like RotatingFileHandler."""
+        self.close()
+        for index in range(self.backup_count - 1, 0, -1):
+            source = f"{self.path}.{index}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{index + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.open()
+
+    def write_batch(self, lines):
+        if self.stream is not None:
+            self.stream.write(''.join(lines))
+            self.stream.flush()
+            return
+        buffers = [line.encode('utf-8') for line in lines]
+        if self.max_bytes and self._size and self._size + sum(map(len, buffers)) > self.max_bytes:
+            self.rotate()
+        self._size += _write_all(self._fd, buffers)
+
+class LogPipeline:
+    """Bounded record buffer drained by a single background writer thread.
+
+    Callers only append the LogRecord: deque.append/popleft are atomic in
+    CPython, so submit() takes no lock for an accepted record (only the
+    dropped counter is locked). The writer formats each batch once per
+    formatter and hands it to every sink in one writev call.
+
+    Backpressure when the buffer is full (capacity is a soft bound):
+    - 'block': wait up to block_timeout seconds for space
+    - 'drop': discard the new record
+    - 'sample': above 75% full keep one record in sample_every, drop at capacity
+    Records at critical_level or above always use 'block'.
+    """
+
+    POLICIES = ('block', 'drop', 'sample')
+
+    def __init__(self, sinks, capacity=10_000, policy='drop', batch_size=512,
+                 flush_interval=0.05, block_timeout=1.0, sample_every=10,
+                 critical_level=logging.ERROR):
+        if policy not in self.POLICIES:
+            raise ValueError(f"policy must be one of {self.POLICIES}, not {policy!r}")
+        self.sinks = sinks
+        self.capacity = capacity
+        self.policy = policy
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self.sample_every = sample_every
+        self.critical_level = critical_level
+        self.dropped = 0
+        self.written = 0
+        self._dropped_lock = threading.Lock()
+        self._ring = deque()
+        self._sampled = 0
+        self._wakeup = threading.Event()
+        self._space = threading.Condition()
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        self._stopping = False
+        for sink in self.sinks:
+            sink.open()
+        self._thread = threading.Thread(target=self._run, name='log-writer', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Flush everything still buffered and close the sinks."""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join()
+        self._thread = None
+        for sink in self.sinks:
+            sink.close()
+
+    def submit(self, record):
+        """Enqueue a record from the calling thread; return False if it was dropped."""
+        ring = self._ring
+        if len(ring) >= self.capacity * 0.75:
+            critical = record.levelno >= self.critical_level
+            if critical or self.policy == 'block':
+                if len(ring) >= self.capacity and not self._wait_for_space():
+                    return self._drop()
+            elif self.policy == 'drop' and len(ring) >= self.capacity:
+                return self._drop()
+            elif self.policy == 'sample':
+                self._sampled += 1
+                if len(ring) >= self.capacity or self._sampled % self.sample_every:
+                    return self._drop()
+
+        was_empty = not ring
+        ring.append(record)
+        if was_empty:
+            self._wakeup.set()
+        return True
+
+    def _drop(self):
+        # Many producer threads drop at once when the buffer is full
+        with self._dropped_lock:
+            self.dropped += 1
+        return False
+
+    def _wait_for_space(self):
+        self._wakeup.set()
+        with self._space:
+            return self._space.wait_for(lambda: len(self._ring) < self.capacity,
+                                        timeout=self.block_timeout)
+
+    def _run(self):
+        ring = self._ring
+        while True:
+            batch = []
+            while ring and len(batch) < self.batch_size:
+                batch.append(ring.popleft())
+            if batch:
+                self._write(batch)
+                with self._space:
+                    self._space.notify_all()
+                continue
+            if self._stopping:
+                break
+            self._wakeup.clear()
+            if not ring:
+                self._wakeup.wait(self.flush_interval)
+
+    def _write(self, batch):
+        formatted = {}
+        for sink in self.sinks:
+            try:
+                if hasattr(sink, 'write_records'):
+                    # Structured sinks encode records themselves
+                    sink.write_records([record for record in batch if record.levelno >= sink.level])
+                    continue
+                key = id(sink.formatter)
+                if key not in formatted:
+                    formatted[key] = [sink.formatter.format(record) + '\n' for record in batch]
+                lines = [line for record, line in zip(batch, formatted[key])
+                         if record.levelno >= sink.level]
+                if lines:
+                    sink.write_batch(lines)
+            except Exception as exc:
+                sys.stderr.write(f"log-writer: {sink.path or sink.stream}: {exc}\n")
+        self.written += len(batch)
+
+class QueuedLogHandler(logging.Handler):
+    """Handler that only enqueues records into a LogPipeline.
+
+    The standard Handler.handle still holds this handler's lock around emit(),
+    but only for the enqueue. Formatting happens later on the writer thread,
+    so log arguments should not be mutated after the call.
+    """
+
+    def __init__(self, pipeline, level=logging.NOTSET):
+        super().__init__(level)
+        self.pipeline = pipeline
+
+    def emit(self, record):
+        self.pipeline.submit(record)
+
+def latency_percentiles(samples_ns, percentiles=(50, 99, 99.9)):
+    """Return {percentile: microseconds} for a collection of nanosecond samples."""
+    ordered = sorted(samples_ns)
+    if not ordered:
+        return {p: 0.0 for p in percentiles}
+    return {p: ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] / 1000
+            for p in percentiles}
+
+def setup_queued_logging(log_dir='.', console_stream=None, policy='drop', capacity=10_000,
+                         max_bytes=10 * 1024 * 1024, backup_count=5):
+    """Non-blocking version of setup_logging(): same outputs, one writer thread."""
+    detailed_formatter = logging.Formatter(
+        '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
+    )
+    simple_formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+
+    sinks = [
+        LogSink(simple_formatter, logging.INFO, stream=console_stream or sys.stderr),
+        LogSink(detailed_formatter, logging.INFO, path=os.path.join(log_dir, 'app.log'),
+                max_bytes=max_bytes, backup_count=backup_count),
+        LogSink(detailed_formatter, logging.ERROR, path=os.path.join(log_dir, 'error.log'),
+                max_bytes=max_bytes, backup_count=backup_count),
+    ]
+    pipeline = LogPipeline(sinks, capacity=capacity, policy=policy).start()
+
+    logger = logging.getLogger('app')
+    logger.setLevel(logging.INFO)
+    handler = QueuedLogHandler(pipeline)
+    logger.addHandler(handler)
+    return logger, handler, pipeline
+
+def demonstrate_queued_logging():
+    """Compare direct handlers with the queued pipeline on the request path."""
+    print("Queued Logging Pipeline:")
+    with tempfile.TemporaryDirectory() as log_dir:
+        threads_count, calls_per_thread = 4, 5_000
+
+        def measure(logger, samples):
+            def request_thread():
+                for i in range(calls_per_thread):
+                    start = time.perf_counter_ns()
+                    logger.info("GET /api/users/%d 200", i)
+                    samples.append(time.perf_counter_ns() - start)
+            threads = [threading.Thread(target=request_thread) for _ in range(threads_count)]
+            start_time = time.time()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return time.time() - start_time
+
+        # 1. Direct handlers, as in setup_logging()
+        print("\n1. Direct Handlers vs Queued Pipeline:")
+        direct_logger = logging.getLogger('app.direct')
+        direct_logger.propagate = False
+        direct_logger.setLevel(logging.INFO)
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s')
+        direct_handlers = [logging.StreamHandler(io.StringIO())]
+        for name, level in (('direct_app.log', logging.INFO), ('direct_error.log', logging.ERROR)):
+            handler = logging.handlers.RotatingFileHandler(os.path.join(log_dir, name),
+                                                           maxBytes=10 * 1024 * 1024, backupCount=5)
+            handler.setLevel(level)
+            direct_handlers.append(handler)
+        for handler in direct_handlers:
+            handler.setFormatter(formatter)
+            direct_logger.addHandler(handler)
+        direct_samples = []
+        direct_time = measure(direct_logger, direct_samples)
+        for handler in direct_handlers:
+            direct_logger.removeHandler(handler)
+            handler.close()
+
+        # Queued pipeline
+        queued_logger, queued_handler, pipeline = setup_queued_logging(
+            log_dir, console_stream=io.StringIO(), policy='block')
+        queued_samples = []
+        queued_time = measure(queued_logger, queued_samples)
+        pipeline.stop()
+        queued_logger.removeHandler(queued_handler)
+
+        for name, samples, elapsed in (('Direct', direct_samples, direct_time),
+                                       ('Queued', queued_samples, queued_time)):
+            pct = latency_percentiles(samples)
+            print(f"  {name}: p50 {pct[50]:.1f}µs, p99 {pct[99]:.1f}µs, p99.9 {pct[99.9]:.1f}µs "
+                  f"({len(samples)} calls in {elapsed:.3f}s)")
+        print(f"  Queued records written: {pipeline.written}, dropped: {pipeline.dropped}")
+
+        # 2. Backpressure policies with a stalled writer
+        print("\n2. Backpressure Policies (writer not started, capacity 100):")
+        for policy in ('drop', 'sample'):
+            stalled = LogPipeline([LogSink(formatter, stream=io.StringIO())], capacity=100, policy=policy)
+            record = logging.makeLogRecord({'name': 'app', 'levelno': logging.INFO,
+                                            'levelname': 'INFO', 'msg': 'burst'})
+            accepted = sum(stalled.submit(record) for _ in range(200))
+            print(f"  {policy:<6}: accepted {accepted}, dropped {stalled.dropped}")
+        stalled.start().stop()
+        stalled.start().submit(record)  # a stopped pipeline can be started again
+        stalled.stop()
+        print(f"  Drained, stopped and restarted: {stalled.written} records written")
+
+        # 3. Rotation happens on the writer thread
+        print("\n3. Rotation on the Writer Thread:")
+        rotating_logger, rotating_handler, rotating_pipeline = setup_queued_logging(
+            log_dir, console_stream=io.StringIO(), policy='block', max_bytes=64 * 1024, backup_count=3)
+        for i in range(3_000):
+            rotating_logger.info("order %d processed", i)
+        rotating_pipeline.stop()
+        rotating_logger.removeHandler(rotating_handler)
+        print(f"  Files: {sorted(name for name in os.listdir(log_dir) if name.startswith('app.log'))}")
+
+    return pipeline
+
+queued_logging_pipeline = demonstrate_queued_logging()
+
+# =============================================================================
+# 12. STRUCTURED BINARY LOGS
+# =============================================================================
+
+print("\n🗂️ STRUCTURED BINARY LOGS")
+print("-" * 28)
+
+import struct
+from datetime import datetime, timezone
+
+BINLOG_MAGIC = b'SLOG\x02'
+# length of the rest, timestamp, level, logger name length, message length
+BINLOG_RECORD = struct.Struct('<IdHHI')
+# block offset, block length, first/last timestamp, level bitmask, record count
+BINLOG_INDEX_ENTRY = struct.Struct('<QQddBI')
+
+def _level_bit(levelno):
+    """Map DEBUG..CRITICAL (10..50) to one bit of a block's level mask."""
+    return 1 << min(max(levelno // 10, 0), 7)
+
+class BinaryLogWriter:
+    """Append length-prefixed records to a .slog file with a sidecar .idx index.
+
+    Record layout: BINLOG_RECORD header, then the UTF-8 logger name, message
+    and a JSON object of extra fields. Every block_records records the writer
+    appends one BINLOG_INDEX_ENTRY (offset, length, time range, levels seen),
+    so readers can skip whole blocks without decoding them.
+
+    Reopening an existing file first indexes any records written after the
+    last index entry (a writer that died before close()) and drops a torn
+    final record, so later blocks never hide them from readers.
+    """
+
+    def __init__(self, path, block_records=1024):
+        self.path = path
+        self.index_path = path + '.idx'
+        self.block_records = block_records
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, 'wb') as log_file:
+                log_file.write(BINLOG_MAGIC)
+            open(self.index_path, 'wb').close()
+        else:
+            self._recover()
+        self._file = open(path, 'ab')
+        self._index = open(self.index_path, 'ab')
+        self._reset_block()
+
+    def _recover(self):
+        with open(self.path, 'rb') as log_file:
+            if log_file.read(len(BINLOG_MAGIC)) != BINLOG_MAGIC:
+                raise ValueError(f"{self.path} is not a structured log file")
+        if not os.path.exists(self.index_path):
+            open(self.index_path, 'wb').close()
+        data_size = os.path.getsize(self.path)
+        index_size = os.path.getsize(self.index_path)
+        index_size -= index_size % BINLOG_INDEX_ENTRY.size  # drop a torn index entry
+        with open(self.index_path, 'r+b') as index_file:
+            indexed_end = len(BINLOG_MAGIC)
+            # The index may have reached disk before the data it describes:
+            # drop entries that point past the end of the log
+            while index_size:
+                index_file.seek(index_size - BINLOG_INDEX_ENTRY.size)
+                offset, length = BINLOG_INDEX_ENTRY.unpack(index_file.read(BINLOG_INDEX_ENTRY.size))[:2]
+                if offset + length <= data_size:
+                    indexed_end = offset + length
+                    break
+                index_size -= BINLOG_INDEX_ENTRY.size
+            index_file.truncate(index_size)
+            index_file.seek(index_size)
+            with open(self.path, 'rb') as log_file:
+                log_file.seek(indexed_end)
+                tail = log_file.read()
+
+            entries = []
+            block = None  # [start, first, last, levels, count]
+            position = 0
+            while position + BINLOG_RECORD.size <= len(tail):
+                rest, timestamp, levelno = BINLOG_RECORD.unpack_from(tail, position)[:3]
+                record_end = position + 4 + rest
+                if record_end > len(tail):
+                    break
+                if block is None:
+                    block = [position, timestamp, timestamp, 0, 0]
+                block[1] = min(block[1], timestamp)
+                block[2] = max(block[2], timestamp)
+                block[3] |= _level_bit(levelno)
+                block[4] += 1
+                position = record_end
+                if block[4] >= self.block_records:
+                    entries.append(BINLOG_INDEX_ENTRY.pack(indexed_end + block[0], position - block[0], *block[1:]))
+                    block = None
+            if block is not None:
+                entries.append(BINLOG_INDEX_ENTRY.pack(indexed_end + block[0], position - block[0], *block[1:]))
+            index_file.write(b''.join(entries))
+        os.truncate(self.path, indexed_end + position)
+
+    def _reset_block(self):
+        self._block_start = self._file.tell()
+        self._block_first = self._block_last = None
+        self._block_levels = 0
+        self._block_count = 0
+
+    def write(self, timestamp, levelno, name, message, extra=None):
+        if not 0 <= levelno <= 0xFFFF:
+            raise ValueError(f"Log level {levelno} does not fit the record's 16-bit level field")
+        name_bytes = name.encode('utf-8')
+        message_bytes = message.encode('utf-8')
+        extra_bytes = json.dumps(extra, separators=(',', ':'), default=str).encode('utf-8') if extra else b''
+        rest = BINLOG_RECORD.size - 4 + len(name_bytes) + len(message_bytes) + len(extra_bytes)
+        self._file.write(BINLOG_RECORD.pack(rest, timestamp, levelno, len(name_bytes), len(message_bytes))
+                         + name_bytes + message_bytes + extra_bytes)
+
+        if self._block_first is None:
+            self._block_first = timestamp
+        self._block_first = min(self._block_first, timestamp)
+        self._block_last = max(self._block_last or timestamp, timestamp)
+        self._block_levels |= _level_bit(levelno)
+        self._block_count += 1
+        if self._block_count >= self.block_records:
+            self._finish_block()
+
+    def _finish_block(self):
+        if not self._block_count:
+            return
+        end = self._file.tell()
+        self._index.write(BINLOG_INDEX_ENTRY.pack(self._block_start, end - self._block_start,
+                                                  self._block_first, self._block_last,
+                                                  self._block_levels, self._block_count))
+        self._reset_block()
+
+    def write_record(self, record):
+        """Encode a logging.LogRecord, keeping non-standard attributes as extras."""
+        extra = {key: value for key, value in record.__dict__.items()
+                 if key not in _STANDARD_RECORD_ATTRS}
+        message = record.getMessage()
+        if record.exc_info:
+            message += '\n' + logging.Formatter().formatException(record.exc_info)
+        self.write(record.created, record.levelno, record.name, message, extra)
+
+    def sync(self):
+        """Hand written records to the OS without closing the current block."""
+        self._file.flush()
+
+    def flush(self):
+        self._finish_block()
+        self._file.flush()
+        self._index.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+        self._index.close()
+
+_STANDARD_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+class BinaryLogSink:
+    """LogPipeline sink that writes structured records instead of text lines."""
+
+    stream = None
+
+    def __init__(self, path, level=logging.NOTSET, block_records=1024):
+        self.path = path
+        self.level = level
+        self.block_records = block_records
+        self._writer = None
+
+    def open(self):
+        if self._writer is None:
+            self._writer = BinaryLogWriter(self.path, self.block_records)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def write_records(self, records):
+        for record in records:
+            self._writer.write_record(record)
+        self._writer.sync()
+
+class BinaryLogHandler(logging.Handler):
+    """Plain logging handler for code that does not use LogPipeline."""
+
+    def __init__(self, path, level=logging.NOTSET, block_records=1024):
+        super().__init__(level)
+        self.writer = BinaryLogWriter(path, block_records)
+
+    def emit(self, record):
+        try:
+            self.writer.write_record(record)
+        except Exception:
+            self.handleError(record)
+
+    def close(self):
+        self.writer.close()
+        super().close()
+
+class BinaryLogReader:
+    """Query a .slog file by time range, level and logger using its sidecar index."""
+
+    def __init__(self, path):
+        self.path = path
+        self.blocks = []
+        self.blocks_read = 0
+        index_path = path + '.idx'
+        if os.path.exists(index_path):
+            with open(index_path, 'rb') as index_file:
+                data = index_file.read()
+            usable = len(data) - len(data) % BINLOG_INDEX_ENTRY.size
+            self.blocks = [BINLOG_INDEX_ENTRY.unpack_from(data, offset)
+                           for offset in range(0, usable, BINLOG_INDEX_ENTRY.size)]
+
+    def _candidate_blocks(self, start, end, level_mask):
+        for offset, length, first, last, levels, _ in self.blocks:
+            if start is not None and last < start:
+                continue
+            if end is not None and first > end:
+                continue
+            if level_mask and not levels & level_mask:
+                continue
+            yield offset, length
+        # Records written after the last index entry (e.g. after a crash) are always scanned
+        indexed_end = self.blocks[-1][0] + self.blocks[-1][1] if self.blocks else len(BINLOG_MAGIC)
+        tail = os.path.getsize(self.path) - indexed_end
+        if tail > 0:
+            yield indexed_end, tail
+
+    def query(self, start=None, end=None, min_level=None, levels=None, name=None):
+        """Yield matching records as dicts; start/end are UNIX timestamps."""
+        wanted = set(levels) if levels else None
+        level_mask = 0
+        if wanted:
+            for levelno in wanted:
+                level_mask |= _level_bit(levelno)
+        elif min_level is not None:
+            # Every bit from min_level's up; the top bit also covers levels >= 70
+            level_mask = 0xFF & ~(_level_bit(min_level) - 1)
+
+        with open(self.path, 'rb') as log_file:
+            if log_file.read(len(BINLOG_MAGIC)) != BINLOG_MAGIC:
+                raise ValueError(f"{self.path} is not a structured log file")
+            for offset, length in self._candidate_blocks(start, end, level_mask):
+                log_file.seek(offset)
+                data = log_file.read(length)
+                self.blocks_read += 1
+                yield from self._decode_block(data, start, end, min_level, wanted, name)
+
+    @staticmethod
+    def _decode_block(data, start, end, min_level, wanted, name):
+        position = 0
+        while position + BINLOG_RECORD.size <= len(data):
+            rest, timestamp, levelno, name_len, message_len = BINLOG_RECORD.unpack_from(data, position)
+            record_end = position + 4 + rest
+            if record_end > len(data):
+                break  # truncated final record
+            body = position + BINLOG_RECORD.size
+            position = record_end
+            if start is not None and timestamp < start or end is not None and timestamp > end:
+                continue
+            if min_level is not None and levelno < min_level or wanted and levelno not in wanted:
+                continue
+            record_name = data[body:body + name_len].decode('utf-8')
+            if name is not None and record_name != name:
+                continue
+            message_start = body + name_len
+            extra_bytes = data[message_start + message_len:record_end]
+            yield {
+                'timestamp': timestamp,
+                'level': logging.getLevelName(levelno),
+                'levelno': levelno,
+                'name': record_name,
+                'message': data[message_start:message_start + message_len].decode('utf-8'),
+                'extra': json.loads(extra_bytes) if extra_bytes else {},
+            }
+
+def export_text(path, output, **filters):
+    """Write records from a .slog file (optionally filtered) as classic text lines."""
+    count = 0
+    for record in BinaryLogReader(path).query(**filters):
+        when = datetime.fromtimestamp(record['timestamp'], tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        extra = f" {json.dumps(record['extra'])}" if record['extra'] else ''
+        output.write(f"{when} - {record['name']} - {record['level']} - {record['message']}{extra}\n")
+        count += 1
+    return count
+
+def demonstrate_structured_logs():
+    """Write a day of structured logs and query them through the index."""
+    print("Structured Binary Logs:")
+    with tempfile.TemporaryDirectory() as log_dir:
+        slog_path = os.path.join(log_dir, 'app.slog')
+        text_path = os.path.join(log_dir, 'app.log')
+
+        # 1. Write one simulated day of traffic to both formats
+        print("\n1. Writing Logs:")
+        random.seed(42)
+        day_start = datetime(2024, 1, 1, tzinfo=timezone.utc).timestamp()
+        levels = [logging.DEBUG, logging.INFO, logging.WARNING, logging.ERROR]
+        writer = BinaryLogWriter(slog_path)
+        with open(text_path, 'w') as text_file:
+            for i in range(200_000):
+                timestamp = day_start + i * 86400 / 200_000
+                levelno = random.choices(levels, weights=[30, 65, 4.9, 0.1])[0]
+                message = f"GET /api/users/{i % 5000} {500 if levelno == logging.ERROR else 200}"
+                writer.write(timestamp, levelno, 'app', message, {'request_id': i})
+                when = datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+                text_file.write(f"{when} - app - {logging.getLevelName(levelno)} - {message} {{'request_id': {i}}}\n")
+        writer.close()
+        print(f"Text log: {os.path.getsize(text_path) / 1024 / 1024:.1f} MB, "
+              f"structured log: {os.path.getsize(slog_path) / 1024 / 1024:.1f} MB "
+              f"+ {os.path.getsize(slog_path + '.idx') / 1024:.1f} KB index")
+
+        # 2. Query a 10-minute window
+        print("\n2. Time-Range Query (12:00-12:10):")
+        window_start = day_start + 12 * 3600
+        window_end = window_start + 599.999  # end is inclusive; stop before 12:10:00
+
+        start_time = time.time()
+        reader = BinaryLogReader(slog_path)
+        window = list(reader.query(start=window_start, end=window_end))
+        indexed_time = time.time() - start_time
+
+        start_time = time.time()
+        with open(text_path) as text_file:
+            grepped = [line for line in text_file if line.startswith('2024-01-01 12:0')]
+        grep_time = time.time() - start_time
+
+        print(f"Indexed: {len(window)} records from {reader.blocks_read}/{len(reader.blocks)} blocks "
+              f"in {indexed_time:.4f}s")
+        print(f"Full text scan: {len(grepped)} lines in {grep_time:.4f}s")
+        assert len(window) == len(grepped), "index and text scan disagree"
+
+        # 3. Query by level
+        print("\n3. Level Query (ERROR and above):")
+        reader = BinaryLogReader(slog_path)
+        errors = list(reader.query(min_level=logging.ERROR))
+        print(f"{len(errors)} errors from {reader.blocks_read}/{len(reader.blocks)} blocks; "
+              f"first: {errors[0]['message']} {errors[0]['extra']}")
+
+        # 4. Export back to text
+        print("\n4. Export to Text:")
+        exported = io.StringIO()
+        count = export_text(slog_path, exported, start=window_start, end=window_start + 2)
+        print(f"Exported {count} records:")
+        print(exported.getvalue().rstrip())
+
+        # 5. From the logging module, through the queued pipeline
+        print("\n5. Logging Through the Pipeline:")
+        pipeline = LogPipeline([BinaryLogSink(os.path.join(log_dir, 'pipeline.slog'))]).start()
+        structured_logger = logging.getLogger('app.structured')
+        structured_logger.propagate = False
+        structured_logger.setLevel(logging.INFO)
+        handler = QueuedLogHandler(pipeline)
+        structured_logger.addHandler(handler)
+        structured_logger.info("user %s logged in", 'alice', extra={'user_id': 1, 'ip': '203.0.113.7'})
+        structured_logger.warning("slow query", extra={'duration_ms': 812})
+        pipeline.stop()
+        structured_logger.removeHandler(handler)
+        for record in BinaryLogReader(os.path.join(log_dir, 'pipeline.slog')).query():
+            print(f"  {record['level']}: {record['message']} {record['extra']}")
+
+        # 6. A writer that dies mid-block, plus a torn final record
+        print("\n6. Recovery After a Crash:")
+        crash_path = os.path.join(log_dir, 'crash.slog')
+        crashed = BinaryLogWriter(crash_path, block_records=100)
+        for i in range(250):
+            crashed.write(day_start + i, logging.INFO, 'app', f"before crash {i}")
+        crashed.sync()
+        del crashed  # never closed: the last 50 records have no index entry
+        with open(crash_path, 'ab') as log_file:
+            log_file.write(b'\x40\x00')  # half-written header
+        reopened = BinaryLogWriter(crash_path, block_records=100)
+        for i in range(250):
+            reopened.write(day_start + 250 + i, logging.ERROR, 'app', f"after restart {i}")
+        reopened.close()
+        recovered = list(BinaryLogReader(crash_path).query())
+        print(f"Records readable after restart: {len(recovered)} of 500; "
+              f"ERROR query finds {sum(1 for _ in BinaryLogReader(crash_path).query(min_level=logging.ERROR))}")
+        # The index reached disk but the end of the data it describes did not
+        os.truncate(crash_path, os.path.getsize(crash_path) - 1000)
+        BinaryLogWriter(crash_path, block_records=100).close()
+        survivors = list(BinaryLogReader(crash_path).query())
+        print(f"After losing the last 1,000 bytes of data: {len(survivors)} records, "
+              f"{sum(1 for record in survivors if not record['message'])} empty, "
+              f"log size {os.path.getsize(crash_path):,} bytes")
+
+demonstrate_structured_logs()
+
+# =============================================================================
+# 13. DEEP HEALTH CHECKS
+# =============================================================================
+
+print("\n🩺 DEEP HEALTH CHECKS")
+print("-" * 23)
+
+import bisect
+import queue
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+ProbeResult = namedtuple('ProbeResult', ['healthy', 'latency_ms', 'checked_at', 'error'])
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (milliseconds) with approximate percentiles."""
+
+    BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+    def __init__(self, buckets_ms=BUCKETS_MS):
+        self.bounds = tuple(buckets_ms)
+        self.counts = [0] * (len(self.bounds) + 1)  # last bucket is +Inf
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def observe(self, latency_ms):
+        self.counts[bisect.bisect_left(self.bounds, latency_ms)] += 1
+        self.total += 1
+        self.sum_ms += latency_ms
+
+    def percentile(self, q):
+        """Upper bound of the bucket containing the q-th percentile."""
+        if not self.total:
+            return None
+        target = q / 100 * self.total
+        seen = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+    def to_dict(self):
+        return {
+            'count': self.total,
+            'mean_ms': round(self.sum_ms / self.total, 3) if self.total else None,
+            'p50_ms': self.percentile(50),
+            'p99_ms': self.percentile(99),
+            'buckets': {f"le_{bound}": count for bound, count in zip(self.bounds, self.counts)},
+        }
+
+class ProbeExecutor:
+    """Small pool of reusable daemon worker threads for probe runs.
+
+    Unlike ThreadPoolExecutor's workers, daemon threads cannot keep the
+    process alive when a check never returns.
+    """
+
+    def __init__(self, workers):
+        self._tasks = queue.Queue()
+        self._threads = [threading.Thread(target=self._work, name=f"probe-worker-{i}", daemon=True)
+                         for i in range(workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def _work(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                break
+            func, future = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(func())
+            except BaseException as exc:
+                future.set_exception(exc)
+
+    def submit(self, func):
+        future = Future()
+        self._tasks.put((func, future))
+        return future
+
+    def shutdown(self):
+        """Let idle workers exit; a worker stuck in a check stays parked (daemon)."""
+        for _ in self._threads:
+            self._tasks.put(None)
+
+class HealthProbe:
+    """One dependency check run on a schedule.
+
+    check is a callable that raises (or returns False) when the dependency is
+    unhealthy. A run that exceeds timeout counts as a failure; while it is
+    still hanging, the probe is not started again and reports how long it has
+    been hanging. Results older than max_staleness are reported as stale.
+    """
+
+    def __init__(self, name, check, interval=5.0, timeout=1.0, critical=True, max_staleness=None):
+        self.name = name
+        self.check = check
+        self.interval = interval
+        self.timeout = timeout
+        self.critical = critical
+        self.max_staleness = max_staleness if max_staleness is not None else 3 * interval
+        self.histogram = LatencyHistogram()
+        self.result = None
+        self.next_run = 0.0
+        self._inflight = None
+        self._started = None
+
+    def submit(self, executor, clock=time.monotonic):
+        """Start the check on executor; return False if the last run is still hanging."""
+        if self._inflight is not None and not self._inflight.done():
+            hanging_ms = (time.perf_counter() - self._started) * 1000
+            self.result = ProbeResult(False, round(hanging_ms, 3), clock(),
+                                      f"still hanging after {hanging_ms / 1000:.1f}s")
+            return False
+        self._started = time.perf_counter()
+        self._inflight = executor.submit(self.check)
+        return True
+
+    def collect(self, clock=time.monotonic):
+        """Wait for the submitted run, at most until its timeout, and record the result."""
+        remaining = self._started + self.timeout - time.perf_counter()
+        try:
+            ok = self._inflight.result(timeout=max(remaining, 0))
+            error = None if ok is not False else 'check returned False'
+        except FutureTimeout:
+            error = f"timed out after {self.timeout}s"
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        latency_ms = (time.perf_counter() - self._started) * 1000
+        self.histogram.observe(latency_ms)
+        self.result = ProbeResult(error is None, round(latency_ms, 3), clock(), error)
+        return self.result
+
+class HealthMonitor:
+    """Runs probes in the background and serves health from cached results.
+
+    The /health handler only compares a few timestamps and returns a body
+    built by the background thread, so load-balancer polling never touches
+    the database or Redis. Due probes run concurrently on a ProbeExecutor,
+    so one hanging dependency only costs its own timeout.
+    """
+
+    def __init__(self, probes, clock=time.monotonic, version='1.0.0'):
+        self.probes = list(probes)
+        self.clock = clock
+        self.version = version
+        # One worker per probe: each probe has at most one run in flight
+        self._executor = ProbeExecutor(len(self.probes))
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._cached = (None, 503)
+
+    def run_once(self):
+        """Run every probe that is due and rebuild the cached response."""
+        now = self.clock()
+        started = []
+        for probe in self.probes:
+            if now >= probe.next_run:
+                probe.next_run = now + probe.interval
+                if probe.submit(self._executor, self.clock):
+                    started.append(probe)
+        for probe in started:
+            probe.collect(self.clock)
+        self._rebuild()
+
+    def _rebuild(self):
+        checks = {}
+        healthy = True
+        for probe in self.probes:
+            result = probe.result
+            if result is None:
+                checks[probe.name] = {'status': 'pending'}
+                ok = False
+            else:
+                checks[probe.name] = {
+                    'status': 'healthy' if result.healthy else 'unhealthy',
+                    'latency_ms': result.latency_ms,
+                    'error': result.error,
+                }
+                ok = result.healthy
+            if probe.critical and not ok:
+                healthy = False
+        body = json.dumps({
+            'status': 'healthy' if healthy else 'unhealthy',
+            'checked_at': datetime.now(timezone.utc).isoformat(),
+            'checks': checks,
+            'version': self.version,
+        })
+        with self._lock:
+            self._cached = (body, 200 if healthy else 503)
+
+    def start(self):
+        def loop():
+            while not self._stop.is_set():
+                self.run_once()
+                due = min(probe.next_run for probe in self.probes) - self.clock()
+                self._stop.wait(max(due, 0.01))
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name='health-monitor', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """Stop the monitor and release its probe workers."""
+        self.stop()
+        self._executor.shutdown()
+
+    def status(self):
+        """Return (json_body, status_code) from the cached state."""
+        now = self.clock()
+        with self._lock:
+            body, code = self._cached
+        for probe in self.probes:
+            if probe.critical and probe.result is not None and now - probe.result.checked_at > probe.max_staleness:
+                stale = [p.name for p in self.probes
+                         if p.result is not None and now - p.result.checked_at > p.max_staleness]
+                return json.dumps({'status': 'stale', 'stale_checks': stale, 'version': self.version}), 503
+        if body is None:
+            return json.dumps({'status': 'starting', 'version': self.version}), 503
+        return body, code
+
+    def details(self):
+        """Per-dependency latency histograms, for dashboards rather than load balancers."""
+        return {probe.name: {'critical': probe.critical,
+                             'interval_s': probe.interval,
+                             'timeout_s': probe.timeout,
+                             'latency': probe.histogram.to_dict()}
+                for probe in self.probes}
+
+def register_health_routes(app, monitor):
+    """Add /health (cached status) and /health/details (histograms) to a Flask app."""
+    from flask import Response, jsonify
+
+    @app.route('/health')
+    def health():
+        body, code = monitor.status()
+        return Response(body, status=code, mimetype='application/json')
+
+    @app.route('/health/details')
+    def health_details():
+        return jsonify(monitor.details())
+
+def demonstrate_health_checks():
+    """Demonstrate background probes, timeouts, staleness and the cached endpoint."""
+    print("Deep Health Checks:")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = os.path.join(tmp_dir, 'health.db')
+
+        def check_database():
+            connection = sqlite3.connect(db_path, timeout=0.5)
+            try:
+                connection.execute('SELECT 1').fetchone()
+            finally:
+                connection.close()
+
+        def check_cache():
+            time.sleep(random.uniform(0.002, 0.02))  # stands in for redis_client.ping()
+
+        redis_hanging = threading.Event()
+
+        def check_hanging_redis():
+            redis_hanging.wait(30)  # a ping that never answers
+
+        # 1. Probes on a schedule with timeouts
+        print("\n1. Background Probes:")
+        monitor = HealthMonitor([
+            HealthProbe('database', check_database, interval=0.05, timeout=0.5),
+            HealthProbe('cache', check_cache, interval=0.05, timeout=0.5),
+            HealthProbe('search', check_hanging_redis, interval=0.1, timeout=0.1, critical=False),
+        ]).start()
+        time.sleep(0.6)
+        body, code = monitor.status()
+        print(f"HTTP {code}")
+        for name, check in json.loads(body)['checks'].items():
+            latency = f"{check['latency_ms']:.1f} ms" if check.get('latency_ms') is not None else 'no result'
+            print(f"  {name:<9} {check['status']:<10} {latency:>10}  {check.get('error') or ''}")
+
+        # 2. Latency histograms per dependency
+        print("\n2. Latency Histograms:")
+        for name, detail in monitor.details().items():
+            latency = detail['latency']
+            print(f"  {name:<9} {latency['count']:>3} runs, mean {latency['mean_ms']} ms, "
+                  f"p50 <= {latency['p50_ms']} ms, p99 <= {latency['p99_ms']} ms")
+
+        # 3. Endpoint cost: cached vs synchronous
+        print("\n3. Endpoint Cost:")
+        calls = 10_000
+        start = time.perf_counter()
+        for _ in range(calls):
+            monitor.status()
+        cached_us = (time.perf_counter() - start) / calls * 1e6
+
+        start = time.perf_counter()
+        for _ in range(20):
+            check_database()
+            check_cache()
+        sync_us = (time.perf_counter() - start) / 20 * 1e6
+        print(f"Cached status: {cached_us:.1f} µs per request")
+        print(f"Synchronous DB + cache checks: {sync_us:.0f} µs per request "
+              f"(and unbounded if a dependency hangs)")
+
+        # 4. Staleness bound
+        print("\n4. Staleness:")
+        monitor.stop()
+        for probe in monitor.probes:
+            probe.max_staleness = 0.1
+        time.sleep(0.15)
+        body, code = monitor.status()
+        print(f"Monitor stopped -> HTTP {code} {body}")
+
+        # 5. Wired into Flask
+        print("\n5. Flask Endpoint:")
+        try:
+            from flask import Flask
+        except ImportError:
+            print("Flask not installed; register_health_routes(app, monitor) adds /health")
+        else:
+            app = Flask('health_demo')
+            register_health_routes(app, monitor)
+            for probe in monitor.probes:
+                probe.max_staleness = 3 * probe.interval
+            monitor.start()
+            time.sleep(0.1)
+            response = app.test_client().get('/health')
+            print(f"GET /health -> {response.status_code} {response.get_json()['status']}")
+
+        monitor.close()
+    redis_hanging.set()
+    return monitor
+
+health_monitor = demonstrate_health_checks()
+
+# =============================================================================
+# 14. EXERCISES
 # =============================================================================
 
 print("\n🏋️ EXERCISES")
@@ -805,7 +2552,7 @@ Exercise 5: Implement Disaster Recovery
 """)
 
 # =============================================================================
-# 10. BEST PRACTICES
+# 15. BEST PRACTICES
 # =============================================================================
 
 print("\n💡 BEST PRACTICES")
@@ -848,7 +2595,7 @@ Deployment and production best practices:
 """)
 
 # =============================================================================
-# 11. COMMON MISTAKES TO AVOID
+# 16. COMMON MISTAKES TO AVOID
 # =============================================================================
 
 print("\n⚠️ COMMON MISTAKES TO AVOID")
@@ -887,7 +2634,7 @@ Common deployment mistakes:
 """)
 
 # =============================================================================
-# 12. KEY TAKEAWAYS
+# 17. KEY TAKEAWAYS
 # =============================================================================
 
 print("\n🎯 KEY TAKEAWAYS")
@@ -903,6 +2650,11 @@ What you've learned today:
 ✅ Monitoring and logging
 ✅ Security considerations
 ✅ Scaling and performance optimization
+✅ Two-tier caching with stampede protection
+✅ Rate limiting with O(1) state per client
+✅ Non-blocking queued logging
+✅ Structured, indexed binary logs
+✅ Cached health checks with probe timeouts
 ✅ Best practices for production deployment
 
 Next Steps:
@@ -913,7 +2665,7 @@ Next Steps:
 """)
 
 # =============================================================================
-# 13. CONCLUSION
+# 18. CONCLUSION
 # =============================================================================
 
 print("\n🎉 CONGRATULATIONS!")
@@ -937,7 +2689,7 @@ Happy coding! 🐍✨
 """)
 
 # =============================================================================
-# 14. COMPLETE LEARNING JOURNEY SUMMARY
+# 19. COMPLETE LEARNING JOURNEY SUMMARY
 # =============================================================================
 
 print("\n🎓 COMPLETE LEARNING JOURNEY SUMMARY")
@@ -60,7 +60,187 @@ Python Database Libraries:
 """
 
 # =============================================================================
-# 2. SQLITE DATABASE OPERATIONS
+# 2. SQLITE CONNECTION POOL
+# =============================================================================
+
+print("\n🔌 SQLITE CONNECTION POOL")
+print("-" * 26)
+
+import os
+import tempfile
+import threading
+import time
+import weakref
+
+# Rows in the largest table of the bigger demos below (pandas at scale, bulk
+# loading, index advisor, aggregates, router and cache). The default keeps the
+# whole file quick; set DAY19_DEMO_ROWS=300000 or more for production-like sizes.
+DEMO_ROWS = int(os.environ.get('DAY19_DEMO_ROWS', 30_000))
+
+# Applied to every pooled connection; journal_mode=WAL is stored in the file itself
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',       # readers don't block the writer
+    'synchronous': 'NORMAL',     # fsync at checkpoints, not every commit (safe with WAL)
+    'cache_size': -64_000,       # 64 MB page cache (negative = KiB)
+    'mmap_size': 256 * 2**20,    # read pages through a 256 MB memory map
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5_000,       # wait for locks instead of failing at once
+}
+
+class _ThreadConnections(dict):
+    """One thread's connections by path (a dict subclass, so it can be weakly referenced)."""
+
+    def __init__(self):
+        super().__init__()
+        self.opened = []  # shared with the finalizer, which must not reference self
+
+class SQLitePool:
+    """Hands out one long-lived, pre-configured connection per (thread, database).
+
+    Opening a connection costs a file open, schema parse and PRAGMA setup;
+    reusing it also keeps sqlite3's prepared-statement cache warm, so
+    cached_statements should cover the hot queries. A thread's connections
+    are closed when the thread exits (its thread-local state is freed).
+    """
+
+    def __init__(self, pragmas=SQLITE_PRAGMAS, cached_statements=256):
+        self.pragmas = dict(pragmas)
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        self._all = set()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        """Connections currently open."""
+        with self._lock:
+            return len(self._all)
+
+    def _open(self, path, opened):
+        conn = sqlite3.connect(path, cached_statements=self.cached_statements, check_same_thread=False)
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        opened.append(conn)
+        with self._lock:
+            self._all.add(conn)
+        return conn
+
+    def _discard(self, opened):
+        with self._lock:
+            self._all.difference_update(opened)
+        for conn in opened:
+            conn.close()
+
+    def connect(self, path):
+        """Return this thread's connection to path, opening it on first use."""
+        connections = getattr(self._local, 'connections', None)
+        if connections is None:
+            connections = self._local.connections = _ThreadConnections()
+            weakref.finalize(connections, self._discard, connections.opened)
+        conn = connections.get(path)
+        if conn is None:
+            conn = connections[path] = self._open(path, connections.opened)
+        return conn
+
+    def release(self, conn):
+        """Give a connection back: roll back anything left uncommitted, keep it open."""
+        if conn.in_transaction:
+            conn.rollback()
+
+    def close(self, path):
+        """Close this thread's connection to path, e.g. before deleting the file."""
+        connections = getattr(self._local, 'connections', None)
+        conn = connections.pop(path, None) if connections is not None else None
+        if conn is not None:
+            connections.opened.remove(conn)
+            with self._lock:
+                self._all.discard(conn)
+            conn.close()
+
+    def close_all(self):
+        with self._lock:
+            for conn in self._all:
+                conn.close()
+            self._all.clear()
+        self._local = threading.local()
+
+sqlite_pool = SQLitePool()
+
+def demonstrate_connection_pool():
+    """Benchmark pooled connections against a new connection per call."""
+    print("SQLite Connection Pool:")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, 'pool_benchmark.db')
+        setup = sqlite3.connect(db_path)
+        setup.execute('CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT, email TEXT, age INTEGER)')
+        setup.executemany('INSERT INTO users (username, email, age) VALUES (?, ?, ?)',
+                          [(f'user{i}', f'user{i}@example.com', 20 + i % 50) for i in range(20_000)])
+        setup.commit()
+        setup.close()
+
+        hot_query = 'SELECT username, email FROM users WHERE id = ?'
+
+        def per_call(user_id):
+            conn = sqlite3.connect(db_path)
+            try:
+                return conn.execute(hot_query, (user_id,)).fetchone()
+            finally:
+                conn.close()
+
+        def pooled(user_id, pool):
+            conn = pool.connect(db_path)
+            try:
+                return conn.execute(hot_query, (user_id,)).fetchone()
+            finally:
+                pool.release(conn)
+
+        # 1. Single-thread lookups
+        print("\n1. 5,000 Primary-Key Lookups:")
+        pool = SQLitePool()
+        for name, lookup in [('New connection per call', per_call),
+                             ('Pooled connection', lambda user_id: pooled(user_id, pool))]:
+            start = time.perf_counter()
+            for i in range(5_000):
+                lookup(i % 20_000 + 1)
+            elapsed = time.perf_counter() - start
+            print(f"  {name:<24} {elapsed:.3f}s ({elapsed / 5_000 * 1e6:.1f} µs per query)")
+
+        # 2. Several threads
+        print("\n2. 4 Threads x 2,500 Lookups:")
+        for name, lookup in [('New connection per call', per_call),
+                             ('Pooled connection', lambda user_id: pooled(user_id, pool))]:
+            threads = [threading.Thread(target=lambda: [lookup(i % 20_000 + 1) for i in range(2_500)])
+                       for _ in range(4)]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            print(f"  {name:<24} {time.perf_counter() - start:.3f}s")
+        print(f"  Pooled connections still open after the threads exited: {len(pool)} (the main thread's)")
+
+        # 3. PRAGMAs and small write transactions
+        print("\n3. 500 Single-Row Commits:")
+        for name, pragmas in [('Defaults (rollback journal, FULL)', {}),
+                              ('WAL + synchronous=NORMAL', SQLITE_PRAGMAS)]:
+            path = os.path.join(work_dir, f"writes_{len(pragmas)}.db")
+            write_pool = SQLitePool(pragmas)
+            conn = write_pool.connect(path)
+            conn.execute('CREATE TABLE events (id INTEGER PRIMARY KEY, payload TEXT)')
+            start = time.perf_counter()
+            for i in range(500):
+                conn.execute('INSERT INTO events (payload) VALUES (?)', (f'event {i}',))
+                conn.commit()
+            print(f"  {name:<34} {time.perf_counter() - start:.3f}s")
+            write_pool.close_all()
+
+        pool.close_all()
+    print(f"\nPool settings: {SQLITE_PRAGMAS}, cached_statements={sqlite_pool.cached_statements}")
+
+demonstrate_connection_pool()
+
+# =============================================================================
+# 3. SQLITE DATABASE OPERATIONS
 # =============================================================================
 
 print("\n💾 SQLITE DATABASE OPERATIONS")
@@ -71,7 +251,7 @@ def demonstrate_sqlite_operations():
     print("SQLite Database Operations:")
     
     # Create and connect to database
-    conn = sqlite3.connect('example.db')
+    conn = sqlite_pool.connect('example.db')
     cursor = conn.cursor()
     
     # Create tables
@@ -204,94 +384,421 @@ def demonstrate_sqlite_operations():
     conn.commit()
     print("✅ Orders deleted!")
     
-    # Close connection
-    conn.close()
-    print("✅ Database connection closed!")
+    # Return the connection to the pool (it stays open for the next caller)
+    sqlite_pool.release(conn)
+    print("✅ Database connection released!")
 
 demonstrate_sqlite_operations()
 
 # =============================================================================
-# 3. PANDAS WITH SQL DATABASES
+# 4. PANDAS WITH SQL DATABASES
 # =============================================================================
 
 print("\n📊 PANDAS WITH SQL DATABASES")
 print("-" * 35)
 
+import random
+import tracemalloc
+
+# Joins happen in SQLite; pandas only sees the columns it needs, already typed.
+ORDER_DETAILS_SQL = '''
+    SELECT u.username, p.category, o.quantity, o.total_amount
+    FROM orders o
+    JOIN users u ON u.id = o.user_id
+    JOIN products p ON p.id = o.product_id
+'''
+ORDER_DETAILS_DTYPES = {'username': 'category', 'category': 'category',
+                        'quantity': 'int32', 'total_amount': 'float64'}
+
+def read_sql_chunks(sql, conn, dtypes, chunksize=10_000, params=None):
+    """Yield typed DataFrame chunks of a query; only one chunk is in memory at a time."""
+    yield from pd.read_sql_query(sql, conn, params=params, chunksize=chunksize, dtype=dtypes)
+
+def aggregate_chunks(chunks, by, column):
+    """Incrementally compute sum/count/mean of column per group across chunks.
+
+    Memory is bounded by the number of groups, not the number of rows.
+    """
+    totals = None
+    for chunk in chunks:
+        part = chunk.groupby(by, observed=True)[column].agg(['sum', 'count'])
+        totals = part if totals is None else totals.add(part, fill_value=0)
+    if totals is None:
+        return pd.DataFrame(columns=['sum', 'count', 'mean'])
+    totals['count'] = totals['count'].astype('int64')
+    totals['mean'] = totals['sum'] / totals['count']
+    return totals
+
+def peak_memory(func):
+    """Run func and return (result, peak traced bytes)."""
+    tracemalloc.start()
+    try:
+        result = func()
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+SQLITE_TYPES = {'i': 'INTEGER', 'u': 'INTEGER', 'b': 'INTEGER', 'f': 'REAL', 'M': 'TEXT', 'm': 'REAL'}
+
+def column_values(series):
+    """Column as a list of Python natives (sqlite3 cannot bind NumPy scalars)."""
+    if series.dtype.kind == 'M':
+        if series.dt.tz is None:
+            text = series.dt.strftime('%Y-%m-%d %H:%M:%S.%f')
+        else:
+            # Aware timestamps are stored in UTC with an explicit offset
+            text = series.dt.tz_convert('UTC').dt.strftime('%Y-%m-%d %H:%M:%S.%f') + '+00:00'
+        return text.astype(object).where(series.notna(), None).tolist()
+    if series.dtype.kind == 'm':
+        return series.dt.total_seconds().tolist()
+    if series.dtype.kind in 'iubf' and not pd.api.types.is_extension_array_dtype(series.dtype):
+        return series.to_numpy().tolist()
+    # Object, string and nullable extension dtypes (Int64, boolean, ...): NA -> None
+    return series.astype(object).where(series.notna(), None).tolist()
+
+def write_frame(df, conn, table, if_exists='replace', chunksize=50_000):
+    """Write df to table with executemany in a single transaction.
+
+    The table is created from the DataFrame's dtypes. With if_exists='replace'
+    an existing table with the same columns is emptied and refilled; one whose
+    columns changed is dropped and re-created, and its indexes and triggers
+    are re-created on it (views refer to the table by name and keep working).
+    Both happen in one transaction, so readers see either the previous rows or
+    the complete new ones, never a half-written table. The connection must
+    not be in a transaction (commit or roll back first). Returns the number
+    of rows written.
+    """
+    if if_exists not in ('replace', 'append', 'fail'):
+        raise ValueError(f"if_exists must be 'replace', 'append' or 'fail', not {if_exists!r}")
+    column_types = [(name, SQLITE_TYPES.get(dtype.kind, 'TEXT')) for name, dtype in df.dtypes.items()]
+    columns = ', '.join(f'"{name}" {sql_type}' for name, sql_type in column_types)
+    placeholders = ', '.join('?' * len(df.columns))
+    exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)).fetchone()
+    if exists and if_exists == 'fail':
+        raise ValueError(f"Table {table!r} already exists")
+
+    if conn.in_transaction:
+        raise sqlite3.ProgrammingError("write_frame() commits its own transaction; "
+                                       "commit or roll back the connection's pending work first")
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        if exists and if_exists == 'replace':
+            current = [(row[1], row[2]) for row in conn.execute(f'PRAGMA table_info("{table}")')]
+            if current == column_types:
+                conn.execute(f'DELETE FROM "{table}"')
+            else:
+                dependents = conn.execute(
+                    "SELECT sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') "
+                    "AND sql IS NOT NULL ORDER BY type", (table,)).fetchall()
+                conn.execute(f'DROP TABLE "{table}"')
+                conn.execute(f'CREATE TABLE "{table}" ({columns})')
+                for (sql,) in dependents:
+                    conn.execute(sql)  # fails (and rolls back) if it used a dropped column
+        else:
+            conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" ({columns})')
+        values = [column_values(df[name]) for name in df.columns]
+        for start in range(0, len(df), chunksize):
+            conn.executemany(f'INSERT INTO "{table}" VALUES ({placeholders})',
+                             zip(*(column[start:start + chunksize] for column in values)))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return len(df)
+
 def demonstrate_pandas_sql():
     """Demonstrate using Pandas with SQL databases."""
     print("Pandas with SQL Databases:")
     
     # Create SQLite connection
-    conn = sqlite3.connect('example.db')
-    
-    # Read data into DataFrames
-    print("\n1. Reading Data into DataFrames:")
-    
-    users_df = pd.read_sql_query('SELECT * FROM users', conn)
-    products_df = pd.read_sql_query('SELECT * FROM products', conn)
-    orders_df = pd.read_sql_query('SELECT * FROM orders', conn)
-    
-    print(f"Users DataFrame:\n{users_df}")
-    print(f"Products DataFrame:\n{products_df}")
-    print(f"Orders DataFrame:\n{orders_df}")
+    conn = sqlite_pool.connect('example.db')
     
-    # Data analysis with Pandas
-    print("\n2. Data Analysis with Pandas:")
+    # Let SQLite do the joins and group-bys; only the result crosses into pandas
+    print("\n1. Pushing Joins and Aggregations into SQL:")
     
-    # Merge DataFrames
-    orders_with_details = pd.merge(
-        pd.merge(orders_df, users_df, on='user_id', how='left'),
-        products_df, on='product_id', how='left'
+    totals = pd.read_sql_query(
+        'SELECT SUM(total_amount) AS total_sales, AVG(total_amount) AS avg_order_value FROM orders', conn
     )
+    print(f"Total sales: ${totals.at[0, 'total_sales']:.2f}")
+    print(f"Average order value: ${totals.at[0, 'avg_order_value']:.2f}")
+    
+    sales_by_category = pd.read_sql_query('''
+        SELECT p.category, SUM(o.total_amount) AS total_amount
+        FROM orders o
+        JOIN products p ON p.id = o.product_id
+        GROUP BY p.category
+        ORDER BY total_amount DESC
+    ''', conn, index_col='category')
+    print(f"Sales by category:\n{sales_by_category}")
     
-    print(f"Orders with details:\n{orders_with_details}")
-    
-    # Calculate statistics
-    total_sales = orders_with_details['total_amount'].sum()
-    avg_order_value = orders_with_details['total_amount'].mean()
+    # Stream typed chunks and aggregate as they arrive
+    print("\n2. Streaming Typed Chunks:")
     
-    print(f"Total sales: ${total_sales:.2f}")
-    print(f"Average order value: ${avg_order_value:.2f}")
+    for chunk in read_sql_chunks(ORDER_DETAILS_SQL, conn, ORDER_DETAILS_DTYPES, chunksize=2):
+        print(f"Chunk of {len(chunk)} rows, dtypes: {dict(chunk.dtypes.astype(str))}")
+        break
     
-    # Group by analysis
-    sales_by_category = orders_with_details.groupby('category')['total_amount'].sum()
-    print(f"Sales by category:\n{sales_by_category}")
+    summary = aggregate_chunks(read_sql_chunks(ORDER_DETAILS_SQL, conn, ORDER_DETAILS_DTYPES, chunksize=2),
+                               'username', 'total_amount')
+    sales_summary = summary.rename(columns={'sum': 'total_sales', 'count': 'order_count',
+                                            'mean': 'avg_order_value'}).round(2).reset_index()
+    print(f"Sales summary:\n{sales_summary}")
     
     # Write DataFrame back to database
     print("\n3. Writing DataFrames to Database:")
     
-    # Create new table from DataFrame
-    sales_summary = orders_with_details.groupby('username').agg({
-        'total_amount': ['sum', 'count', 'mean']
-    }).round(2)
-    
-    sales_summary.columns = ['total_sales', 'order_count', 'avg_order_value']
-    sales_summary = sales_summary.reset_index()
-    
-    print(f"Sales summary:\n{sales_summary}")
-    
     # Write to database
-    sales_summary.to_sql('sales_summary', conn, if_exists='replace', index=False)
+    write_frame(sales_summary, conn, 'sales_summary')
     print("✅ Sales summary written to database!")
+    print(pd.read_sql_query('SELECT * FROM sales_summary', conn).dtypes.to_dict())
     
-    conn.close()
+    # Rewriting keeps the table's indexes and the views built on it
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sales_summary_total ON sales_summary(total_sales)')
+    conn.execute('CREATE VIEW IF NOT EXISTS top_customers AS '
+                 'SELECT username FROM sales_summary ORDER BY total_sales DESC LIMIT 2')
+    conn.commit()
+    write_frame(sales_summary.assign(refreshed_at=pd.Timestamp('2024-01-01 09:30', tz='Europe/Berlin')),
+                conn, 'sales_summary')
+    indexes = [row[1] for row in conn.execute("PRAGMA index_list('sales_summary')")]
+    print(f"After a schema change: indexes {indexes}, "
+          f"view top_customers {[row[0] for row in conn.execute('SELECT * FROM top_customers')]}")
+    print(f"Aware timestamp stored as {conn.execute('SELECT refreshed_at FROM sales_summary').fetchone()[0]}")
+    
+    # Nullable extension dtypes go in as NULLs
+    flags = pd.DataFrame({'username': ['alice', 'bob', 'charlie'],
+                          'vip': pd.array([True, None, False], dtype='boolean'),
+                          'visits': pd.array([3, None, 1], dtype='Int64')})
+    write_frame(flags, conn, 'user_flags')
+    print(f"Nullable dtypes: {conn.execute('SELECT * FROM user_flags').fetchall()}")
+    
+    # Pending work on the connection is never committed behind the caller's back
+    conn.execute('UPDATE users SET age = age + 1 WHERE username = ?', ('alice',))
+    try:
+        write_frame(flags, conn, 'user_flags')
+    except sqlite3.ProgrammingError as e:
+        print(f"Inside an open transaction: {e}")
+    conn.rollback()
+    
+    sqlite_pool.release(conn)
+    
+    # Compare peak memory on a larger copy of the schema
+    print("\n4. Bounded Memory at Scale:")
+    
+    rng = random.Random(19)
+    with tempfile.TemporaryDirectory() as work_dir:
+        big_path = os.path.join(work_dir, 'pandas_big.db')
+        big = sqlite_pool.connect(big_path)
+        big.executescript('''
+            CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT, email TEXT, age INTEGER);
+            CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT, price REAL, category TEXT);
+            CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER, product_id INTEGER,
+                                 quantity INTEGER, total_amount REAL, order_date TEXT);
+        ''')
+        big.executemany('INSERT INTO users VALUES (?, ?, ?, ?)',
+                        [(i, f'user{i}', f'user{i}@example.com', rng.randint(18, 80)) for i in range(1, 5_001)])
+        big.executemany('INSERT INTO products VALUES (?, ?, ?, ?)',
+                        [(i, f'Product {i}', round(rng.uniform(5, 500), 2), rng.choice(['Electronics', 'Accessories', 'Books']))
+                         for i in range(1, 501)])
+        big.executemany('INSERT INTO orders VALUES (NULL, ?, ?, ?, ?, ?)',
+                        [(rng.randint(1, 5_000), rng.randint(1, 500), rng.randint(1, 5), round(rng.uniform(5, 2_500), 2),
+                          '2024-01-01') for _ in range(DEMO_ROWS)])
+        big.commit()
+        
+        def full_tables():
+            users_df = pd.read_sql_query('SELECT * FROM users', big)
+            products_df = pd.read_sql_query('SELECT * FROM products', big)
+            orders_df = pd.read_sql_query('SELECT * FROM orders', big)
+            merged = orders_df.merge(users_df, left_on='user_id', right_on='id', how='left') \
+                              .merge(products_df, left_on='product_id', right_on='id', how='left')
+            return merged.groupby('category')['total_amount'].sum()
+        
+        def streamed():
+            return aggregate_chunks(read_sql_chunks(ORDER_DETAILS_SQL, big, ORDER_DETAILS_DTYPES),
+                                    'category', 'total_amount')['sum']
+        
+        full_result, full_peak = peak_memory(full_tables)
+        streamed_result, streamed_peak = peak_memory(streamed)
+        assert (full_result.round(2) == streamed_result.round(2)).all()
+        print(f"Full tables + merge: peak {full_peak / 1e6:6.1f} MB")
+        print(f"SQL join + chunks:   peak {streamed_peak / 1e6:6.1f} MB (same result)")
+        
+        # Write a large summary with to_sql and with write_frame
+        print("\n5. Fast Writes and Atomic Replace:")
+        
+        orders_df = pd.read_sql_query('SELECT * FROM orders', big, dtype={'quantity': 'int32'})
+        orders_df['order_date'] = pd.to_datetime(orders_df['order_date'])
+        
+        start = time.perf_counter()
+        orders_df.to_sql('orders_copy', big, if_exists='replace', index=False)
+        to_sql_time = time.perf_counter() - start
+        start = time.perf_counter()
+        write_frame(orders_df, big, 'orders_copy')
+        write_time = time.perf_counter() - start
+        print(f"to_sql:      {to_sql_time:.2f}s")
+        print(f"write_frame: {write_time:.2f}s for {len(orders_df):,} rows")
+        
+        # A reader polling during replacement only ever sees a complete table
+        seen, done = set(), threading.Event()
+        
+        def reader():
+            conn = sqlite_pool.connect(big_path)
+            while True:
+                finished = done.is_set()
+                seen.add(conn.execute('SELECT COUNT(*) FROM orders_copy').fetchone()[0])
+                if finished:
+                    break
+            sqlite_pool.release(conn)
+        
+        thread = threading.Thread(target=reader)
+        thread.start()
+        write_frame(orders_df.head(1_000), big, 'orders_copy')
+        done.set()
+        thread.join()
+        print(f"Row counts seen by a concurrent reader: {sorted(seen)}")
+        
+        sqlite_pool.close(big_path)
 
 demonstrate_pandas_sql()
 
 # =============================================================================
-# 4. SQLALCHEMY ORM
+# 5. SQLALCHEMY ORM
 # =============================================================================
 
 print("\n🔧 SQLALCHEMY ORM")
 print("-" * 20)
 
+from collections import Counter
+from contextlib import contextmanager
+from sqlalchemy import event
+
+# Same helpers as day 14's capture_statements / repeated_statements
+@contextmanager
+def capture_statements(engine):
+    """Collect the SQL statements run on engine inside the block."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+def repeated_statements(statements, threshold=5):
+    """SELECTs run at least threshold times: the signature of an N+1 loop."""
+    counts = Counter(statement for statement in statements if statement.lstrip().upper().startswith('SELECT'))
+    return [(statement, count) for statement, count in counts.most_common() if count >= threshold]
+
+def order_report(users):
+    """Product names ordered by each user; lazy relationships make this N+1."""
+    return {user.username: [order.product.name for order in user.orders] for user in users}
+
+def test_order_report_query_count_is_bounded():
+    """The eager order report runs two queries however many orders exist (pytest day19_sql_database_operations.py)."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session, selectinload, joinedload
+
+    Base, User, Product, Order = orm_models
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        customers = [User(username=f'customer{i}', email=f'customer{i}@example.com') for i in range(20)]
+        catalog = [Product(name=f'Product {i}', price=1.0) for i in range(5)]
+        session.add_all([Order(user=customers[i % 20], product=catalog[i % 5], quantity=1, total_amount=1.0)
+                         for i in range(300)])
+        session.commit()
+        session.expire_all()
+        with capture_statements(engine) as statements:
+            report = order_report(session.query(User).options(
+                selectinload(User.orders).joinedload(Order.product)).all())
+    engine.dispose()
+    assert sum(len(products) for products in report.values()) == 300
+    assert len(statements) <= 2, repeated_statements(statements, threshold=2)
+
+from sqlalchemy import insert, select
+
+# Rows in the bulk benchmark of demonstrate_sqlalchemy. Set DAY19_BENCHMARK_ROWS=1000000
+# for the full million-row run (about 100 MB of SQLite and a few minutes).
+BENCHMARK_ROWS = int(os.environ.get('DAY19_BENCHMARK_ROWS', 20_000))
+
+class BulkPersistence:
+    """Write and read paths for mapped models that scale past a few thousand rows.
+
+    The ORM unit of work tracks every object (identity map, events, per-row
+    INSERT ... RETURNING), which is right for small edits but slow for loads.
+    Three write paths are offered, from most to least ORM involvement:
+
+    - add_objects: regular session.add, flushed every flush_every objects
+    - bulk_insert: ORM bulk INSERT (session.execute(insert(Model), rows)), no objects
+    - core_insert: Core table.insert() executemany, no ORM at all
+    """
+
+    def __init__(self, engine, batch_size=10_000):
+        self.engine = engine
+        self.batch_size = batch_size
+
+    @staticmethod
+    def _batches(rows, size):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def add_objects(self, session, objects, flush_every=None):
+        """Persist ORM objects, flushing (and expunging) every flush_every of them."""
+        flush_every = flush_every or self.batch_size
+        count = 0
+        for batch in self._batches(objects, flush_every):
+            session.add_all(batch)
+            session.flush()
+            for obj in batch:
+                session.expunge(obj)  # keep the identity map from growing without bound
+            count += len(batch)
+        session.commit()
+        return count
+
+    def bulk_insert(self, session, model, rows):
+        """Insert dicts through the ORM bulk path (executemany, no identity map)."""
+        count = 0
+        for batch in self._batches(rows, self.batch_size):
+            session.execute(insert(model), batch)
+            count += len(batch)
+        session.commit()
+        return count
+
+    def core_insert(self, model, rows):
+        """Insert dicts with Core executemany batches in one transaction.
+
+        Preferred over one huge insert().values([...]) statement: SQLAlchemy
+        compiles that statement fresh for every batch, which costs far more
+        than the insert itself.
+        """
+        table = model.__table__
+        count = 0
+        with self.engine.begin() as conn:
+            for batch in self._batches(rows, self.batch_size):
+                conn.execute(table.insert(), batch)
+                count += len(batch)
+        return count
+
+    @staticmethod
+    def stream(session, statement, yield_per=10_000):
+        """Execute statement, fetching and building results yield_per rows at a time."""
+        return session.execute(statement.execution_options(yield_per=yield_per))
+
 def demonstrate_sqlalchemy():
     """Demonstrate SQLAlchemy ORM."""
     print("SQLAlchemy ORM:")
     
     from sqlalchemy import create_engine, Column, Integer, String, Float, DateTime, ForeignKey
     from sqlalchemy.ext.declarative import declarative_base
-    from sqlalchemy.orm import sessionmaker, relationship
+    from sqlalchemy.orm import sessionmaker, relationship, selectinload, joinedload
     
     # Create engine
     engine = create_engine('sqlite:///sqlalchemy_example.db', echo=False)
@@ -393,14 +900,87 @@ def demonstrate_sqlalchemy():
     user_with_orders = session.query(User).filter_by(username='alice_orm').first()
     print(f"Alice's orders: {len(user_with_orders.orders)}")
     
+    # Reports over relationships
+    print("\n4. Order Report (Lazy vs Eager Loading):")
+    
+    customers = [User(username=f'customer{i}', email=f'customer{i}@example.com', age=20 + i) for i in range(20)]
+    catalog = [Product(name=f'Product {i}', price=10.0 * (i + 1), category='Demo', stock_quantity=100) for i in range(5)]
+    session.add_all(customers + catalog)
+    session.add_all([Order(user=customers[i % 20], product=catalog[i % 5], quantity=1,
+                           total_amount=catalog[i % 5].price) for i in range(100)])
+    session.commit()
+    
+    session.expire_all()
+    with capture_statements(engine) as statements:
+        lazy_report = order_report(session.query(User).all())
+    print(f"Lazy relationships: {len(statements)} queries for {len(lazy_report)} users")
+    for statement, count in repeated_statements(statements):
+        print(f"  N+1: {count} x {' '.join(statement.split())[:60]}...")
+    
+    session.expire_all()
+    with capture_statements(engine) as statements:
+        users = session.query(User).options(selectinload(User.orders).joinedload(Order.product)).all()
+        eager_report = order_report(users)
+    print(f"selectinload(User.orders).joinedload(Order.product): {len(statements)} queries")
+    print(f"Same report: {eager_report == lazy_report} (query budget: test_order_report_query_count_is_bounded)")
+    
     # Close session
     session.close()
     print("✅ Session closed!")
-
-demonstrate_sqlalchemy()
+    
+    # Loading and scanning BENCHMARK_ROWS orders
+    print("\n5. Bulk Persistence Benchmark:")
+    
+    with tempfile.TemporaryDirectory() as work_dir:
+        bench_engine = create_engine(f"sqlite:///{os.path.join(work_dir, 'bulk.db')}")
+        Base.metadata.create_all(bench_engine)
+        persistence = BulkPersistence(bench_engine, batch_size=20_000)
+        BenchSession = sessionmaker(bind=bench_engine)
+        order_date = datetime(2024, 1, 1)
+        
+        def order_rows(count, start=0):
+            return ({'user_id': i % 1000 + 1, 'product_id': i % 100 + 1, 'quantity': 1 + i % 3,
+                     'total_amount': 9.99 * (1 + i % 3), 'order_date': order_date}
+                    for i in range(start, start + count))
+        
+        def timed(label, count, load):
+            start = time.perf_counter()
+            load()
+            elapsed = time.perf_counter() - start
+            print(f"{label:38s} {count:>9,} rows  {elapsed:6.2f}s  {count / elapsed:>9,.0f} rows/sec")
+        
+        # The unit of work is measured on a sample; per-row cost is what matters
+        rows = BENCHMARK_ROWS
+        orm_rows = min(50_000, rows // 5)
+        with BenchSession() as bench:
+            timed('ORM add_all + single commit', orm_rows,
+                  lambda: (bench.add_all(Order(**row) for row in order_rows(orm_rows)), bench.commit()))
+        with BenchSession() as bench:
+            timed('ORM add, flush every 5,000', orm_rows,
+                  lambda: persistence.add_objects(bench, (Order(**row) for row in order_rows(orm_rows)), flush_every=5_000))
+        with BenchSession() as bench:
+            timed('ORM bulk insert(Order) executemany', rows, lambda: persistence.bulk_insert(bench, Order, order_rows(rows)))
+        timed('Core table.insert() executemany', rows, lambda: persistence.core_insert(Order, order_rows(rows)))
+        
+        with BenchSession() as bench:
+            start = time.perf_counter()
+            revenue = scanned = 0
+            for (amount,) in persistence.stream(bench, select(Order.total_amount), yield_per=10_000):
+                revenue += amount
+                scanned += 1
+            print(f"Streamed {scanned:,} order totals with yield_per in {time.perf_counter() - start:.2f}s "
+                  f"(revenue ${revenue:,.2f})")
+            start = time.perf_counter()
+            first = persistence.stream(bench, select(Order).order_by(Order.id), yield_per=1_000).scalars().first()
+            print(f"First Order object via yield_per: id={first.id} in {(time.perf_counter() - start) * 1000:.1f} ms")
+        bench_engine.dispose()
+    
+    return Base, User, Product, Order
+
+orm_models = demonstrate_sqlalchemy()
 
 # =============================================================================
-# 5. POSTGRESQL DATABASE OPERATIONS
+# 6. POSTGRESQL DATABASE OPERATIONS
 # =============================================================================
 
 print("\n🐘 POSTGRESQL DATABASE OPERATIONS")
@@ -475,7 +1055,7 @@ def demonstrate_postgresql():
 demonstrate_postgresql()
 
 # =============================================================================
-# 6. MYSQL DATABASE OPERATIONS
+# 7. MYSQL DATABASE OPERATIONS
 # =============================================================================
 
 print("\n🐬 MYSQL DATABASE OPERATIONS")
@@ -550,18 +1130,145 @@ def demonstrate_mysql():
 demonstrate_mysql()
 
 # =============================================================================
-# 7. DATABASE TRANSACTIONS AND ERROR HANDLING
+# 8. DATABASE TRANSACTIONS AND ERROR HANDLING
 # =============================================================================
 
 print("\n🔄 DATABASE TRANSACTIONS AND ERROR HANDLING")
 print("-" * 50)
 
+class InsufficientFunds(ValueError):
+    """Raised when the sender's balance does not cover a transfer."""
+
+class TransferService:
+    """Money transfers that stay correct under concurrent callers.
+
+    Each transaction starts with BEGIN IMMEDIATE, so the write lock is taken
+    up front instead of failing on the first UPDATE, and is retried with
+    exponential backoff while the database is busy. The debit is a single
+    conditional UPDATE ... WHERE balance >= ?, so there is no read-then-write
+    window for another transfer to slip through.
+
+    Transfers run on the service's own connections (one per thread), never on
+    the caller's, so a transaction the caller has open is left alone. Their
+    busy_timeout is short, so a locked database comes back as "database is
+    locked" almost at once and the backoff here decides how long to wait.
+    """
+
+    def __init__(self, path, max_retries=10, base_delay=0.002, busy_timeout_ms=1):
+        self.path = path
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.retries = 0
+        self._lock = threading.Lock()
+        self._pool = SQLitePool({**SQLITE_PRAGMAS, 'busy_timeout': busy_timeout_ms})
+
+    def close(self):
+        self._pool.close_all()
+
+    def _run(self, work):
+        """Run work(conn) in an IMMEDIATE transaction, retrying on busy/locked."""
+        conn = self._pool.connect(self.path)
+        try:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    conn.execute('BEGIN IMMEDIATE')
+                except sqlite3.OperationalError as e:
+                    if 'locked' not in str(e) and 'busy' not in str(e) or attempt == self.max_retries:
+                        raise
+                    with self._lock:
+                        self.retries += 1
+                    time.sleep(self.base_delay * 2 ** attempt * random.uniform(0.5, 1.5))
+                    continue
+                try:
+                    result = work(conn)
+                    conn.commit()
+                    return result
+                except BaseException:
+                    conn.rollback()
+                    raise
+        finally:
+            self._pool.release(conn)
+
+    @staticmethod
+    def _apply(conn, from_account, to_account, amount):
+        if amount <= 0:
+            raise ValueError(f"Transfer amount must be positive, got {amount}")
+        debit = conn.execute(
+            'UPDATE accounts SET balance = balance - ? WHERE name = ? AND balance >= ?',
+            (amount, from_account, amount)
+        )
+        if debit.rowcount != 1:
+            row = conn.execute('SELECT balance FROM accounts WHERE name = ?', (from_account,)).fetchone()
+            if row is None:
+                raise LookupError(f"Unknown account: {from_account}")
+            raise InsufficientFunds(f"Insufficient balance. Available: {row[0]}")
+        credit = conn.execute('UPDATE accounts SET balance = balance + ? WHERE name = ?', (amount, to_account))
+        if credit.rowcount != 1:
+            raise LookupError(f"Unknown account: {to_account}")
+
+    def transfer(self, from_account, to_account, amount):
+        """Move amount between two accounts in its own transaction."""
+        self._run(lambda conn: self._apply(conn, from_account, to_account, amount))
+
+    def transfer_batch(self, transfers):
+        """Apply many (from, to, amount) transfers in one transaction.
+
+        Each transfer runs under its own SAVEPOINT, so a rejected one is undone
+        without aborting the rest. Returns (applied, rejected) counts.
+        """
+        def work(conn):
+            applied = rejected = 0
+            for from_account, to_account, amount in transfers:
+                conn.execute('SAVEPOINT transfer')
+                try:
+                    self._apply(conn, from_account, to_account, amount)
+                    applied += 1
+                except (InsufficientFunds, LookupError, ValueError):
+                    conn.execute('ROLLBACK TO transfer')
+                    rejected += 1
+                conn.execute('RELEASE transfer')
+            return applied, rejected
+
+        return self._run(work)
+
+def stress_test_transfers(service, accounts, threads=8, transfers_per_thread=500, batch_size=None):
+    """Hammer service from several threads; return (transfers/sec, rejected)."""
+    rejected = [0] * threads
+    start_together = threading.Barrier(threads)
+
+    def worker(index):
+        rng = random.Random(index)
+        pending = []
+        start_together.wait()
+        for _ in range(transfers_per_thread):
+            from_account, to_account = rng.sample(accounts, 2)
+            pending.append((from_account, to_account, rng.randint(1, 200)))
+            if batch_size is None:
+                try:
+                    service.transfer(*pending.pop())
+                except InsufficientFunds:
+                    rejected[index] += 1
+            elif len(pending) == batch_size:
+                rejected[index] += service.transfer_batch(pending)[1]
+                pending = []
+        if pending:
+            rejected[index] += service.transfer_batch(pending)[1]
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return threads * transfers_per_thread / elapsed, sum(rejected)
+
 def demonstrate_transactions():
     """Demonstrate database transactions and error handling."""
     print("Database Transactions and Error Handling:")
     
     # Create connection
-    conn = sqlite3.connect('transactions_example.db')
+    conn = sqlite_pool.connect('transactions_example.db')
     cursor = conn.cursor()
     
     # Create table
@@ -581,41 +1288,15 @@ def demonstrate_transactions():
     
     print("✅ Sample data inserted!")
     
+    service = TransferService('transactions_example.db')
+    
     # Transaction example: Money transfer
     def transfer_money(from_account, to_account, amount):
         """Transfer money between accounts with transaction."""
         try:
-            # Start transaction
-            conn.execute('BEGIN TRANSACTION')
-            
-            # Check if sender has enough balance
-            cursor.execute('SELECT balance FROM accounts WHERE name = ?', (from_account,))
-            sender_balance = cursor.fetchone()[0]
-            
-            if sender_balance < amount:
-                raise ValueError(f"Insufficient balance. Available: {sender_balance}")
-            
-            # Deduct from sender
-            cursor.execute('''
-                UPDATE accounts 
-                SET balance = balance - ? 
-                WHERE name = ?
-            ''', (amount, from_account))
-            
-            # Add to receiver
-            cursor.execute('''
-                UPDATE accounts 
-                SET balance = balance + ? 
-                WHERE name = ?
-            ''', (amount, to_account))
-            
-            # Commit transaction
-            conn.commit()
+            service.transfer(from_account, to_account, amount)
             print(f"✅ Transfer successful: ${amount} from {from_account} to {to_account}")
-            
         except Exception as e:
-            # Rollback transaction
-            conn.rollback()
             print(f"❌ Transfer failed: {e}")
             raise
     
@@ -640,14 +1321,52 @@ def demonstrate_transactions():
     balances = cursor.fetchall()
     print(f"Account balances after failed transfer: {balances}")
     
-    # Close connection
-    conn.close()
-    print("✅ Connection closed!")
+    # Batch mode: one transaction, one savepoint per transfer
+    print("\n3. Batch Transfers:")
+    applied, rejected = service.transfer_batch([
+        ('Alice', 'Bob', 50.00), ('Bob', 'Alice', 25.00), ('Alice', 'Bob', 5000.00), ('Bob', 'Carol', 10.00)
+    ])
+    cursor.execute('SELECT name, balance FROM accounts ORDER BY name')
+    print(f"Applied {applied}, rejected {rejected}; balances: {cursor.fetchall()}")
+    
+    # A transfer never commits (or trips over) the caller's open transaction
+    cursor.execute("UPDATE accounts SET name = 'Robert' WHERE name = 'Bob'")
+    try:
+        service.transfer('Alice', 'Bob', 1.00)
+    except sqlite3.OperationalError as e:
+        print(f"Transfer while this connection holds the write lock: {e} (after {service.retries} retries)")
+    conn.rollback()
+    service.close()
+    
+    # Return the connection to the pool
+    sqlite_pool.release(conn)
+    print("✅ Connection released!")
+    
+    # Many threads moving money between a shared set of accounts
+    print("\n4. Concurrent Stress Test:")
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, 'transfers.db')
+        accounts = [f'account{i}' for i in range(20)]
+        setup = sqlite_pool.connect(path)
+        setup.execute('CREATE TABLE accounts (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, balance INTEGER NOT NULL)')
+        setup.executemany('INSERT INTO accounts (name, balance) VALUES (?, 1000)', [(name,) for name in accounts])
+        setup.commit()
+        
+        stress_service = TransferService(path)
+        for label, batch_size in [('one per transaction', None), ('batches of 50', 50)]:
+            rate, rejected = stress_test_transfers(stress_service, accounts, batch_size=batch_size)
+            total, lowest = setup.execute('SELECT SUM(balance), MIN(balance) FROM accounts').fetchone()
+            assert total == 1000 * len(accounts), f"Money was created or destroyed: {total}"
+            assert lowest >= 0, f"Negative balance: {lowest}"
+            print(f"{label:20s}: {rate:8,.0f} transfers/sec, {rejected} rejected, total balance {total} (conserved)")
+        print(f"Busy retries: {stress_service.retries} (busy_timeout 1 ms, so contention is handled by backoff)")
+        stress_service.close()
+        sqlite_pool.close(path)
 
 demonstrate_transactions()
 
 # =============================================================================
-# 8. DATABASE DESIGN AND RELATIONSHIPS
+# 9. DATABASE DESIGN AND RELATIONSHIPS
 # =============================================================================
 
 print("\n🏗️ DATABASE DESIGN AND RELATIONSHIPS")
@@ -658,7 +1377,7 @@ def demonstrate_database_design():
     print("Database Design and Relationships:")
     
     # Create connection
-    conn = sqlite3.connect('design_example.db')
+    conn = sqlite_pool.connect('design_example.db')
     cursor = conn.cursor()
     
     # Create normalized database schema
@@ -817,14 +1536,1341 @@ def demonstrate_database_design():
     for row in sales_summary:
         print(f"  {row[0]}: {row[1]} items, {row[2]} quantity, ${row[3]:.2f} revenue")
     
-    # Close connection
-    conn.close()
-    print("\n✅ Connection closed!")
+    # Return the connection to the pool
+    sqlite_pool.release(conn)
+    print("\n✅ Connection released!")
 
 demonstrate_database_design()
 
 # =============================================================================
-# 9. EXERCISES
+# 10. BULK LOADING
+# =============================================================================
+
+print("\n🚚 BULK LOADING")
+print("-" * 16)
+
+import csv
+import itertools
+import random
+
+CHECKPOINT_TABLE = 'bulk_load_checkpoints'
+
+class BulkLoader:
+    """Stream rows into a SQLite table in large transactions with resumable checkpoints.
+
+    Each batch commits together with its checkpoint row, so after a failure
+    a new load with the same source_id skips exactly the rows already stored.
+    With rebuild_indexes=True the table's non-unique indexes are dropped for
+    the load and recreated once at the end (a resumed load still rebuilds them).
+    """
+
+    def __init__(self, conn, table, columns, batch_size=50_000, rebuild_indexes=False,
+                 conflict='IGNORE', on_progress=None):
+        self.conn = conn
+        self.table = table
+        self.batch_size = batch_size
+        self.rebuild_indexes = rebuild_indexes
+        self.on_progress = on_progress
+        placeholders = ', '.join('?' * len(columns))
+        self.insert_sql = f"INSERT OR {conflict} INTO {table} ({', '.join(columns)}) VALUES ({placeholders})"
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+                source TEXT PRIMARY KEY,
+                table_name TEXT NOT NULL,
+                rows_done INTEGER NOT NULL,
+                dropped_indexes TEXT,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        conn.commit()
+
+    def checkpoint(self, source_id):
+        """Return (rows already loaded, index definitions dropped) for source_id."""
+        row = self.conn.execute(f'SELECT rows_done, dropped_indexes FROM {CHECKPOINT_TABLE} WHERE source = ?',
+                                (source_id,)).fetchone()
+        return (row[0], json.loads(row[1] or '[]')) if row else (0, [])
+
+    def reset(self, source_id):
+        self.conn.execute(f'DELETE FROM {CHECKPOINT_TABLE} WHERE source = ?', (source_id,))
+        self.conn.commit()
+
+    def _save_checkpoint(self, source_id, rows_done, dropped):
+        self.conn.execute(f'''
+            INSERT OR REPLACE INTO {CHECKPOINT_TABLE} (source, table_name, rows_done, dropped_indexes, updated_at)
+            VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ''', (source_id, self.table, rows_done, json.dumps(dropped)))
+
+    def _drop_indexes(self):
+        indexes = self.conn.execute('''
+            SELECT name, sql FROM sqlite_master
+            WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%'
+        ''', (self.table,)).fetchall()
+        for name, _ in indexes:
+            self.conn.execute(f'DROP INDEX {name}')
+        return [sql for _, sql in indexes]
+
+    def load(self, rows, source_id):
+        """Insert rows (tuples in column order) and return load statistics.
+
+        Each batch is its own transaction, so the connection must not be in one.
+        """
+        conn = self.conn
+        if conn.in_transaction:
+            raise sqlite3.ProgrammingError("BulkLoader.load() needs a connection with no open transaction; "
+                                           "commit or roll back first")
+        done, dropped = self.checkpoint(source_id)
+        rows = iter(rows)
+        skipped = sum(1 for _ in itertools.islice(rows, done))
+        loaded = 0
+        start = time.perf_counter()
+        try:
+            if self.rebuild_indexes and not dropped:
+                conn.execute('BEGIN IMMEDIATE')
+                dropped = self._drop_indexes()
+                self._save_checkpoint(source_id, done, dropped)
+                conn.commit()
+
+            while True:
+                batch = list(itertools.islice(rows, self.batch_size))
+                if not batch:
+                    break
+                conn.execute('BEGIN IMMEDIATE')
+                conn.executemany(self.insert_sql, batch)
+                done += len(batch)
+                loaded += len(batch)
+                self._save_checkpoint(source_id, done, dropped)
+                conn.commit()
+                if self.on_progress:
+                    self.on_progress(done, loaded / (time.perf_counter() - start))
+
+            rebuilt = len(dropped)
+            if dropped:
+                conn.execute('BEGIN IMMEDIATE')
+                for sql in dropped:
+                    conn.execute(sql)
+                self._save_checkpoint(source_id, done, [])
+                conn.commit()
+        except BaseException:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+
+        elapsed = time.perf_counter() - start
+        return {'loaded': loaded, 'skipped': skipped, 'total': done, 'indexes_rebuilt': rebuilt,
+                'seconds': elapsed, 'rows_per_sec': loaded / elapsed if elapsed else 0.0}
+
+def read_csv_rows(path, columns):
+    """Stream tuples in columns order from a CSV file with a header row."""
+    with open(path, newline='') as source:
+        reader = csv.reader(source)
+        header = next(reader)
+        positions = [header.index(column) for column in columns]
+        for record in reader:
+            yield tuple(record[i] for i in positions)
+
+def read_arrow_rows(path, columns):
+    """Stream tuples from an Arrow IPC stream file one record batch at a time (needs pyarrow)."""
+    import pyarrow as pa
+    with pa.OSFile(path, 'rb') as source:
+        for batch in pa.ipc.open_stream(source):
+            yield from zip(*(batch.column(name).to_pylist() for name in columns))
+
+def demonstrate_bulk_loading():
+    """Demonstrate batched, checkpointed loads from CSV and Arrow streams."""
+    print("Bulk Loading:")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, 'bulk.db')
+        conn = sqlite_pool.connect(db_path)
+        conn.executescript('''
+            CREATE TABLE users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                age INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE orders (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                product_id INTEGER,
+                quantity INTEGER,
+                total_amount DECIMAL(10, 2),
+                order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id),
+                FOREIGN KEY (product_id) REFERENCES products (id)
+            );
+            CREATE INDEX idx_orders_user_id ON orders (user_id);
+            CREATE INDEX idx_orders_product_id ON orders (product_id);
+        ''')
+
+        # Source files
+        rng = random.Random(42)
+        n_orders = DEMO_ROWS
+        n_users = n_orders // 3
+        row_at_a_time = min(5_000, n_users)
+        users_csv = os.path.join(work_dir, 'users.csv')
+        with open(users_csv, 'w', newline='') as target:
+            writer = csv.writer(target)
+            writer.writerow(['username', 'email', 'age'])
+            writer.writerows((f'user{i}', f'user{i}@example.com', rng.randint(18, 80)) for i in range(n_users))
+        orders_csv = os.path.join(work_dir, 'orders.csv')
+        with open(orders_csv, 'w', newline='') as target:
+            writer = csv.writer(target)
+            writer.writerow(['user_id', 'product_id', 'quantity', 'total_amount'])
+            writer.writerows((rng.randint(1, n_users), rng.randint(1, 500), q, round(q * rng.uniform(5, 500), 2))
+                             for q in (rng.randint(1, 5) for _ in range(n_orders)))
+        user_columns = ['username', 'email', 'age']
+        order_columns = ['user_id', 'product_id', 'quantity', 'total_amount']
+
+        # 1. One commit per row (what small scripts do)
+        print(f"\n1. Row-at-a-Time Commits (first {row_at_a_time:,} users):")
+        start = time.perf_counter()
+        for row in itertools.islice(read_csv_rows(users_csv, user_columns), row_at_a_time):
+            conn.execute('INSERT OR IGNORE INTO users (username, email, age) VALUES (?, ?, ?)', row)
+            conn.commit()
+        print(f"  {row_at_a_time / (time.perf_counter() - start):,.0f} rows/sec")
+        conn.execute('DELETE FROM users')
+        conn.commit()
+
+        # 2. Batched load with progress
+        print("\n2. Batched Load of users.csv:")
+        loader = BulkLoader(conn, 'users', user_columns, batch_size=max(1, n_users // 4),
+                            on_progress=lambda done, rate: print(f"  {done:>9,} rows  {rate:>9,.0f} rows/sec"))
+        stats = loader.load(read_csv_rows(users_csv, user_columns), source_id='users.csv')
+        print(f"  Loaded {stats['loaded']:,} rows in {stats['seconds']:.2f}s")
+
+        # 3. Keeping vs rebuilding indexes
+        print(f"\n3. {n_orders:,} Orders, Indexes Kept vs Rebuilt:")
+        for rebuild in (False, True):
+            conn.execute('DELETE FROM orders')
+            conn.commit()
+            loader = BulkLoader(conn, 'orders', order_columns, batch_size=max(1, n_orders // 6), rebuild_indexes=rebuild)
+            loader.reset('orders.csv')
+            stats = loader.load(read_csv_rows(orders_csv, order_columns), source_id='orders.csv')
+            label = 'drop + rebuild indexes' if rebuild else 'indexes kept'
+            print(f"  {label:<24} {stats['seconds']:.2f}s ({stats['rows_per_sec']:,.0f} rows/sec, "
+                  f"{stats['indexes_rebuilt']} indexes rebuilt)")
+
+        # 4. Resume after a failure
+        print("\n4. Resuming an Interrupted Load:")
+        conn.execute('DELETE FROM orders')
+        conn.commit()
+        loader = BulkLoader(conn, 'orders', order_columns, batch_size=max(1, n_orders // 6), rebuild_indexes=True)
+        loader.reset('orders.csv')
+
+        def failing_rows(rows, fail_after):
+            for i, row in enumerate(rows):
+                if i == fail_after:
+                    raise IOError("connection to the file server lost")
+                yield row
+
+        try:
+            loader.load(failing_rows(read_csv_rows(orders_csv, order_columns), n_orders * 5 // 12),
+                        source_id='orders.csv')
+        except IOError as e:
+            done, dropped = loader.checkpoint('orders.csv')
+            print(f"  Load failed ({e}); checkpoint: {done:,} rows, {len(dropped)} indexes to rebuild")
+        stats = loader.load(read_csv_rows(orders_csv, order_columns), source_id='orders.csv')
+        count = conn.execute('SELECT COUNT(*) FROM orders').fetchone()[0]
+        indexes = conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'index' AND tbl_name = 'orders'").fetchone()[0]
+        print(f"  Resumed: skipped {stats['skipped']:,}, loaded {stats['loaded']:,}; "
+              f"table has {count:,} rows and {indexes} indexes")
+
+        # 5. Arrow input
+        print("\n5. Arrow IPC Stream:")
+        try:
+            import pyarrow as pa
+        except ImportError:
+            print("  pyarrow not installed; read_arrow_rows(path, columns) streams record batches")
+        else:
+            arrow_path = os.path.join(work_dir, 'orders.arrow')
+            schema = pa.schema([('user_id', pa.int64()), ('product_id', pa.int64()),
+                                ('quantity', pa.int64()), ('total_amount', pa.float64())])
+            with pa.OSFile(arrow_path, 'wb') as sink, pa.ipc.new_stream(sink, schema) as writer:
+                for chunk in range(6):
+                    n = n_orders // 6
+                    writer.write_batch(pa.record_batch([
+                        pa.array([rng.randint(1, n_users) for _ in range(n)]),
+                        pa.array([rng.randint(1, 500) for _ in range(n)]),
+                        pa.array([1] * n),
+                        pa.array([9.99] * n),
+                    ], schema=schema))
+            loader = BulkLoader(conn, 'orders', order_columns, batch_size=max(1, n_orders // 6), rebuild_indexes=True)
+            stats = loader.load(read_arrow_rows(arrow_path, order_columns), source_id='orders.arrow')
+            print(f"  Loaded {stats['loaded']:,} rows from Arrow at {stats['rows_per_sec']:,.0f} rows/sec")
+
+        sqlite_pool.close(db_path)
+
+demonstrate_bulk_loading()
+
+# =============================================================================
+# 11. INDEX ADVISOR
+# =============================================================================
+
+print("\n🧭 INDEX ADVISOR")
+print("-" * 17)
+
+import re
+from contextlib import contextmanager
+
+SQL_KEYWORDS = {'ON', 'WHERE', 'JOIN', 'LEFT', 'RIGHT', 'INNER', 'OUTER', 'CROSS', 'GROUP', 'ORDER', 'LIMIT', 'USING', 'AS'}
+
+def is_full_scan(detail):
+    """True for a plain 'SCAN t' plan step (no index at all)."""
+    return detail.startswith('SCAN ') and ' USING ' not in detail and '(' not in detail
+
+class IndexAdvisor:
+    """Capture a workload's SELECTs, flag full scans and temp B-trees, and propose indexes.
+
+    Proposals are tried "what-if" style: candidate indexes are created inside
+    a transaction, the workload is re-planned, and the transaction is rolled
+    back, so nothing changes until apply() is called.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.workload = []
+
+    @contextmanager
+    def capture(self):
+        """Record every distinct SELECT executed on the connection inside the block."""
+        def record(sql):
+            if sql.lstrip().upper().startswith('SELECT') and sql not in self.workload:
+                self.workload.append(sql)
+
+        self.conn.set_trace_callback(record)
+        try:
+            yield self
+        finally:
+            self.conn.set_trace_callback(None)
+
+    def plan(self, sql):
+        return [row[3] for row in self.conn.execute('EXPLAIN QUERY PLAN ' + sql)]
+
+    def issues(self, sql):
+        return [detail for detail in self.plan(sql) if is_full_scan(detail) or 'TEMP B-TREE' in detail]
+
+    def _columns(self, table):
+        return {row[1] for row in self.conn.execute(f'PRAGMA table_info({table})')}
+
+    def _indexed(self, table, column):
+        """True if some index on table starts with column."""
+        for index in self.conn.execute(f'PRAGMA index_list({table})').fetchall():
+            first = self.conn.execute(f'PRAGMA index_info({index[1]})').fetchone()
+            if first and first[2] == column:
+                return True
+        return False
+
+    def _candidates(self, sql):
+        """Indexes that would remove the full scans / sorts in sql's current plan."""
+        aliases = {}
+        for table, alias in re.findall(r'(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', sql, re.I):
+            aliases[table] = table
+            if alias and alias.upper() not in SQL_KEYWORDS:
+                aliases[alias] = table
+        single_table = len(set(aliases.values())) == 1
+
+        def resolve(alias, column):
+            table = aliases.get(alias) if alias else (next(iter(aliases.values())) if single_table else None)
+            return (table, column) if table and column in self._columns(table) else None
+
+        filters = [resolve(alias, column) for alias, column in
+                   re.findall(r"(?:(\w+)\.)?(\w+)\s*=\s*(?:\?|'[^']*'|-?\d)", sql)]
+        joins = []
+        for left_alias, left, right_alias, right in re.findall(r'(\w+)\.(\w+)\s*=\s*(\w+)\.(\w+)', sql):
+            joins += [resolve(left_alias, left), resolve(right_alias, right)]
+        order = re.search(r'ORDER BY\s+(.+?)(?:\s+LIMIT|$)', sql, re.I | re.S)
+        order_columns = [resolve(alias, column) for alias, column in
+                         re.findall(r'(?:(\w+)\.)?(\w+)(?:\s+(?:ASC|DESC))?', order.group(1))] if order else []
+
+        candidates = []
+        for detail in self.plan(sql):
+            if is_full_scan(detail):
+                table = aliases.get(detail.split()[1])
+                if table is None:
+                    continue
+                columns = [found[1] for found in filters if found and found[0] == table]
+                if not columns:
+                    # Nothing to filter this table on: index the unindexed foreign-key
+                    # join columns so the planner can drive the join from another table.
+                    candidates += [(fk_table, (column,)) for fk_table, column in dict.fromkeys(
+                        found for found in joins if found and found[1] != 'id' and not self._indexed(*found))]
+                    continue
+                if single_table:
+                    columns += [found[1] for found in order_columns if found and found[1] not in columns]
+                if columns:
+                    candidates.append((table, tuple(dict.fromkeys(columns))))
+            elif 'TEMP B-TREE FOR ORDER BY' in detail and single_table and order_columns and all(order_columns):
+                table = order_columns[0][0]
+                columns = [found[1] for found in filters if found] + [found[1] for found in order_columns]
+                candidates.append((table, tuple(dict.fromkeys(columns))))
+        return candidates
+
+    def advise(self, max_rounds=4):
+        """Return CREATE INDEX statements that improve the captured workload's plans.
+
+        The what-if indexes live in a savepoint that is rolled back, so a
+        transaction the caller has open is neither committed nor disturbed.
+        """
+        proposals = []
+        self.conn.execute('SAVEPOINT index_advisor')
+        try:
+            for _ in range(max_rounds):
+                new = []
+                for sql in self.workload:
+                    for table, columns in self._candidates(sql):
+                        name = f"idx_{table}_{'_'.join(columns)}"
+                        statement = f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+                        if statement not in proposals and statement not in new:
+                            new.append(statement)
+                if not new:
+                    break
+                for statement in new:
+                    self.conn.execute(statement)  # what-if: re-plan with the index present
+                proposals += new
+        finally:
+            self.conn.execute('ROLLBACK TO index_advisor')
+            self.conn.execute('RELEASE index_advisor')
+        return proposals
+
+    def apply(self, statements):
+        for statement in statements:
+            self.conn.execute(statement)
+        self.conn.execute('ANALYZE')
+        self.conn.commit()
+
+    def benchmark(self, repeat=5):
+        """Best-of-repeat seconds for each captured query."""
+        timings = {}
+        for sql in self.workload:
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                self.conn.execute(sql).fetchall()
+                best = min(best, time.perf_counter() - start)
+            timings[sql] = best
+        return timings
+
+def demonstrate_index_advisor():
+    """Demonstrate capturing the day19 queries, advising indexes and verifying them."""
+    print("Index Advisor:")
+
+    rng = random.Random(7)
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, 'advisor.db')
+        conn = sqlite_pool.connect(db_path)
+        conn.executescript('''
+            CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE NOT NULL,
+                                email TEXT UNIQUE NOT NULL, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+            CREATE TABLE categories (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL, description TEXT);
+            CREATE TABLE products (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, price DECIMAL(10, 2),
+                                   category_id INTEGER, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                                   FOREIGN KEY (category_id) REFERENCES categories (id));
+            CREATE TABLE orders (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER,
+                                 order_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP, status TEXT DEFAULT 'pending',
+                                 FOREIGN KEY (user_id) REFERENCES users (id));
+            CREATE TABLE order_items (id INTEGER PRIMARY KEY AUTOINCREMENT, order_id INTEGER, product_id INTEGER,
+                                      quantity INTEGER, price DECIMAL(10, 2),
+                                      FOREIGN KEY (order_id) REFERENCES orders (id),
+                                      FOREIGN KEY (product_id) REFERENCES products (id));
+        ''')
+        n_items = DEMO_ROWS
+        n_orders, n_users = n_items // 3, n_items // 15
+        conn.executemany('INSERT INTO users (username, email) VALUES (?, ?)',
+                         [(f'user{i}', f'user{i}@example.com') for i in range(n_users)])
+        conn.executemany('INSERT INTO categories (name) VALUES (?)', [(f'Category {i}',) for i in range(10)])
+        conn.executemany('INSERT INTO products (name, price, category_id) VALUES (?, ?, ?)',
+                         [(f'Product {i}', round(rng.uniform(5, 500), 2), rng.randint(1, 10)) for i in range(2_000)])
+        conn.executemany('INSERT INTO orders (user_id, order_date, status) VALUES (?, ?, ?)',
+                         [(rng.randint(1, n_users), f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+                           rng.choice(['pending', 'shipped', 'completed'])) for _ in range(n_orders)])
+        conn.executemany('INSERT INTO order_items (order_id, product_id, quantity, price) VALUES (?, ?, ?, ?)',
+                         [(rng.randint(1, n_orders), rng.randint(1, 2_000), rng.randint(1, 3), 9.99)
+                          for _ in range(n_items)])
+        conn.commit()
+
+        # 1. Capture the application's queries
+        advisor = IndexAdvisor(conn)
+        with advisor.capture():
+            conn.execute('''
+                SELECT u.username, o.order_date, o.status, p.name, oi.quantity, oi.price
+                FROM users u
+                JOIN orders o ON u.id = o.user_id
+                JOIN order_items oi ON o.id = oi.order_id
+                JOIN products p ON oi.product_id = p.id
+                WHERE u.username = ?
+                ORDER BY o.order_date
+            ''', ('user42',)).fetchall()
+            conn.execute('SELECT oi.order_id, oi.quantity FROM order_items oi WHERE oi.product_id = ?', (17,)).fetchall()
+            conn.execute("SELECT id, user_id, order_date FROM orders WHERE status = ? ORDER BY order_date DESC LIMIT 20",
+                         ('pending',)).fetchall()
+            conn.execute('''
+                SELECT c.name, COUNT(oi.id), SUM(oi.quantity), SUM(oi.price * oi.quantity)
+                FROM categories c
+                JOIN products p ON c.id = p.category_id
+                JOIN order_items oi ON p.id = oi.product_id
+                GROUP BY c.name
+            ''').fetchall()
+        print(f"\n1. Captured {len(advisor.workload)} queries; plan problems:")
+        for i, sql in enumerate(advisor.workload, 1):
+            print(f"  Q{i}: {advisor.issues(sql) or 'none'}")
+
+        # 2. Proposals
+        print("\n2. Proposed Indexes:")
+        conn.execute("UPDATE orders SET status = 'cancelled' WHERE id = 1")  # caller's uncommitted work
+        proposals = advisor.advise()
+        for statement in proposals:
+            print(f"  {statement};")
+        print(f"  Caller's transaction still open after advise(): {conn.in_transaction}")
+        conn.rollback()
+
+        # 3. Apply and re-run the workload
+        print("\n3. Verification:")
+        before = advisor.benchmark()
+        advisor.apply(proposals)
+        after = advisor.benchmark()
+        for i, sql in enumerate(advisor.workload, 1):
+            print(f"  Q{i}: {before[sql] * 1000:8.2f} ms -> {after[sql] * 1000:7.2f} ms "
+                  f"({before[sql] / after[sql]:,.0f}x)  remaining: {advisor.issues(sql) or 'none'}")
+
+        sqlite_pool.close(db_path)
+
+demonstrate_index_advisor()
+
+# =============================================================================
+# 12. MATERIALIZED AGGREGATES
+# =============================================================================
+
+print("\n🧮 MATERIALIZED AGGREGATES")
+print("-" * 27)
+
+class MaterializedAggregates:
+    """Precomputed dashboard aggregates for the users/products/orders schema.
+
+    Two maintenance strategies are used:
+
+    - mv_category_stats (products per category, priced products, price sum) is
+      kept current by triggers on products; catalogue writes are rare, so
+      paying on write is fine.
+    - mv_user_sales and mv_category_sales are fed by a change log: triggers on
+      orders append +/- deltas to orders_changelog, and refresh() folds in only
+      the entries after the last processed sequence number. Re-categorising or
+      deleting a product logs deltas that move its orders' sales as well, so
+      the tables track the GROUP BY queries in recompute_aggregates.
+
+    NULL keys are not aggregated: products without a category and orders
+    without a user (or whose product has no category) are left out, as in
+    recompute_aggregates. NULL prices and amounts count as 0 in the sums;
+    average price is over priced products only, like AVG().
+
+    Reads are primary-key lookups on the mv_ tables, independent of order volume.
+    """
+
+    SCHEMA = '''
+        CREATE TABLE IF NOT EXISTS mv_state (name TEXT PRIMARY KEY, last_seq INTEGER NOT NULL);
+        CREATE TABLE IF NOT EXISTS mv_category_stats (
+            category TEXT PRIMARY KEY, product_count INTEGER NOT NULL,
+            priced_count INTEGER NOT NULL, price_sum REAL NOT NULL);
+        CREATE TABLE IF NOT EXISTS mv_user_sales (
+            user_id INTEGER PRIMARY KEY, order_count INTEGER NOT NULL, total_sales REAL NOT NULL);
+        CREATE TABLE IF NOT EXISTS mv_category_sales (
+            category TEXT PRIMARY KEY, order_count INTEGER NOT NULL, total_sales REAL NOT NULL);
+        CREATE TABLE IF NOT EXISTS orders_changelog (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, category TEXT,
+            count_delta INTEGER NOT NULL, amount_delta REAL NOT NULL);
+
+        CREATE TRIGGER IF NOT EXISTS mv_products_insert AFTER INSERT ON products BEGIN
+            INSERT INTO mv_category_stats
+            SELECT NEW.category, 1, NEW.price IS NOT NULL, COALESCE(NEW.price, 0) WHERE NEW.category IS NOT NULL
+            ON CONFLICT (category) DO UPDATE SET product_count = product_count + 1,
+                                                 priced_count = priced_count + excluded.priced_count,
+                                                 price_sum = price_sum + excluded.price_sum;
+        END;
+        CREATE TRIGGER IF NOT EXISTS mv_products_delete AFTER DELETE ON products BEGIN
+            UPDATE mv_category_stats SET product_count = product_count - 1,
+                                         priced_count = priced_count - (OLD.price IS NOT NULL),
+                                         price_sum = price_sum - COALESCE(OLD.price, 0)
+            WHERE category = OLD.category;
+            DELETE FROM mv_category_stats WHERE category = OLD.category AND product_count = 0;
+            -- Its orders no longer join to a category
+            INSERT INTO orders_changelog (user_id, category, count_delta, amount_delta)
+            SELECT NULL, OLD.category, -COUNT(*), -COALESCE(SUM(total_amount), 0)
+            FROM orders WHERE product_id = OLD.id HAVING COUNT(*) > 0;
+        END;
+        CREATE TRIGGER IF NOT EXISTS mv_products_update AFTER UPDATE OF category, price ON products BEGIN
+            UPDATE mv_category_stats SET product_count = product_count - 1,
+                                         priced_count = priced_count - (OLD.price IS NOT NULL),
+                                         price_sum = price_sum - COALESCE(OLD.price, 0)
+            WHERE category = OLD.category;
+            DELETE FROM mv_category_stats WHERE category = OLD.category AND product_count = 0;
+            INSERT INTO mv_category_stats
+            SELECT NEW.category, 1, NEW.price IS NOT NULL, COALESCE(NEW.price, 0) WHERE NEW.category IS NOT NULL
+            ON CONFLICT (category) DO UPDATE SET product_count = product_count + 1,
+                                                 priced_count = priced_count + excluded.priced_count,
+                                                 price_sum = price_sum + excluded.price_sum;
+        END;
+        CREATE TRIGGER IF NOT EXISTS mv_products_move_sales AFTER UPDATE OF category ON products
+        WHEN OLD.category IS NOT NEW.category BEGIN
+            -- user_id NULL: only the category totals move
+            INSERT INTO orders_changelog (user_id, category, count_delta, amount_delta)
+            SELECT NULL, OLD.category, -COUNT(*), -COALESCE(SUM(total_amount), 0)
+            FROM orders WHERE product_id = NEW.id HAVING COUNT(*) > 0;
+            INSERT INTO orders_changelog (user_id, category, count_delta, amount_delta)
+            SELECT NULL, NEW.category, COUNT(*), COALESCE(SUM(total_amount), 0)
+            FROM orders WHERE product_id = NEW.id HAVING COUNT(*) > 0;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS mv_orders_insert AFTER INSERT ON orders BEGIN
+            INSERT INTO orders_changelog (user_id, category, count_delta, amount_delta)
+            VALUES (NEW.user_id, (SELECT category FROM products WHERE id = NEW.product_id),
+                    1, COALESCE(NEW.total_amount, 0));
+        END;
+        CREATE TRIGGER IF NOT EXISTS mv_orders_delete AFTER DELETE ON orders BEGIN
+            INSERT INTO orders_changelog (user_id, category, count_delta, amount_delta)
+            VALUES (OLD.user_id, (SELECT category FROM products WHERE id = OLD.product_id),
+                    -1, -COALESCE(OLD.total_amount, 0));
+        END;
+        CREATE TRIGGER IF NOT EXISTS mv_orders_update AFTER UPDATE OF user_id, product_id, total_amount ON orders BEGIN
+            INSERT INTO orders_changelog (user_id, category, count_delta, amount_delta)
+            VALUES (OLD.user_id, (SELECT category FROM products WHERE id = OLD.product_id),
+                    -1, -COALESCE(OLD.total_amount, 0));
+            INSERT INTO orders_changelog (user_id, category, count_delta, amount_delta)
+            VALUES (NEW.user_id, (SELECT category FROM products WHERE id = NEW.product_id),
+                    1, COALESCE(NEW.total_amount, 0));
+        END;
+    '''
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def install(self):
+        """Create the aggregate tables and triggers, then backfill from the base tables."""
+        self.conn.executescript(self.SCHEMA)
+        with self.conn:
+            self.conn.execute('DELETE FROM mv_category_stats')
+            self.conn.execute('''
+                INSERT INTO mv_category_stats
+                SELECT category, COUNT(*), COUNT(price), COALESCE(SUM(price), 0)
+                FROM products WHERE category IS NOT NULL GROUP BY category
+            ''')
+            self.conn.execute('DELETE FROM mv_user_sales')
+            self.conn.execute('DELETE FROM mv_category_sales')
+            self.conn.execute('DELETE FROM orders_changelog')
+            self.conn.execute('''
+                INSERT INTO mv_user_sales
+                SELECT user_id, COUNT(*), COALESCE(SUM(total_amount), 0)
+                FROM orders WHERE user_id IS NOT NULL GROUP BY user_id
+            ''')
+            self.conn.execute('''
+                INSERT INTO mv_category_sales
+                SELECT p.category, COUNT(*), COALESCE(SUM(o.total_amount), 0)
+                FROM orders o JOIN products p ON p.id = o.product_id
+                WHERE p.category IS NOT NULL GROUP BY p.category
+            ''')
+            self.conn.execute("INSERT OR REPLACE INTO mv_state VALUES ('orders', 0)")
+
+    def pending(self):
+        """Number of change-log entries not yet folded into the aggregates."""
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM orders_changelog WHERE seq > (SELECT last_seq FROM mv_state WHERE name = 'orders')"
+        ).fetchone()[0]
+
+    def refresh(self):
+        """Apply only the order changes logged since the last refresh; return how many."""
+        with self.conn:
+            last_seq = self.conn.execute("SELECT last_seq FROM mv_state WHERE name = 'orders'").fetchone()[0]
+            high_seq = self.conn.execute('SELECT COALESCE(MAX(seq), ?) FROM orders_changelog', (last_seq,)).fetchone()[0]
+            if high_seq == last_seq:
+                return 0
+            for table, key in (('mv_user_sales', 'user_id'), ('mv_category_sales', 'category')):
+                # NULL keys are skipped: user_id is a rowid alias, so a NULL
+                # would insert a fresh row instead of conflicting
+                self.conn.execute(f'''
+                    INSERT INTO {table} ({key}, order_count, total_sales)
+                    SELECT {key}, SUM(count_delta), SUM(amount_delta)
+                    FROM orders_changelog WHERE seq > ? AND seq <= ? AND {key} IS NOT NULL
+                    GROUP BY {key}
+                    ON CONFLICT ({key}) DO UPDATE SET order_count = order_count + excluded.order_count,
+                                                      total_sales = total_sales + excluded.total_sales
+                ''', (last_seq, high_seq))
+                self.conn.execute(f'DELETE FROM {table} WHERE order_count = 0')
+            self.conn.execute("UPDATE mv_state SET last_seq = ? WHERE name = 'orders'", (high_seq,))
+            self.conn.execute('DELETE FROM orders_changelog WHERE seq <= ?', (high_seq,))
+        return high_seq - last_seq
+
+    def user_summary(self, user_id):
+        row = self.conn.execute(
+            'SELECT order_count, total_sales FROM mv_user_sales WHERE user_id = ?', (user_id,)
+        ).fetchone()
+        if row is None:
+            return {'order_count': 0, 'total_sales': 0.0, 'avg_order_value': 0.0}
+        return {'order_count': row[0], 'total_sales': round(row[1], 2), 'avg_order_value': round(row[1] / row[0], 2)}
+
+    def category_stats(self):
+        """(category, product count, average price or None if no product is priced)."""
+        return [(category, count, round(price_sum / priced, 2) if priced else None)
+                for category, count, priced, price_sum in self.conn.execute(
+                    'SELECT category, product_count, priced_count, price_sum FROM mv_category_stats ORDER BY category')]
+
+    def category_sales(self):
+        return [(category, count, round(total, 2)) for category, count, total in
+                self.conn.execute('SELECT category, order_count, total_sales FROM mv_category_sales ORDER BY category')]
+
+def recompute_aggregates(conn):
+    """The from-scratch queries the materialized tables replace."""
+    return {
+        'category_stats': [(category, count, round(avg, 2) if avg is not None else None)
+                           for category, count, avg in conn.execute('''
+            SELECT category, COUNT(*), AVG(price) FROM products WHERE category IS NOT NULL
+            GROUP BY category ORDER BY category''')],
+        'category_sales': [(category, count, round(total, 2)) for category, count, total in conn.execute('''
+            SELECT p.category, COUNT(*), COALESCE(SUM(o.total_amount), 0)
+            FROM orders o JOIN products p ON p.id = o.product_id
+            WHERE p.category IS NOT NULL GROUP BY p.category ORDER BY p.category''')],
+        'user_sales': {user_id: (count, round(total, 2)) for user_id, count, total in conn.execute(
+            'SELECT user_id, COUNT(*), COALESCE(SUM(total_amount), 0) FROM orders '
+            'WHERE user_id IS NOT NULL GROUP BY user_id')},
+    }
+
+def demonstrate_materialized_aggregates():
+    """Demonstrate trigger- and change-log-maintained aggregate tables."""
+    print("Materialized Aggregates:")
+
+    rng = random.Random(12)
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, 'aggregates.db')
+        conn = sqlite_pool.connect(db_path)
+        conn.executescript('''
+            CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT UNIQUE NOT NULL);
+            CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT NOT NULL, price REAL, category TEXT);
+            CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER, product_id INTEGER,
+                                 quantity INTEGER, total_amount REAL);
+        ''')
+        categories = ['Electronics', 'Accessories', 'Books', 'Garden', 'Toys']
+        conn.executemany('INSERT INTO users VALUES (?, ?)', [(i, f'user{i}') for i in range(1, 5_001)])
+        conn.executemany('INSERT INTO products VALUES (?, ?, ?, ?)',
+                         [(i, f'Product {i}', round(rng.uniform(5, 500), 2), rng.choice(categories)) for i in range(1, 1_001)])
+
+        def random_orders(count):
+            return [(rng.randint(1, 5_000), rng.randint(1, 1_000), rng.randint(1, 3), round(rng.uniform(5, 1_500), 2))
+                    for _ in range(count)]
+
+        conn.executemany('INSERT INTO orders (user_id, product_id, quantity, total_amount) VALUES (?, ?, ?, ?)',
+                         random_orders(DEMO_ROWS))
+        conn.commit()
+
+        # 1. Install and backfill
+        views = MaterializedAggregates(conn)
+        views.install()
+        print(f"\n1. Installed; category stats: {views.category_stats()}")
+
+        # 2. Serve the dashboard from precomputed tables
+        print("\n2. Dashboard Reads:")
+        start = time.perf_counter()
+        expected = recompute_aggregates(conn)
+        recompute_time = time.perf_counter() - start
+        start = time.perf_counter()
+        dashboard = (views.category_stats(), views.category_sales(), views.user_summary(42))
+        read_time = time.perf_counter() - start
+        print(f"Recompute from orders: {recompute_time * 1000:8.2f} ms")
+        print(f"Materialized tables:   {read_time * 1000:8.2f} ms")
+        print(f"user 42: {dashboard[2]}")
+
+        # 3. New orders only touch the change log until refresh()
+        print("\n3. Incremental Refresh:")
+        conn.executemany('INSERT INTO orders (user_id, product_id, quantity, total_amount) VALUES (?, ?, ?, ?)',
+                         random_orders(2_000))
+        conn.execute('DELETE FROM orders WHERE id IN (SELECT id FROM orders WHERE user_id = 42 LIMIT 1)')
+        conn.execute('UPDATE orders SET total_amount = total_amount + 100 WHERE id = 7')
+        conn.execute("UPDATE products SET category = 'Books' WHERE id = 3")
+        # NULLs: an unpriced product, an uncategorised one, and orders without a user or amount
+        conn.execute("INSERT INTO products VALUES (1001, 'Gift card', NULL, 'Accessories')")
+        conn.execute("INSERT INTO products VALUES (1002, 'Mystery box', 20.0, NULL)")
+        conn.executemany('INSERT INTO orders (user_id, product_id, quantity, total_amount) VALUES (?, ?, ?, ?)',
+                         [(None, 5, 1, 25.0), (42, 1001, 1, None), (7, 1002, 1, 20.0)])
+        conn.commit()
+        print(f"Pending changes: {views.pending()}")
+        start = time.perf_counter()
+        applied = views.refresh()
+        print(f"refresh() applied {applied} deltas in {(time.perf_counter() - start) * 1000:.2f} ms; "
+              f"pending now {views.pending()}")
+
+        # 4. The incremental result matches a full recompute
+        print("\n4. Verification:")
+        expected = recompute_aggregates(conn)
+        user_sales = {user_id: (count, round(total, 2)) for user_id, count, total in
+                      conn.execute('SELECT user_id, order_count, total_sales FROM mv_user_sales')}
+        assert views.category_stats() == expected['category_stats']
+        assert views.category_sales() == expected['category_sales']
+        assert user_sales == expected['user_sales']
+        print("Category stats, category sales and user sales match a full recompute")
+        print(f"Category sales: {views.category_sales()}")
+
+        sqlite_pool.close(db_path)
+
+demonstrate_materialized_aggregates()
+
+# =============================================================================
+# 13. READ/WRITE QUERY ROUTER
+# =============================================================================
+
+print("\n🔀 READ/WRITE QUERY ROUTER")
+print("-" * 27)
+
+import queue
+from concurrent.futures import Future
+
+READ_ONLY_SQL = re.compile(r'^\s*(SELECT|WITH|EXPLAIN|VALUES)\b', re.I)
+# REPLACE( is the string function, not REPLACE INTO
+WRITE_KEYWORDS = re.compile(r'\b(INSERT|UPDATE|DELETE|REPLACE(?!\s*\()|CREATE|DROP|ALTER)\b', re.I)
+# String literals, quoted identifiers and comments, whose text must not be matched
+SQL_QUOTED = re.compile(r"'(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\]|--[^\n]*|/\*.*?\*/", re.S)
+# PRAGMA name / PRAGMA name(arg) reads a value; PRAGMA name = value sets one
+PRAGMA_READ = re.compile(r'^\s*PRAGMA\s+(?:\w+\.)?(\w+)\s*(?:\(|;|$)', re.I)
+PRAGMAS_WITH_SIDE_EFFECTS = {'optimize', 'wal_checkpoint', 'incremental_vacuum', 'shrink_memory'}
+
+def is_read_only(sql):
+    """Whether sql can be sent to a reader (readers are also opened query_only)."""
+    code = SQL_QUOTED.sub(' ', sql)
+    pragma = PRAGMA_READ.match(code)
+    if pragma:
+        return pragma.group(1).lower() not in PRAGMAS_WITH_SIDE_EFFECTS
+    return bool(READ_ONLY_SQL.match(code)) and not WRITE_KEYWORDS.search(code)
+
+class QueryRouter:
+    """Replica-style routing for one SQLite file.
+
+    Reads go to a pool of WAL reader connections that run in parallel. Writes
+    are queued to a single writer thread, which commits whatever has queued up
+    as one transaction (group commit), with a SAVEPOINT per write so one
+    failing statement only fails its own future. Every future is resolved,
+    whatever a statement or the batch raises, so callers never hang.
+    """
+
+    def __init__(self, path, readers=4, max_batch=256, pragmas=SQLITE_PRAGMAS):
+        self.path = path
+        self.max_batch = max_batch
+        self._readers = queue.Queue()
+        for _ in range(readers):
+            conn = sqlite3.connect(path, check_same_thread=False)
+            for name, value in pragmas.items():
+                if name != 'journal_mode':
+                    conn.execute(f'PRAGMA {name} = {value}')
+            conn.execute('PRAGMA query_only = ON')
+            self._readers.put(conn)
+        self._writes = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, args=(pragmas,), daemon=True)
+        self._writer.start()
+
+    def _write_loop(self, pragmas):
+        conn = sqlite3.connect(self.path, isolation_level=None)
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        while True:
+            item = self._writes.get()
+            if item is None:
+                break
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._writes.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._writes.put(None)  # finish this batch, then stop
+                    break
+                batch.append(item)
+            results = []
+            try:
+                conn.execute('BEGIN IMMEDIATE')
+                for sql, params, future in batch:
+                    conn.execute('SAVEPOINT write')
+                    try:
+                        cursor = conn.execute(sql, params)
+                        # A statement that returns rows (RETURNING, a misrouted read) gets them
+                        result = cursor.fetchall() if cursor.description else (cursor.lastrowid, cursor.rowcount)
+                        results.append((future, result, None))
+                    except Exception as e:  # also bad parameters, e.g. OverflowError
+                        conn.execute('ROLLBACK TO write')
+                        results.append((future, None, e))
+                    conn.execute('RELEASE write')
+                conn.execute('COMMIT')
+            except Exception as e:
+                results = [(future, None, e) for _, _, future in batch]
+                try:
+                    if conn.in_transaction:
+                        conn.execute('ROLLBACK')
+                except sqlite3.Error:
+                    pass  # the batch's futures already carry the original error
+            # Resolve only after COMMIT, so a caller who waits can read its own write
+            for future, result, error in results:
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+        conn.close()
+
+    def write(self, sql, params=()):
+        """Queue a write; the Future resolves once committed.
+
+        The result is (lastrowid, rowcount), or the rows for a statement that
+        returns some (e.g. INSERT ... RETURNING).
+        """
+        future = Future()
+        self._writes.put((sql, params, future))
+        return future
+
+    def read(self, sql, params=()):
+        conn = self._readers.get()
+        try:
+            return conn.execute(sql, params).fetchall()
+        finally:
+            self._readers.put(conn)
+
+    def execute(self, sql, params=()):
+        """Route by statement: rows for reads, (lastrowid, rowcount) for writes."""
+        if is_read_only(sql):
+            return self.read(sql, params)
+        return self.write(sql, params).result()
+
+    def session(self):
+        return RouterSession(self)
+
+    def close(self):
+        self._writes.put(None)
+        self._writer.join()
+        while not self._readers.empty():
+            self._readers.get().close()
+
+class RouterSession:
+    """Per-request view of a QueryRouter with read-your-writes consistency.
+
+    Writes return immediately; the session remembers their futures and the
+    next read first waits for them, so the request always sees its own
+    changes without making other requests wait.
+    """
+
+    def __init__(self, router):
+        self.router = router
+        self._pending = []
+
+    def write(self, sql, params=()):
+        future = self.router.write(sql, params)
+        self._pending.append(future)
+        return future
+
+    def flush(self):
+        """Wait until every write made through this session is committed."""
+        results = [future.result() for future in self._pending]
+        self._pending.clear()
+        return results
+
+    def read(self, sql, params=()):
+        self.flush()
+        return self.router.read(sql, params)
+
+    def execute(self, sql, params=()):
+        if is_read_only(sql):
+            return self.read(sql, params)
+        return self.write(sql, params).result()
+
+class SerializedDatabase:
+    """Baseline: every statement goes through one shared connection and lock."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA synchronous = NORMAL')
+        self.lock = threading.Lock()
+
+    def execute(self, sql, params=()):
+        with self.lock:
+            cursor = self.conn.execute(sql, params)
+            result = cursor.fetchall() if cursor.description else (cursor.lastrowid, cursor.rowcount)
+            if self.conn.in_transaction:
+                self.conn.commit()
+            return result
+
+    def close(self):
+        self.conn.close()
+
+def demonstrate_query_router():
+    """Demonstrate routing reads and writes and benchmark mixed workloads."""
+    print("Read/Write Query Router:")
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, 'router.db')
+        setup = sqlite_pool.connect(path)
+        setup.executescript('''
+            CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT UNIQUE NOT NULL);
+            CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER, total_amount REAL);
+            CREATE INDEX idx_orders_user_id ON orders (user_id);
+        ''')
+        setup.executemany('INSERT INTO users VALUES (?, ?)', [(i, f'user{i}') for i in range(1, 2_001)])
+        setup.executemany('INSERT INTO orders (user_id, total_amount) VALUES (?, ?)',
+                          [(i % 2_000 + 1, float(i % 500)) for i in range(DEMO_ROWS)])
+        setup.commit()
+
+        read_sql = '''
+            SELECT u.username, COUNT(o.id), SUM(o.total_amount)
+            FROM users u JOIN orders o ON o.user_id = u.id
+            WHERE u.id BETWEEN ? AND ? GROUP BY u.id
+        '''
+        write_sql = 'INSERT INTO orders (user_id, total_amount) VALUES (?, ?)'
+
+        # 1. Routing and read-your-writes
+        router = QueryRouter(path)
+        print("\n1. Routing:")
+        for sql in (read_sql, write_sql, 'WITH t AS (SELECT 1) SELECT * FROM t', 'UPDATE orders SET total_amount = 0',
+                    "SELECT id FROM users WHERE username = 'delete me'", 'SELECT replace(username, 1, 2) FROM users',
+                    'PRAGMA table_info(orders)', 'PRAGMA wal_checkpoint(TRUNCATE)'):
+            print(f"  {'reader' if is_read_only(sql) else 'writer'} <- {' '.join(sql.split())[:50]}")
+
+        request = router.session()
+        request.write(write_sql, (1, 123.45))
+        request.write(write_sql, (1, 10.00))
+        orders = request.read('SELECT COUNT(*), SUM(total_amount) FROM orders WHERE user_id = ?', (1,))
+        print(f"  Request sees its own writes: user 1 has {orders[0][0]} orders, total {orders[0][1]:.2f}")
+        try:
+            request.execute("INSERT INTO users VALUES (1, 'duplicate')")
+        except sqlite3.IntegrityError as e:
+            print(f"  Failed write reported to its caller only: {e}")
+        try:
+            request.execute(write_sql, (2**70, 1.0))
+        except OverflowError as e:
+            print(f"  Unbindable parameter fails its own write ({e}); "
+                  f"writer still up: {request.execute(write_sql, (1, 1.0))[1]} row inserted")
+
+        # 2. Mixed workloads
+        operations = max(50, DEMO_ROWS // 250)
+        print(f"\n2. 8 Threads x {operations} Operations ({os.cpu_count()} CPU core(s); "
+              f"reads only run in parallel with more):")
+
+        def run(db, read_ratio, threads=8, operations=operations):
+            def worker(seed):
+                rng = random.Random(seed)
+                # One router session per worker: its writes don't block until it reads
+                session = db.session() if isinstance(db, QueryRouter) else None
+                for _ in range(operations):
+                    if rng.random() < read_ratio:
+                        start_id = rng.randint(1, 1_950)
+                        (session or db).execute(read_sql, (start_id, start_id + 50))
+                    else:
+                        params = (rng.randint(1, 2_000), round(rng.uniform(5, 500), 2))
+                        if session:
+                            session.write(write_sql, params)
+                        else:
+                            db.execute(write_sql, params)
+                if session:
+                    session.flush()
+
+            workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+            start = time.perf_counter()
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+            return threads * operations / (time.perf_counter() - start)
+
+        print(f"  {'reads/writes':<14}{'one connection':>16}{'router':>12}")
+        for read_ratio in (0.95, 0.8, 0.5):
+            serialized = SerializedDatabase(path)
+            baseline = run(serialized, read_ratio)
+            serialized.close()
+            routed = run(router, read_ratio)
+            print(f"  {int(read_ratio * 100):>3}/{100 - int(read_ratio * 100):<10}"
+                  f"{baseline:>12,.0f} ops/s{routed:>8,.0f} ops/s")
+
+        router.close()
+        sqlite_pool.close(path)
+
+demonstrate_query_router()
+
+# =============================================================================
+# 14. QUERY RESULT CACHE
+# =============================================================================
+
+print("\n🗃️ QUERY RESULT CACHE")
+print("-" * 22)
+
+from collections import OrderedDict
+from functools import lru_cache
+
+WRITE_ACTIONS = {sqlite3.SQLITE_INSERT, sqlite3.SQLITE_UPDATE, sqlite3.SQLITE_DELETE}
+
+@lru_cache(maxsize=1024)
+def normalize_sql(sql):
+    """Canonical form of a statement: comments dropped, whitespace collapsed,
+    everything outside string literals lower-cased."""
+    parts = re.split(r"('(?:[^']|'')*')", sql)
+    for i in range(0, len(parts), 2):
+        code = re.sub(r'--[^\n]*|/\*.*?\*/', ' ', parts[i], flags=re.S)
+        parts[i] = ' '.join(code.split()).lower()
+    return ''.join(parts).strip().rstrip(';').strip()
+
+class QueryCache:
+    """LRU cache of decoded SELECT results, invalidated per table.
+
+    Rows are stored as a tuple of tuples (no cursor, no sqlite3.Row objects),
+    and each entry remembers the tables it read, so a write to one table drops
+    only the results that depend on it.
+
+    Every invalidation bumps its tables' generation. Read generation(tables)
+    before running a query and pass it to put(): rows read before a write was
+    invalidated are then not cached.
+    """
+
+    def __init__(self, max_entries=256, max_rows=50_000):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self._entries = OrderedDict()    # key -> (rows, tables)
+        self._by_table = {}              # table -> set of keys
+        self._generations = {}           # table -> invalidation count
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.invalidations = 0
+
+    @staticmethod
+    def key(sql, params=()):
+        if isinstance(params, dict):
+            params = tuple(sorted(params.items()))
+        return normalize_sql(sql), tuple(params)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def generation(self, tables):
+        with self._lock:
+            return tuple(self._generations.get(table, 0) for table in sorted(tables))
+
+    def _remove(self, key):
+        # Caller holds the lock
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        for table in entry[1]:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+        return True
+
+    def put(self, key, rows, tables, generation):
+        """Cache rows unless a table in tables was invalidated since generation was read."""
+        if len(rows) > self.max_rows:
+            return
+        with self._lock:
+            if generation != tuple(self._generations.get(table, 0) for table in sorted(tables)):
+                return
+            self._remove(key)
+            self._entries[key] = (tuple(rows), frozenset(tables))
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, tables):
+        """Drop every result that read any of tables; return how many."""
+        with self._lock:
+            dropped = 0
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+                for key in list(self._by_table.get(table, ())):
+                    dropped += self._remove(key)
+            self.invalidations += dropped
+            return dropped
+
+class CachingConnection:
+    """sqlite3 connection wrapper that serves repeated SELECTs from a QueryCache.
+
+    The tables a statement reads or writes are found once per statement by
+    compiling it under an authorizer (triggers included). Writes invalidate
+    their tables immediately and again on commit or rollback; while a
+    transaction has uncommitted writes, reads of those tables bypass the cache.
+    """
+
+    def __init__(self, conn, cache=None):
+        self.conn = conn
+        self.cache = cache or QueryCache()
+        self._tables = {}        # normalized sql -> (tables read, tables written)
+        self._dirty = set()
+
+    def tables(self, sql, params=()):
+        """(tables read, tables written) by sql; params are bound to compile it."""
+        normalized = normalize_sql(sql)
+        if normalized not in self._tables:
+            read, written = set(), set()
+
+            def authorize(action, arg1, arg2, db_name, trigger):
+                if action == sqlite3.SQLITE_READ:
+                    read.add(arg1)
+                elif action in WRITE_ACTIONS:
+                    written.add(arg1)
+                return sqlite3.SQLITE_OK
+
+            self.conn.set_authorizer(authorize)
+            try:
+                self.conn.execute('EXPLAIN ' + sql, params).fetchall()
+            finally:
+                self.conn.set_authorizer(None)
+            self._tables[normalized] = (frozenset(read), frozenset(written))
+        return self._tables[normalized]
+
+    def query(self, sql, params=()):
+        """Run a SELECT, returning cached rows when nothing it reads has changed."""
+        read, written = self.tables(sql, params)
+        if written:
+            raise ValueError("query() is for read-only statements; use execute()")
+        if read & self._dirty:
+            return self.conn.execute(sql, params).fetchall()
+        key = self.cache.key(sql, params)
+        rows = self.cache.get(key)
+        if rows is None:
+            generation = self.cache.generation(read)
+            rows = tuple(self.conn.execute(sql, params))
+            self.cache.put(key, rows, read, generation)
+        return rows
+
+    def execute(self, sql, params=()):
+        """Run any statement; writes invalidate the tables they touch."""
+        written = self.tables(sql, params)[1]
+        cursor = self.conn.execute(sql, params)
+        if written:
+            self._dirty |= written
+            self.cache.invalidate(written)
+        return cursor
+
+    def executemany(self, sql, seq_of_params):
+        seq_of_params = list(seq_of_params)
+        if not seq_of_params:
+            return self.conn.executemany(sql, seq_of_params)
+        written = self.tables(sql, seq_of_params[0])[1]
+        cursor = self.conn.executemany(sql, seq_of_params)
+        self._dirty |= written
+        self.cache.invalidate(written)
+        return cursor
+
+    def commit(self):
+        self.conn.commit()
+        # Another connection sharing the cache may have cached pre-commit rows
+        self.cache.invalidate(self._dirty)
+        self._dirty.clear()
+
+    def rollback(self):
+        self.conn.rollback()
+        # Results read inside the transaction may have cached rolled-back rows
+        self.cache.invalidate(self._dirty)
+        self._dirty.clear()
+
+def demonstrate_query_cache():
+    """Demonstrate caching the day19 reporting queries with table invalidation."""
+    print("Query Result Cache:")
+
+    rng = random.Random(14)
+    with tempfile.TemporaryDirectory() as work_dir:
+        db_path = os.path.join(work_dir, 'cache.db')
+        raw = sqlite_pool.connect(db_path)
+        raw.executescript('''
+            CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT UNIQUE NOT NULL, email TEXT, age INTEGER);
+            CREATE TABLE products (id INTEGER PRIMARY KEY, name TEXT NOT NULL, price REAL, category TEXT,
+                                   stock_quantity INTEGER DEFAULT 0);
+            CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER, product_id INTEGER,
+                                 quantity INTEGER, total_amount REAL);
+        ''')
+        raw.executemany('INSERT INTO users VALUES (?, ?, ?, ?)',
+                        [(i, f'user{i}', f'user{i}@example.com', rng.randint(18, 80)) for i in range(1, 2_001)])
+        raw.executemany('INSERT INTO products VALUES (?, ?, ?, ?, 100)',
+                        [(i, f'Product {i}', round(rng.uniform(5, 500), 2), rng.choice(['Electronics', 'Accessories', 'Books']))
+                         for i in range(1, 501)])
+        raw.executemany('INSERT INTO orders (user_id, product_id, quantity, total_amount) VALUES (?, ?, ?, ?)',
+                        [(rng.randint(1, 2_000), rng.randint(1, 500), rng.randint(1, 3), round(rng.uniform(5, 1_500), 2))
+                         for _ in range(DEMO_ROWS)])
+        raw.commit()
+
+        conn = CachingConnection(raw)
+        orders_with_details = '''
+            SELECT u.username, p.name, o.quantity, o.total_amount
+            FROM users u
+            JOIN orders o ON u.id = o.user_id
+            JOIN products p ON o.product_id = p.id
+            WHERE u.age > ?
+            ORDER BY o.total_amount DESC
+            LIMIT 20
+        '''
+        category_stats = '''
+            SELECT category, COUNT(*) as product_count, AVG(price) as avg_price
+            FROM products
+            GROUP BY category
+        '''
+
+        # 1. Normalized keys and dependencies
+        print("\n1. Keys and Table Dependencies:")
+        same = QueryCache.key(category_stats) == QueryCache.key('select category, count(*) as product_count, '
+                                                                'avg(price) as avg_price from products group by category;')
+        print(f"Reformatted SQL shares a key: {same}")
+        print(f"orders_with_details reads: {sorted(conn.tables(orders_with_details, (30,))[0])}")
+        print(f"category_stats reads:      {sorted(conn.tables(category_stats)[0])}")
+        named = "SELECT COUNT(*) FROM users WHERE username != '?' AND age > :age"
+        print(f"Named parameters, '?' in a literal: {conn.query(named, {'age': 30})[0][0]} users over 30")
+
+        # 2. A dashboard that repeats the same reports
+        print("\n2. 20 Dashboard Refreshes:")
+        for label, run in [('SQLite every time', lambda sql, params=(): raw.execute(sql, params).fetchall()),
+                           ('Result cache', conn.query)]:
+            start = time.perf_counter()
+            for _ in range(20):
+                report = run(orders_with_details, (30,))
+                stats = run(category_stats)
+            print(f"{label:<18} {(time.perf_counter() - start) * 1000:8.2f} ms")
+        assert list(report) == raw.execute(orders_with_details, (30,)).fetchall()
+        print(f"hits={conn.cache.hits} misses={conn.cache.misses}")
+
+        # 3. Writes invalidate only dependent results
+        print("\n3. Table-Level Invalidation:")
+        conn.execute('INSERT INTO orders (user_id, product_id, quantity, total_amount) VALUES (?, ?, ?, ?)',
+                     (1, 1, 5, 99_999.0))
+        conn.commit()
+        print(f"After an order insert: {conn.cache.invalidations} result(s) invalidated; "
+              f"top order now {conn.query(orders_with_details, (0,))[0]}")
+        hits = conn.cache.hits
+        conn.query(category_stats)
+        print(f"category_stats still cached (hit): {conn.cache.hits == hits + 1}")
+
+        # 4. Rolled-back writes never leave stale rows behind
+        print("\n4. Rollback:")
+        conn.execute("UPDATE products SET price = 0 WHERE category = 'Books'")
+        during = dict((row[0], row[2]) for row in conn.query(category_stats))['Books']
+        conn.rollback()
+        after = dict((row[0], row[2]) for row in conn.query(category_stats))['Books']
+        print(f"Books avg price inside the transaction: {during:.2f}, after rollback: {after:.2f}")
+
+        # 5. A read that races a write is not cached; evicted keys leave no index entries
+        print("\n5. Stale Puts and Eviction:")
+        small = QueryCache(max_entries=2)
+        generation = small.generation({'products'})
+        stale = raw.execute(category_stats).fetchall()  # read, then another connection writes
+        small.invalidate({'products'})
+        small.put(QueryCache.key(category_stats), stale, {'products'}, generation)
+        print(f"Stale rows cached after the race: {small.get(QueryCache.key(category_stats)) is not None}")
+        for user_id in range(1, 101):
+            key = QueryCache.key('SELECT * FROM users WHERE id = ?', (user_id,))
+            small.put(key, [(user_id,)], {'users'}, small.generation({'users'}))
+        print(f"100 puts into 2 slots: {len(small._entries)} entries, "
+              f"{sum(len(keys) for keys in small._by_table.values())} keys in the table index")
+
+        sqlite_pool.close(db_path)
+
+demonstrate_query_cache()
+
+# =============================================================================
+# 15. EXERCISES
 # =============================================================================
 
 print("\n🏋️ EXERCISES")
@@ -865,7 +2911,7 @@ Exercise 5: Create a Social Media Database
 """)
 
 # =============================================================================
-# 10. BEST PRACTICES
+# 16. BEST PRACTICES
 # =============================================================================
 
 print("\n💡 BEST PRACTICES")
@@ -908,7 +2954,7 @@ SQL Database Best Practices:
 """)
 
 # =============================================================================
-# 11. COMMON MISTAKES TO AVOID
+# 17. COMMON MISTAKES TO AVOID
 # =============================================================================
 
 print("\n⚠️ COMMON MISTAKES TO AVOID")
@@ -947,7 +2993,7 @@ Common SQL Database mistakes:
 """)
 
 # =============================================================================
-# 12. KEY TAKEAWAYS
+# 18. KEY TAKEAWAYS
 # =============================================================================
 
 print("\n🎯 KEY TAKEAWAYS")
@@ -958,8 +3004,19 @@ What you've learned today:
 
 ✅ SQL database concepts and operations
 ✅ SQLite database operations with Python
+✅ Pooled, PRAGMA-tuned SQLite connections
+✅ Checkpointed bulk loading
+✅ Query plans and index advice
+✅ SQL push-down and chunked reads
+✅ Fast, atomic DataFrame writes
+✅ Conditional updates with BEGIN IMMEDIATE retries
+✅ Bulk and Core inserts with yield_per streaming
+✅ Materialized aggregates with incremental refresh
+✅ Reader pool plus single writer routing
+✅ Result caching with table-level invalidation
 ✅ Pandas integration with databases
 ✅ SQLAlchemy ORM for database operations
+✅ Eager loading to avoid N+1 queries
 ✅ PostgreSQL and MySQL connections
 ✅ Database transactions and error handling
 ✅ Database design and relationships
@@ -973,7 +3030,7 @@ Next Steps:
 """)
 
 # =============================================================================
-# 13. CONCLUSION
+# 19. CONCLUSION
 # =============================================================================
 
 print("\n🎉 CONGRATULATIONS!")
@@ -996,7 +3053,7 @@ Happy coding! 🐍✨
 """)
 
 # =============================================================================
-# 14. COMPLETE LEARNING JOURNEY SUMMARY
+# 20. COMPLETE LEARNING JOURNEY SUMMARY
 # =============================================================================
 
 print("\n🎓 COMPLETE LEARNING JOURNEY SUMMARY")
@@ -1040,6 +3097,7 @@ Happy coding! 🐍✨
 
 # Clean up created files
 import os
+sqlite_pool.close_all()
 files_to_clean = ['example.db', 'sqlalchemy_example.db', 'transactions_example.db', 'design_example.db']
 for file in files_to_clean:
     if os.path.exists(file):
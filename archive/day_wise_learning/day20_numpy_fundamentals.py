@@ -21,6 +21,7 @@ print("=" * 60)
 
 import numpy as np
 import matplotlib.pyplot as plt
+import sys
 import time
 import warnings
 warnings.filterwarnings('ignore')
@@ -702,7 +703,583 @@ def demonstrate_performance():
 performance_result = demonstrate_performance()
 
 # =============================================================================
-# 10. EXERCISES
+# 10. DTYPE-AWARE MEMORY PLANNING
+# =============================================================================
+
+print("\n🧠 DTYPE-AWARE MEMORY PLANNING")
+print("-" * 35)
+
+# Strings become categorical when unique values / rows is at most this ratio
+CATEGORY_MAX_RATIO = 0.5
+# Numeric columns become sparse when at least this share of values is zero
+SPARSE_MIN_ZERO_RATIO = 0.9
+
+def _column_nbytes(column):
+    """Return the in-memory size of an array or pandas Series in bytes."""
+    if hasattr(column, 'memory_usage'):
+        return int(column.memory_usage(index=False, deep=True))
+    if hasattr(column, 'nbytes') and getattr(column, 'dtype', None) != object:
+        return int(column.nbytes)
+    arr = np.asarray(column)
+    return int(arr.nbytes + sum(sys.getsizeof(value) for value in arr.tolist()))
+
+def _narrowest_int(arr, allow_unsigned=False):
+    """Return the smallest integer dtype that holds every value of arr.
+
+    Signed columns stay signed, like pd.to_numeric(downcast='integer'), so
+    later arithmetic such as age - 40 cannot wrap around. Pass
+    allow_unsigned=True to move non-negative signed columns to uint types.
+    """
+    if arr.size == 0:
+        return arr.dtype
+    low, high = arr.min(), arr.max()
+    unsigned = arr.dtype.kind == 'u' or (allow_unsigned and low >= 0)
+    candidates = ([np.uint8, np.uint16, np.uint32, np.uint64] if unsigned
+                  else [np.int8, np.int16, np.int32, np.int64])
+    for candidate in candidates:
+        info = np.iinfo(candidate)
+        if info.min <= low and high <= info.max:
+            return np.dtype(candidate)
+    return arr.dtype
+
+def _narrowest_float(arr, float_rtol):
+    """Return the smallest float dtype whose round trip stays within float_rtol."""
+    for candidate in (np.float16, np.float32):
+        if np.dtype(candidate).itemsize >= arr.dtype.itemsize:
+            break
+        with np.errstate(over='ignore'):
+            round_trip = arr.astype(candidate).astype(arr.dtype)
+        if np.allclose(round_trip, arr, rtol=float_rtol, atol=0, equal_nan=True):
+            return np.dtype(candidate)
+    return arr.dtype
+
+def infer_narrowest_dtype(values, float_rtol=0.0, allow_unsigned=False):
+    """Infer the most compact safe representation for one column.
+
+    Returns a (kind, dtype) pair where kind is 'keep', 'int', 'float',
+    'category' or 'sparse'. Floats are only narrowed when every value
+    survives the round trip within float_rtol (0.0 means bit-exact).
+    Signed integers keep their sign unless allow_unsigned is True.
+    """
+    dtype_name = str(getattr(values, 'dtype', ''))
+    if dtype_name == 'category' or dtype_name.startswith('Sparse'):
+        return 'keep', None
+
+    arr = np.asarray(values)
+    if arr.size == 0:
+        return 'keep', arr.dtype
+
+    if arr.dtype.kind in 'OUS':
+        try:
+            n_unique = len(set(arr.tolist()))
+        except TypeError:
+            # Unhashable values (lists, dicts) cannot become categories
+            return 'keep', arr.dtype
+        if n_unique / arr.size <= CATEGORY_MAX_RATIO:
+            return 'category', None
+        return 'keep', arr.dtype
+
+    if arr.dtype.kind in 'iu':
+        narrow = _narrowest_int(arr, allow_unsigned=allow_unsigned)
+    elif arr.dtype.kind == 'f':
+        narrow = _narrowest_float(arr, float_rtol)
+    else:
+        return 'keep', arr.dtype
+
+    if np.count_nonzero(arr) / arr.size <= 1 - SPARSE_MIN_ZERO_RATIO:
+        return 'sparse', narrow
+    if narrow != arr.dtype:
+        return ('int' if arr.dtype.kind in 'iu' else 'float'), narrow
+    return 'keep', arr.dtype
+
+def plan_memory(data, float_rtol=0.0, allow_unsigned=False):
+    """Build a per-column dtype plan for a DataFrame or a dict of arrays."""
+    plan = {}
+    for name in list(data.keys()):
+        column = data[name]
+        kind, dtype = infer_narrowest_dtype(column, float_rtol=float_rtol,
+                                            allow_unsigned=allow_unsigned)
+        plan[name] = {
+            'kind': kind,
+            'from': str(column.dtype),
+            'to': 'category' if kind == 'category' else
+                  f"Sparse[{dtype}, 0]" if kind == 'sparse' else str(dtype),
+            'dtype': dtype,
+        }
+    return plan
+
+def apply_memory_plan(data, plan):
+    """Apply a plan from plan_memory to data in place, column by column."""
+    for name, step in plan.items():
+        kind, dtype = step['kind'], step['dtype']
+        column = data[name]
+        if kind in ('int', 'float'):
+            data[name] = column.astype(dtype)
+        elif kind == 'category':
+            import pandas as pd
+            data[name] = (column.astype('category') if hasattr(column, 'cat')
+                          else pd.Categorical(column))
+        elif kind == 'sparse':
+            import pandas as pd
+            data[name] = (column.astype(pd.SparseDtype(dtype, 0)) if hasattr(column, 'sparse')
+                          else pd.arrays.SparseArray(np.asarray(column, dtype=dtype), fill_value=0))
+    return data
+
+def optimize_memory(data, float_rtol=0.0, allow_unsigned=False):
+    """Plan and apply the narrowest dtypes in place and report memory before/after."""
+    before = {name: _column_nbytes(data[name]) for name in list(data.keys())}
+    plan = plan_memory(data, float_rtol=float_rtol, allow_unsigned=allow_unsigned)
+    apply_memory_plan(data, plan)
+    after = {name: _column_nbytes(data[name]) for name in list(data.keys())}
+
+    return {
+        'plan': plan,
+        'before': before,
+        'after': after,
+        'total_before': sum(before.values()),
+        'total_after': sum(after.values()),
+    }
+
+def print_memory_report(title, report):
+    """Print a column-by-column memory report from optimize_memory."""
+    print(f"\n{title}:")
+    for name, step in report['plan'].items():
+        before_kb = report['before'][name] / 1024
+        after_kb = report['after'][name] / 1024
+        print(f"  {name:<15} {step['from']:>10} -> {step['to']:<20} "
+              f"{before_kb:8.1f} KB -> {after_kb:8.1f} KB")
+    total_before = report['total_before']
+    total_after = report['total_after']
+    saved = 100 * (1 - total_after / total_before) if total_before else 0.0
+    print(f"  Total: {total_before / 1024:.1f} KB -> {total_after / 1024:.1f} KB ({saved:.1f}% saved)")
+
+def demonstrate_memory_planner():
+    """Demonstrate dtype-aware memory planning on the day 13/17/18 datasets."""
+    import pandas as pd
+    print("Dtype-Aware Memory Planning:")
+
+    np.random.seed(42)
+
+    # 1. Day 13 customer analysis dataset
+    customer_data = pd.DataFrame({
+        'Customer_ID': range(1, 1001),
+        'Age': np.random.normal(35, 10, 1000).astype(int),
+        'Income': np.random.normal(50000, 15000, 1000),
+        'Spending': np.random.normal(2000, 500, 1000),
+        'Region': np.random.choice(['Urban', 'Suburban', 'Rural'], 1000),
+        'Segment': np.random.choice(['Premium', 'Standard', 'Basic'], 1000)
+    })
+    report = optimize_memory(customer_data, float_rtol=1e-6)
+    print_memory_report("1. Day 13 customer data (float32 within 1e-6)", report)
+    print(f"  Age stays signed: min(Age - 40) = {(customer_data['Age'] - 40).min()}")
+
+    # 2. Day 17 preprocessing dataset
+    preprocessing_data = pd.DataFrame({
+        'age': np.random.normal(35, 10, 1000),
+        'income': np.random.normal(50000, 15000, 1000),
+        'education': np.random.choice(['High School', 'Bachelor', 'Master', 'PhD'], 1000),
+        'experience': np.random.normal(10, 5, 1000),
+        'salary': np.random.normal(60000, 20000, 1000)
+    })
+    report = optimize_memory(preprocessing_data)
+    print_memory_report("2. Day 17 preprocessing data (bit-exact floats)", report)
+
+    # 3. Day 18 churn dataset as a dict of arrays
+    n_customers = 1000
+    churn_data = {
+        'tenure': np.random.normal(24, 12, n_customers).round().astype(np.int64),
+        'usage': np.random.normal(50, 20, n_customers),
+        'support_calls': np.random.poisson(2, n_customers),
+        'refunds': np.random.poisson(0.05, n_customers),
+        'churn': np.random.choice([0, 1], n_customers, p=[0.8, 0.2])
+    }
+    report = optimize_memory(churn_data, float_rtol=1e-6, allow_unsigned=True)
+    print_memory_report("3. Day 18 churn data (dict of arrays, unsigned opt-in)", report)
+    print(f"  'refunds' is now {type(churn_data['refunds']).__name__} "
+          f"with {churn_data['refunds'].npoints} stored values")
+
+    return customer_data, preprocessing_data, churn_data
+
+memory_planner_result = demonstrate_memory_planner()
+
+# =============================================================================
+# 11. LAYOUT-AWARE ARRAY OPERATIONS
+# =============================================================================
+
+print("\n🧭 LAYOUT-AWARE ARRAY OPERATIONS")
+print("-" * 35)
+
+import logging
+
+layout_logger = logging.getLogger('day20.layout')
+
+# Set to True to log every layout helper call that had to copy instead of returning a view
+LAYOUT_DEBUG = False
+
+def array_layout(arr):
+    """Return 'C', 'F', 'C+F' (e.g. 1D arrays) or 'strided' for arr."""
+    c_contiguous, f_contiguous = arr.flags.c_contiguous, arr.flags.f_contiguous
+    if c_contiguous and f_contiguous:
+        return 'C+F'
+    if c_contiguous:
+        return 'C'
+    if f_contiguous:
+        return 'F'
+    return 'strided'
+
+def _report_copy(operation, source, result):
+    """Log operations that allocated a new buffer while LAYOUT_DEBUG is on."""
+    if LAYOUT_DEBUG and result.size and not np.shares_memory(source, result):
+        layout_logger.warning("%s copied %d bytes (source layout %s, shape %s)",
+                              operation, result.nbytes, array_layout(source), source.shape)
+    return result
+
+def flat_view(arr, order='C'):
+    """Flatten like arr.flatten(order), returning a view whenever the layout allows it.
+
+    Use order='K' when element order does not matter (reductions, elementwise
+    math) so both C- and F-contiguous arrays flatten without a copy. The result
+    may share memory with arr, so copy it before mutating.
+    """
+    return _report_copy(f"flat_view(order={order!r})", arr, arr.ravel(order=order))
+
+def reshape_view(arr, shape, order='C'):
+    """Reshape arr, logging when the layout forces a copy."""
+    return _report_copy(f"reshape_view({shape})", arr, arr.reshape(shape, order=order))
+
+def transpose_view(arr):
+    """Transpose without copying; a C-contiguous input becomes F-contiguous."""
+    return arr.T
+
+def ensure_layout(arr, order='C'):
+    """Return arr in the requested contiguous layout, copying only if it is not already."""
+    return _report_copy(f"ensure_layout({order!r})", arr, np.asarray(arr, order=order))
+
+class ArrayWorkspace:
+    """Reusable output buffers for hot loops that chain array operations.
+
+    Each named buffer is allocated once and reused while its shape, dtype and
+    order stay the same, so a loop that concatenates, flattens and multiplies
+    same-shaped inputs stops allocating after its first pass. Results are
+    overwritten by the next call with the same name.
+    """
+
+    def __init__(self):
+        self._buffers = {}
+        self.allocations = 0
+
+    def buffer(self, name, shape, dtype, order='C'):
+        """Return the named buffer, allocating it only when its spec changes."""
+        shape, dtype = tuple(shape), np.dtype(dtype)
+        buf = self._buffers.get(name)
+        if buf is None or buf.shape != shape or buf.dtype != dtype or array_layout(buf) not in (order, 'C+F'):
+            buf = np.empty(shape, dtype=dtype, order=order)
+            self._buffers[name] = buf
+            self.allocations += 1
+        return buf
+
+    def concatenate(self, name, arrays, axis=0):
+        """np.concatenate into a preallocated target."""
+        shape = list(arrays[0].shape)
+        shape[axis] = sum(arr.shape[axis] for arr in arrays)
+        out = self.buffer(name, shape, np.result_type(*arrays))
+        return np.concatenate(arrays, axis=axis, out=out)
+
+    def flatten(self, name, arr, order='C'):
+        """Like arr.flatten(order) but written into a reused 1D buffer."""
+        out = self.buffer(name, (arr.size,), arr.dtype)
+        out.reshape(arr.shape, order=order)[...] = arr
+        return out
+
+    def apply(self, name, ufunc, *arrays):
+        """Evaluate an elementwise ufunc (np.multiply, np.add, ...) into a reused buffer."""
+        shape = np.broadcast_shapes(*(arr.shape for arr in arrays))
+        out = self.buffer(name, shape, np.result_type(*arrays))
+        return ufunc(*arrays, out=out)
+
+def demonstrate_layout_operations():
+    """Demonstrate layout tracking, view-preferring helpers and buffer reuse."""
+    global LAYOUT_DEBUG
+    print("Layout-Aware Array Operations:")
+
+    # 1. Tracking layout
+    print("\n1. Tracking Layout:")
+    reshaped = np.arange(24).reshape(4, 6)
+    transposed = transpose_view(reshaped)
+    print(f"reshaped: {array_layout(reshaped)}, reshaped.T: {array_layout(transposed)}, "
+          f"reshaped[:, ::2]: {array_layout(reshaped[:, ::2])}")
+    print(f"Transpose shares memory: {np.shares_memory(reshaped, transposed)}")
+
+    # 2. Views instead of copies
+    print("\n2. Views Instead of Copies:")
+    print(f"flatten() shares memory: {np.shares_memory(reshaped, reshaped.flatten())}")
+    print(f"flat_view() shares memory: {np.shares_memory(reshaped, flat_view(reshaped))}")
+    print(f"flat_view(order='K') of the transpose shares memory: "
+          f"{np.shares_memory(reshaped, flat_view(transposed, order='K'))}")
+
+    # 3. Debug mode logs unexpected copies
+    print("\n3. Debug Mode:")
+    if not layout_logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter("  [layout] %(message)s"))
+        layout_logger.addHandler(handler)
+    LAYOUT_DEBUG = True
+    flat_view(transposed)                # C-order flatten of an F array must copy
+    ensure_layout(transposed, 'F')       # already F-contiguous: no copy, nothing logged
+    ensure_layout(transposed, 'C')       # copies and is logged
+    LAYOUT_DEBUG = False
+
+    # 4. Hot loop: allocate every step vs reuse a workspace
+    print("\n4. Hot Loop Without Per-Step Allocation:")
+    blocks = [np.random.randn(256, 256) for _ in range(4)]
+    weights = np.random.randn(512, 512)
+    iterations = 300
+
+    start_time = time.time()
+    for _ in range(iterations):
+        stacked = np.concatenate([np.concatenate(blocks[:2], axis=1),
+                                  np.concatenate(blocks[2:], axis=1)], axis=0)
+        projected = stacked * weights
+        naive_total = projected.flatten().sum()
+    naive_time = time.time() - start_time
+
+    workspace = ArrayWorkspace()
+    start_time = time.time()
+    for _ in range(iterations):
+        top = workspace.concatenate('top', blocks[:2], axis=1)
+        bottom = workspace.concatenate('bottom', blocks[2:], axis=1)
+        stacked = workspace.concatenate('stacked', [top, bottom], axis=0)
+        projected = workspace.apply('projected', np.multiply, stacked, weights)
+        reused_total = flat_view(projected, order='K').sum()
+    reused_time = time.time() - start_time
+
+    print(f"Allocating loop: {naive_time:.4f} seconds")
+    print(f"Workspace loop:  {reused_time:.4f} seconds ({workspace.allocations} allocations "
+          f"for {iterations} iterations)")
+    print(f"Results match: {np.isclose(naive_total, reused_total)}")
+
+    return reshaped, transposed, workspace
+
+layout_result = demonstrate_layout_operations()
+
+# =============================================================================
+# 12. BATCHED LINEAR ALGEBRA
+# =============================================================================
+
+print("\n🧮 BATCHED LINEAR ALGEBRA")
+print("-" * 30)
+
+import hashlib
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+def is_symmetric(A, rtol=1e-10, atol=1e-12):
+    """Return True when every matrix in a (..., n, n) stack is symmetric.
+
+    Complex matrices must be Hermitian (equal to their conjugate transpose),
+    which is what eigh requires; a complex symmetric matrix is not enough.
+    """
+    return (A.shape[-1] == A.shape[-2]
+            and np.allclose(A, np.conj(np.swapaxes(A, -1, -2)), rtol=rtol, atol=atol))
+
+class BatchedSolver:
+    """Vectorized solver for stacks of linear systems and eigenproblems.
+
+    - solve() takes stacked (k, n, n) systems and solves them in one LAPACK call
+    - eig() picks eigh for symmetric input and eig otherwise
+    - solve_cached() keeps LU factorizations of recently seen matrices, so the
+      same A solved against many right-hand sides is only factorized once
+    - max_workers fans large batches out over threads while capping BLAS
+      threads per worker, so workers * BLAS threads never exceeds the CPU count
+    """
+
+    def __init__(self, max_factorizations=32, max_workers=None):
+        self.max_factorizations = max_factorizations
+        self.max_workers = max_workers
+        self._factorizations = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    # ---- batched solve -----------------------------------------------------
+
+    @staticmethod
+    def _solve_stack(A, b):
+        """np.linalg.solve for stacks, accepting (k, n) vectors or (k, n, m) matrices.
+
+        A single (n,) vector is shared by every system in the stack.
+        """
+        if b.ndim == A.ndim - 2:
+            return np.linalg.solve(A, b[:, np.newaxis])[..., 0]
+        if b.ndim == A.ndim - 1:
+            return np.linalg.solve(A, b[..., np.newaxis])[..., 0]
+        return np.linalg.solve(A, b)
+
+    def _blas_limits(self, workers):
+        """Cap BLAS threads while several workers run LAPACK calls in parallel."""
+        try:
+            from threadpoolctl import threadpool_limits
+        except ImportError:
+            return nullcontext()
+        return threadpool_limits(limits=max(1, (os.cpu_count() or 1) // workers), user_api='blas')
+
+    def solve(self, A, b):
+        """Solve A[i] @ x[i] = b[i] for every system in the stack."""
+        A, b = np.asarray(A), np.asarray(b)
+        if A.ndim == 2:
+            return self._solve_stack(A[np.newaxis], b[np.newaxis])[0]
+
+        workers = min(self.max_workers or 1, len(A))
+        if workers <= 1:
+            return self._solve_stack(A, b)
+
+        # NumPy releases the GIL inside LAPACK, so chunks solve in parallel.
+        # A shared (n,) right-hand side has no batch axis and goes to every chunk whole.
+        shared_b = b.ndim == A.ndim - 2
+        bounds = np.linspace(0, len(A), workers + 1).astype(int)
+        chunks = [(A[lo:hi], b if shared_b else b[lo:hi])
+                  for lo, hi in zip(bounds[:-1], bounds[1:])]
+        with self._blas_limits(workers), ThreadPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(lambda chunk: self._solve_stack(*chunk), chunks))
+        return np.concatenate(parts, axis=0)
+
+    # ---- eigenproblems -----------------------------------------------------
+
+    def eig(self, A):
+        """Eigen-decompose a stack, using eigh for the symmetric matrices in it.
+
+        Symmetric (or, for complex input, Hermitian) matrices return real,
+        ascending eigenvalues and orthonormal eigenvectors; a mixed stack
+        returns complex results for every matrix.
+        """
+        A = np.asarray(A)
+        if A.ndim == 2:
+            values, vectors = self.eig(A[np.newaxis])
+            return values[0], vectors[0]
+
+        symmetric = np.array([is_symmetric(matrix) for matrix in A])
+        if symmetric.all():
+            return np.linalg.eigh(A)
+        if not symmetric.any():
+            return np.linalg.eig(A)
+
+        values = np.empty(A.shape[:-1], dtype=complex)
+        vectors = np.empty(A.shape, dtype=complex)
+        values[symmetric], vectors[symmetric] = np.linalg.eigh(A[symmetric])
+        values[~symmetric], vectors[~symmetric] = np.linalg.eig(A[~symmetric])
+        return values, vectors
+
+    # ---- cached LU factorizations -----------------------------------------
+
+    @staticmethod
+    def _matrix_key(A):
+        """Stable content hash for a matrix (shape, dtype and bytes)."""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(str((A.shape, A.dtype.str)).encode())
+        digest.update(np.ascontiguousarray(A).tobytes())
+        return digest.hexdigest()
+
+    def factorize(self, A, key=None):
+        """Return the LU factorization of A, reusing a cached one when possible.
+
+        Pass a key (e.g. 'stiffness') for matrices solved repeatedly: hashing
+        a large matrix on every call can cost as much as the solve itself.
+        """
+        from scipy.linalg import lu_factor  # SciPy ships with scikit-learn (days 17-18)
+
+        A = np.asarray(A)
+        key = key if key is not None else self._matrix_key(A)
+        if key in self._factorizations:
+            self._factorizations.move_to_end(key)
+            self.cache_hits += 1
+            return self._factorizations[key]
+
+        self.cache_misses += 1
+        factorization = lu_factor(A)
+        self._factorizations[key] = factorization
+        if len(self._factorizations) > self.max_factorizations:
+            self._factorizations.popitem(last=False)
+        return factorization
+
+    def invalidate(self, key):
+        """Drop a cached factorization after the matrix behind key changed."""
+        self._factorizations.pop(key, None)
+
+    def solve_cached(self, A, b, key=None):
+        """Solve A @ x = b for one matrix A, reusing its LU factorization."""
+        from scipy.linalg import lu_solve
+
+        # lu_factor already rejected non-finite matrices
+        return lu_solve(self.factorize(A, key=key), np.asarray(b), check_finite=False)
+
+def demonstrate_batched_linear_algebra():
+    """Demonstrate batched solves, eigh selection, LU caching and threading."""
+    print("Batched Linear Algebra:")
+    np.random.seed(42)
+    solver = BatchedSolver(max_workers=4)
+
+    # 1. One vectorized call instead of a Python loop
+    print("\n1. Batched Linear Systems:")
+    k, n = 2000, 8
+    A = np.random.randn(k, n, n) + n * np.eye(n)
+    b = np.random.randn(k, n)
+
+    start_time = time.time()
+    looped = np.array([np.linalg.solve(A[i], b[i]) for i in range(k)])
+    loop_time = time.time() - start_time
+
+    start_time = time.time()
+    batched = solver.solve(A, b)
+    batched_time = time.time() - start_time
+
+    print(f"Solved {k} systems of size {n}x{n}")
+    print(f"Loop time: {loop_time:.4f} seconds, batched time: {batched_time:.4f} seconds")
+    print(f"Results match: {np.allclose(looped, batched)}")
+    print(f"Max residual: {np.abs(np.einsum('kij,kj->ki', A, batched) - b).max():.2e}")
+    shared = solver.solve(A, b[0])
+    print(f"Shared right-hand side matches: {np.allclose(shared, np.linalg.solve(A, b[0][:, np.newaxis])[..., 0])}")
+
+    # 2. eigh for symmetric input
+    print("\n2. Symmetric-Aware Eigen Decomposition:")
+    S = A + np.swapaxes(A, -1, -2)
+    values, vectors = solver.eig(S)
+    print(f"Symmetric stack: real eigenvalues {values.dtype}, shape {values.shape}")
+    mixed_values, _ = solver.eig(np.stack([S[0], A[0]]))
+    print(f"Mixed stack: {mixed_values.dtype} eigenvalues, shape {mixed_values.shape}")
+    C = A[0] + 1j * A[1]
+    complex_symmetric = C + C.T  # symmetric but not Hermitian, so eig is used
+    c_values, c_vectors = solver.eig(complex_symmetric)
+    print(f"Complex symmetric: Hermitian={is_symmetric(complex_symmetric)}, "
+          f"eigenpairs hold: {np.allclose(complex_symmetric @ c_vectors, c_vectors * c_values)}")
+
+    # 3. Cached LU for many right-hand sides
+    print("\n3. Cached LU Factorization:")
+    A_shared = np.random.randn(200, 200) + 200 * np.eye(200)
+    right_hand_sides = np.random.randn(300, 200)
+
+    start_time = time.time()
+    for rhs in right_hand_sides:
+        np.linalg.solve(A_shared, rhs)
+    uncached_time = time.time() - start_time
+
+    solver.factorize(A_shared, key='A_shared')  # factorize once up front
+    start_time = time.time()
+    for rhs in right_hand_sides:
+        x = solver.solve_cached(A_shared, rhs, key='A_shared')
+    cached_time = time.time() - start_time
+
+    print(f"Re-factorizing every call: {uncached_time:.4f} seconds")
+    print(f"Cached LU: {cached_time:.4f} seconds "
+          f"({solver.cache_misses} factorization, {solver.cache_hits} cache hits)")
+    print(f"Last residual: {np.linalg.norm(A_shared @ x - right_hand_sides[-1]):.2e}")
+
+    return solver, batched, values
+
+batched_linalg_result = demonstrate_batched_linear_algebra()
+
+# =============================================================================
+# 13. EXERCISES
 # =============================================================================
 
 print("\n🏋️ EXERCISES")
@@ -743,7 +1320,7 @@ Exercise 5: Data Visualization
 """)
 
 # =============================================================================
-# 11. BEST PRACTICES
+# 14. BEST PRACTICES
 # =============================================================================
 
 print("\n💡 BEST PRACTICES")
@@ -786,7 +1363,7 @@ NumPy best practices:
 """)
 
 # =============================================================================
-# 12. COMMON MISTAKES TO AVOID
+# 15. COMMON MISTAKES TO AVOID
 # =============================================================================
 
 print("\n⚠️ COMMON MISTAKES TO AVOID")
@@ -825,7 +1402,7 @@ Common NumPy mistakes:
 """)
 
 # =============================================================================
-# 13. KEY TAKEAWAYS
+# 16. KEY TAKEAWAYS
 # =============================================================================
 
 print("\n🎯 KEY TAKEAWAYS")
@@ -841,6 +1418,9 @@ What you've learned today:
 ✅ AI/ML applications with NumPy
 ✅ Advanced NumPy operations
 ✅ Performance optimization techniques
+✅ Dtype-aware memory planning
+✅ Layout-aware, copy-avoiding array operations
+✅ Batched linear solves and eigen decompositions
 ✅ Best practices and common mistakes
 
 Next Steps:
@@ -851,7 +1431,7 @@ Next Steps:
 """)
 
 # =============================================================================
-# 14. CONCLUSION
+# 17. CONCLUSION
 # =============================================================================
 
 print("\n🎉 CONGRATULATIONS!")
@@ -874,7 +1454,7 @@ Happy coding! 🐍✨
 """)
 
 # =============================================================================
-# 15. COMPLETE LEARNING JOURNEY SUMMARY
+# 18. COMPLETE LEARNING JOURNEY SUMMARY
 # =============================================================================
 
 print("\n🎓 COMPLETE LEARNING JOURNEY SUMMARY")